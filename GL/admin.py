@@ -1,8 +1,73 @@
-from django.contrib import admin
-from .models import Account, JournalEntryDetail, JournalEntryHeader
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.forms.models import BaseInlineFormSet
+from .models import (
+    Account, BankStatement, BankStatementLine, JournalEntryDetail, JournalEntryHeader,
+    RecurringEntryTemplate, RecurringEntryTemplateLine,
+)
+from .posting import post_journal_entries
 from django.apps import apps
 
 # Register your models here.
 admin.site.register(Account)
 admin.site.register(JournalEntryDetail)
-admin.site.register(JournalEntryHeader)
\ No newline at end of file
+
+
+@admin.register(JournalEntryHeader)
+class JournalEntryHeaderAdmin(admin.ModelAdmin):
+    list_display = ('entry_number', 'entry_date', 'entry_type', 'description', 'total_debit', 'total_credit', 'is_posted')
+    list_filter = ('is_posted', 'entry_type')
+    search_fields = ('entry_number', 'description', 'reference')
+    actions = ['post_selected_entries']
+
+    @admin.action(description='Post selected journal entries')
+    def post_selected_entries(self, request, queryset):
+        results = post_journal_entries(queryset.order_by('pk').values_list('pk', flat=True))
+        posted = [result for result in results if result['posted']]
+        rejected = [result for result in results if not result['posted']]
+        if posted:
+            self.message_user(request, f'Posted {len(posted)} journal entries.', messages.SUCCESS)
+        for result in rejected:
+            self.message_user(request, f"{result['entry_number']}: {result['error']}", messages.WARNING)
+
+
+class RecurringEntryTemplateLineFormSet(BaseInlineFormSet):
+    """A template must balance, or every entry generated from it would be rejected when posted"""
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        lines = [form.cleaned_data for form in self.forms if form.cleaned_data and not form.cleaned_data.get('DELETE')]
+        debit = sum(line.get('debit_amount') or 0 for line in lines)
+        credit = sum(line.get('credit_amount') or 0 for line in lines)
+        if debit != credit:
+            raise ValidationError(f'Template does not balance: debits {debit} != credits {credit}')
+
+
+class RecurringEntryTemplateLineInline(admin.TabularInline):
+    model = RecurringEntryTemplateLine
+    formset = RecurringEntryTemplateLineFormSet
+    extra = 2
+
+
+@admin.register(RecurringEntryTemplate)
+class RecurringEntryTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'frequency', 'day_of_month', 'start_date', 'end_date', 'auto_post', 'is_active')
+    list_filter = ('frequency', 'auto_post', 'is_active')
+    search_fields = ('name', 'description')
+    inlines = [RecurringEntryTemplateLineInline]
+
+
+@admin.register(BankStatement)
+class BankStatementAdmin(admin.ModelAdmin):
+    list_display = ('account', 'source_name', 'line_count', 'duplicate_count', 'imported_by', 'imported_at')
+    list_filter = ('account',)
+
+
+@admin.register(BankStatementLine)
+class BankStatementLineAdmin(admin.ModelAdmin):
+    list_display = ('transaction_date', 'account', 'amount', 'description', 'reference', 'match_method')
+    list_filter = ('account', 'match_method')
+    search_fields = ('description', 'reference', 'transaction_id')
+    raw_id_fields = ('statement', 'matched_line')
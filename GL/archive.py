@@ -0,0 +1,106 @@
+# General Ledger Archive
+"""
+Moves the journal entries of closed fiscal years out of the hot tables.
+
+archive_fiscal_year() copies a closed year's headers and lines into
+ArchivedJournalEntryHeader/Detail with set-based INSERT ... SELECT
+statements and deletes them from the hot tables, all in one transaction.
+Years are archived oldest first, so every posted line dated on or before
+archive_boundary() lives in the archive and every later one in the hot
+tables. Balances are unaffected: Account.balance, AccountPeriodBalance and
+the closing PeriodBalanceSnapshots stay where they are.
+
+Reports read lines through line_sources(), which adds the archive only
+when the requested date range reaches back to or before the boundary. The
+boundary is read from FiscalYear on every call: archiving usually runs in
+a management command, whose process-local cache no web or worker process
+would see.
+"""
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from .dashboard import bump_ledger_version
+from .models import (
+    ArchivedJournalEntryDetail, ArchivedJournalEntryHeader, FinancialPeriod, FiscalYear,
+    JournalEntryDetail, JournalEntryHeader,
+)
+
+
+class ArchiveError(Exception):
+    """Raised when a fiscal year cannot be archived"""
+
+
+def archive_boundary():
+    """End date of the latest archived fiscal year, or None when nothing is archived"""
+    return FiscalYear.objects.filter(archived_at__isnull=False).aggregate(end=Max('end_date'))['end']
+
+
+def line_sources(date_from=None, date_to=None):
+    """Which line tables hold posted lines in the range: [archived?, ...] oldest first"""
+    boundary = archive_boundary()
+    if boundary is None:
+        return [False]
+    sources = []
+    if date_from is None or date_from <= boundary:
+        sources.append(True)
+    if date_to is None or date_to > boundary:
+        sources.append(False)
+    return sources
+
+
+def _columns(model):
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def archive_fiscal_year(fiscal_year):
+    """Move a closed fiscal year's entries to the archive. Returns (headers, lines) moved."""
+    quote = connection.ops.quote_name
+    header_table, line_table = quote(JournalEntryHeader._meta.db_table), quote(JournalEntryDetail._meta.db_table)
+    header_columns = ', '.join(quote(column) for column in _columns(JournalEntryHeader))
+    line_columns = _columns(JournalEntryDetail)
+
+    with transaction.atomic():
+        fiscal_year = FiscalYear.objects.select_for_update().get(pk=fiscal_year.pk)
+        if fiscal_year.archived_at:
+            raise ArchiveError(f'{fiscal_year} is already archived')
+        if not fiscal_year.is_closed:
+            raise ArchiveError(f'{fiscal_year} must be closed before it is archived')
+        if FinancialPeriod.objects.filter(fiscal_year=fiscal_year, is_closed=False).exists():
+            raise ArchiveError(f'{fiscal_year} still has open periods')
+        if FiscalYear.objects.filter(archived_at__isnull=True, end_date__lt=fiscal_year.start_date).exists():
+            raise ArchiveError('Earlier fiscal years must be archived first')
+        in_year_dates = {'entry_date__gte': fiscal_year.start_date, 'entry_date__lte': fiscal_year.end_date}
+        if JournalEntryHeader.objects.filter(is_posted=False, **in_year_dates).exists():
+            raise ArchiveError(f'{fiscal_year} has unposted journal entries')
+
+        # By date, so the archive boundary splits the ledger exactly
+        in_year = f'{header_table}.{quote("entry_date")} BETWEEN %s AND %s'
+        year_range = [connection.ops.adapt_datefield_value(day) for day in (fiscal_year.start_date, fiscal_year.end_date)]
+        archived_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(ArchivedJournalEntryHeader._meta.db_table)} ({header_columns}, {quote("archived_at")}) '
+                f'SELECT {header_columns}, %s FROM {header_table} WHERE {in_year}',
+                [archived_at, *year_range],
+            )
+            headers = cursor.rowcount
+            cursor.execute(
+                f'INSERT INTO {quote(ArchivedJournalEntryDetail._meta.db_table)} '
+                f'({", ".join(quote(column) for column in line_columns)}) '
+                f'SELECT {", ".join(f"{line_table}.{quote(column)}" for column in line_columns)} '
+                f'FROM {line_table} JOIN {header_table} '
+                f'ON {line_table}.{quote("journal_entry_id")} = {header_table}.{quote("id")} WHERE {in_year}',
+                year_range,
+            )
+            lines = cursor.rowcount
+            cursor.execute(
+                f'DELETE FROM {line_table} WHERE {quote("journal_entry_id")} IN '
+                f'(SELECT {quote("id")} FROM {header_table} WHERE {in_year})',
+                year_range,
+            )
+            cursor.execute(f'DELETE FROM {header_table} WHERE {in_year}', year_range)
+
+        fiscal_year.archived_at = timezone.now()
+        fiscal_year.save(update_fields=['archived_at'])
+        bump_ledger_version()
+    return headers, lines
@@ -0,0 +1,324 @@
+# General Ledger Period Closing
+"""
+Closing a FinancialPeriod stores a PeriodBalanceSnapshot per account, so a
+"balance as of date" query reads the nearest snapshot and only adds the
+activity dated after it instead of replaying the ledger since inception.
+
+Activity over a date range is read from AccountPeriodBalance, the monthly
+buckets maintained by GL.posting, for every whole calendar month in the
+range. Only the partial months at either end are summed from the posted
+journal lines, so month-aligned periods and statements never scan them.
+
+Closing a FiscalYear additionally zeroes the revenue and expense accounts
+into Retained Earnings with one CLOSING journal entry, then closes the
+year's periods.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from default.sequences import next_document_number
+from .archive import line_sources
+from .models import (
+    Account, AccountPeriodBalance, ArchivedJournalEntryDetail, FinancialPeriod, FiscalYear, JournalEntryDetail, JournalEntryHeader, PeriodBalanceSnapshot,
+)
+from .dashboard import bump_ledger_version
+from .posting import post_journal_entry
+
+ZERO = Decimal('0.00')
+INCOME_CATEGORIES = ['REVENUE', 'EXPENSE']
+RETAINED_EARNINGS_NAME = 'Retained Earnings'
+# As-of balances start from snapshots of this period type only
+SNAPSHOT_PERIOD_TYPE = 'MONTHLY'
+
+
+class PeriodCloseError(Exception):
+    """Raised when a financial period cannot be closed"""
+
+
+def posted_lines(date_from=None, date_to=None, archived=False):
+    """Journal lines of posted entries, optionally limited to a date range.
+
+    ``archived`` reads the archive tables instead of the hot ones; see
+    GL.archive.line_sources() for which a date range needs.
+    """
+    model = ArchivedJournalEntryDetail if archived else JournalEntryDetail
+    lines = model.objects.filter(journal_entry__is_posted=True)
+    if date_from:
+        lines = lines.filter(journal_entry__entry_date__gte=date_from)
+    if date_to:
+        lines = lines.filter(journal_entry__entry_date__lte=date_to)
+    return lines
+
+
+def month_after(day):
+    """First day of the month after the one containing day"""
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def split_months(date_from=None, date_to=None):
+    """Split an inclusive date range into its whole calendar months and the days around them.
+
+    Returns (months, edges). months is (first, end) bounding the
+    AccountPeriodBalance.period_start of the whole months, first inclusive
+    and end exclusive, None meaning unbounded; it is None itself when the
+    range holds no whole month. edges lists the remaining inclusive
+    (date_from, date_to) ranges, to be read from the journal lines.
+    """
+    first = date_from if date_from is None or date_from.day == 1 else month_after(date_from)
+    end = None
+    if date_to is not None:
+        end = month_after(date_to) if month_after(date_to) - timedelta(days=1) == date_to else date_to.replace(day=1)
+    if first is not None and end is not None and first >= end:
+        return None, [(date_from, date_to)]
+    edges = []
+    if first != date_from:
+        edges.append((date_from, first - timedelta(days=1)))
+    if end is not None and end - timedelta(days=1) != date_to:
+        edges.append((end, date_to))
+    return (first, end), edges
+
+
+def _line_activity(ranges, account_ids=None, closing=None, by_month=False):
+    """Grouped posted line totals over the given inclusive date ranges, one query per line table.
+
+    closing selects entries: None for all, False to leave out CLOSING entries,
+    True for CLOSING entries only. Keys are account ids, or (account id,
+    month start) when by_month.
+    """
+    starts, ends = [start for start, _ in ranges], [end for _, end in ranges]
+    activity = {}
+    for archived in line_sources(None if None in starts else min(starts), None if None in ends else max(ends)):
+        lines = posted_lines(archived=archived)
+        in_ranges = Q()
+        for start, end in ranges:
+            in_range = Q()
+            if start:
+                in_range &= Q(journal_entry__entry_date__gte=start)
+            if end:
+                in_range &= Q(journal_entry__entry_date__lte=end)
+            in_ranges |= in_range
+        lines = lines.filter(in_ranges)
+        if account_ids is not None:
+            lines = lines.filter(account_id__in=account_ids)
+        if closing is False:
+            lines = lines.exclude(journal_entry__entry_type='CLOSING')
+        elif closing:
+            lines = lines.filter(journal_entry__entry_type='CLOSING')
+        keys = ['account_id']
+        if by_month:
+            lines, keys = lines.annotate(month=TruncMonth('journal_entry__entry_date')), ['account_id', 'month']
+        rows = lines.order_by().values(*keys).annotate(debit=Sum('debit_amount'), credit=Sum('credit_amount'))
+        for row in rows:
+            key = tuple(row[name] for name in keys) if by_month else row['account_id']
+            debit, credit = activity.get(key, (ZERO, ZERO))
+            activity[key] = (debit + (row['debit'] or ZERO), credit + (row['credit'] or ZERO))
+    return activity
+
+
+def _range_activity(date_from, date_to, account_ids, include_closing, by_month):
+    """Activity from the monthly balances for whole months plus the lines for the rest"""
+    months, edges = split_months(date_from, date_to)
+    activity = {}
+    if months:
+        first, end = months
+        balances = AccountPeriodBalance.objects.all()
+        if first:
+            balances = balances.filter(period_start__gte=first)
+        if end:
+            balances = balances.filter(period_start__lt=end)
+        if account_ids is not None:
+            balances = balances.filter(account_id__in=account_ids)
+        keys = ['account_id', 'period_start'] if by_month else ['account_id']
+        rows = balances.order_by().values(*keys).annotate(debit=Sum('debit_total'), credit=Sum('credit_total'))
+        for row in rows:
+            key = tuple(row[name] for name in keys) if by_month else row['account_id']
+            activity[key] = (row['debit'] or ZERO, row['credit'] or ZERO)
+        if not include_closing:
+            # The monthly balances include CLOSING entries; take them back out
+            month_range = [(first, end - timedelta(days=1) if end else None)]
+            for key, (debit, credit) in _line_activity(month_range, account_ids, True, by_month).items():
+                total_debit, total_credit = activity.get(key, (ZERO, ZERO))
+                activity[key] = (total_debit - debit, total_credit - credit)
+    if edges:
+        for key, (debit, credit) in _line_activity(edges, account_ids, None if include_closing else False, by_month).items():
+            total_debit, total_credit = activity.get(key, (ZERO, ZERO))
+            activity[key] = (total_debit + debit, total_credit + credit)
+    return activity
+
+
+def account_activity(date_from=None, date_to=None, account_ids=None, include_closing=True):
+    """Return {account_id: (debit, credit)} of posted activity between the dates inclusive"""
+    return _range_activity(date_from, date_to, account_ids, include_closing, by_month=False)
+
+
+def monthly_account_activity(date_from=None, date_to=None, include_closing=True):
+    """Return {(account_id, month_start): (debit, credit)} of posted activity between the dates inclusive"""
+    return _range_activity(date_from, date_to, None, include_closing, by_month=True)
+
+
+def latest_snapshot_period(as_of_date, period_type=SNAPSHOT_PERIOD_TYPE):
+    """Most recent closed period of period_type with snapshots ending on or before as_of_date"""
+    return (
+        FinancialPeriod.objects
+        .filter(period_type=period_type, is_closed=True, end_date__lte=as_of_date, snapshots__isnull=False)
+        .order_by('-end_date')
+        .first()
+    )
+
+
+def account_balances_as_of(as_of_date, account_ids=None, period_type=SNAPSHOT_PERIOD_TYPE):
+    """Return {account_id: balance} of posted activity up to and including as_of_date.
+
+    Starts from the nearest closing snapshot of period_type and adds only the
+    lines after it. Posting on or before the end of any closed period is
+    rejected, even in a gap between periods, so no line dated before a
+    snapshot can be posted after it was taken.
+    """
+    balances = {}
+    date_from = None
+    period = latest_snapshot_period(as_of_date, period_type)
+    if period:
+        snapshots = period.snapshots.all()
+        if account_ids is not None:
+            snapshots = snapshots.filter(account_id__in=account_ids)
+        balances = dict(snapshots.values_list('account_id', 'closing_balance'))
+        date_from = period.end_date + timedelta(days=1)
+
+    for account_id, (debit, credit) in account_activity(date_from, as_of_date, account_ids).items():
+        balances[account_id] = balances.get(account_id, ZERO) + debit - credit
+    return balances
+
+
+def close_period(period):
+    """Close a financial period and write its per-account balance snapshots"""
+    with transaction.atomic():
+        period = FinancialPeriod.objects.select_for_update().get(pk=period.pk)
+        if period.is_closed:
+            raise PeriodCloseError(f'{period} is already closed')
+        earlier_open = FinancialPeriod.objects.filter(
+            period_type=period.period_type, is_closed=False, end_date__lt=period.start_date
+        ).order_by('end_date').first()
+        if earlier_open:
+            raise PeriodCloseError(f'{earlier_open} is still open; close earlier periods first')
+
+        opening = account_balances_as_of(period.start_date - timedelta(days=1), period_type=period.period_type)
+        activity = account_activity(period.start_date, period.end_date)
+
+        snapshots = []
+        for account_id in sorted(set(opening) | set(activity)):
+            opening_balance = opening.get(account_id, ZERO)
+            debit, credit = activity.get(account_id, (ZERO, ZERO))
+            snapshots.append(PeriodBalanceSnapshot(
+                period=period,
+                account_id=account_id,
+                opening_balance=opening_balance,
+                debit_total=debit,
+                credit_total=credit,
+                closing_balance=opening_balance + debit - credit,
+            ))
+        PeriodBalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+        period.is_closed = True
+        period.closed_date = timezone.now()
+        period.save(update_fields=['is_closed', 'closed_date'])
+        bump_ledger_version()
+    return period
+
+
+def retained_earnings_account(account_number=None):
+    """The equity account that absorbs the year's net income"""
+    accounts = Account.objects.filter(account_type__category='EQUITY', is_active=True, is_header=False)
+    if account_number:
+        account = accounts.filter(account_number=account_number).first()
+    else:
+        account = accounts.filter(account_name__iexact=RETAINED_EARNINGS_NAME).first()
+    if account is None:
+        raise PeriodCloseError(
+            f'Retained earnings account {account_number or RETAINED_EARNINGS_NAME!r} not found among active equity accounts'
+        )
+    return account
+
+
+def closing_lines(fiscal_year, retained_earnings):
+    """Unsaved journal lines reversing every revenue and expense balance for the year.
+
+    All account nets come from one grouped aggregate; the difference is
+    booked to retained earnings so the lines always balance.
+    """
+    rows = (
+        posted_lines(fiscal_year.start_date, fiscal_year.end_date)
+        .filter(account__account_type__category__in=INCOME_CATEGORIES)
+        .exclude(journal_entry__entry_type='CLOSING')
+        .order_by()
+        .values('account_id')
+        .annotate(debit=Sum('debit_amount'), credit=Sum('credit_amount'))
+        .order_by('account_id')
+    )
+    lines, net_total = [], ZERO
+    for row in rows:
+        net = (row['debit'] or ZERO) - (row['credit'] or ZERO)
+        if not net:
+            continue
+        net_total += net
+        lines.append(JournalEntryDetail(
+            account_id=row['account_id'],
+            description='Year-end close',
+            debit_amount=-net if net < 0 else ZERO,
+            credit_amount=net if net > 0 else ZERO,
+        ))
+    if net_total:
+        lines.append(JournalEntryDetail(
+            account=retained_earnings,
+            description='Net income for the year' if net_total < 0 else 'Net loss for the year',
+            debit_amount=net_total if net_total > 0 else ZERO,
+            credit_amount=-net_total if net_total < 0 else ZERO,
+        ))
+    return lines
+
+
+def close_fiscal_year(fiscal_year, retained_earnings=None, user=None):
+    """Post the year's CLOSING entry and close the year with all its periods.
+
+    Everything happens in one transaction. Returns the posted closing entry,
+    or None when no revenue or expense account had a balance.
+    """
+    with transaction.atomic():
+        fiscal_year = FiscalYear.objects.select_for_update().get(pk=fiscal_year.pk)
+        if fiscal_year.is_closed:
+            raise PeriodCloseError(f'{fiscal_year} is already closed')
+        drafts = JournalEntryHeader.objects.filter(
+            is_posted=False, entry_date__gte=fiscal_year.start_date, entry_date__lte=fiscal_year.end_date
+        ).count()
+        if drafts:
+            raise PeriodCloseError(f'{fiscal_year} has {drafts} unposted journal entries')
+        if FinancialPeriod.objects.filter(
+            is_closed=True, start_date__lte=fiscal_year.end_date, end_date__gte=fiscal_year.end_date
+        ).exists():
+            raise PeriodCloseError(f'The period containing {fiscal_year.end_date} is already closed')
+
+        entry = None
+        lines = closing_lines(fiscal_year, retained_earnings or retained_earnings_account())
+        if lines:
+            entry = JournalEntryHeader.objects.create(
+                entry_number=next_document_number('journal_entry'),
+                entry_type='CLOSING',
+                entry_date=fiscal_year.end_date,
+                fiscal_year=fiscal_year,
+                description=f'Year-end closing entry for {fiscal_year}',
+                created_by=user,
+            )
+            for line in lines:
+                line.journal_entry = entry
+            JournalEntryDetail.objects.bulk_create(lines, batch_size=1000)
+            entry = post_journal_entry(entry)
+
+        # In date order, so each period's snapshot opens from the one before
+        for period in fiscal_year.financialperiod_set.filter(is_closed=False).order_by('end_date', 'start_date'):
+            close_period(period)
+
+        fiscal_year.is_closed = True
+        fiscal_year.save(update_fields=['is_closed'])
+    return entry
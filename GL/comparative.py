@@ -0,0 +1,173 @@
+# General Ledger Comparative Reports
+"""
+Side-by-side trial balance and income statement columns for a run of
+FinancialPeriods, computed in a single pass over the posted lines.
+
+Each period becomes one conditional aggregate (SUM ... FILTER (WHERE
+entry_date in the period)) in a query grouped by account. The result is
+a dense account x period matrix of integer cents, stored as an int64 NumPy
+array so variances and percentages are vectorised. The returned report
+holds exact Decimals.
+"""
+from datetime import timedelta
+import numpy as np
+from django.db.models import F, Q, Sum
+from default.money import Cents, fits_int64, from_cents, to_cents
+from .archive import line_sources
+from .closing import account_balances_as_of, posted_lines
+from .models import Account, FinancialPeriod
+from .reports import CATEGORY_SIGN
+
+MAX_PERIODS = 36
+MODES = {
+    'trial_balance': ['ASSET', 'LIABILITY', 'EQUITY', 'REVENUE', 'EXPENSE'],
+    'income_statement': ['REVENUE', 'EXPENSE'],
+}
+
+
+class ComparativeReportError(Exception):
+    """Raised when the requested comparative report is invalid"""
+
+
+def comparative_periods(date_from, date_to, period_type='MONTHLY'):
+    """FinancialPeriods of one type that lie within the date range, oldest first"""
+    periods = list(
+        FinancialPeriod.objects.select_related('fiscal_year')
+        .filter(period_type=period_type, start_date__gte=date_from, end_date__lte=date_to)
+        .order_by('start_date')
+    )
+    if len(periods) > MAX_PERIODS:
+        raise ComparativeReportError(f'A comparative report is limited to {MAX_PERIODS} periods')
+    return periods
+
+
+def period_matrix(periods, mode='income_statement'):
+    """Return (account_ids, matrix) of signed (debit - credit) cents per account and period.
+
+    ``income_statement`` columns hold each period's activity without
+    year-end CLOSING entries. ``trial_balance`` columns hold the balance at
+    each period's end. All columns come from one grouped query per line
+    table, plus the opening balances for trial balances.
+    """
+    if mode not in MODES:
+        raise ComparativeReportError(f'Unknown comparative report: {mode}')
+    first_start, last_end = periods[0].start_date, periods[-1].end_date
+    net = F('debit_amount') - F('credit_amount')
+    columns = {}
+    for index, period in enumerate(periods):
+        if mode == 'trial_balance':
+            # Cumulative from the first period so each column is a balance
+            in_column = Q(journal_entry__entry_date__lte=period.end_date)
+        else:
+            in_column = Q(journal_entry__entry_date__gte=period.start_date, journal_entry__entry_date__lte=period.end_date)
+        # Summed as integer cents by the database, so no Decimal is built per cell
+        columns[f'period_{index}'] = Sum(Cents(net), filter=in_column)
+
+    rows = {}
+    for archived in line_sources(first_start, last_end):
+        lines = posted_lines(first_start, last_end, archived).filter(account__account_type__category__in=MODES[mode])
+        if mode == 'income_statement':
+            lines = lines.exclude(journal_entry__entry_type='CLOSING')
+        for row in lines.order_by().values('account_id').annotate(**columns):
+            totals = rows.setdefault(row.pop('account_id'), {})
+            for column, amount in row.items():
+                if amount is not None:
+                    totals[column] = totals.get(column, 0) + int(amount)
+
+    opening = {}
+    if mode == 'trial_balance':
+        opening = account_balances_as_of(first_start - timedelta(days=1))
+
+    account_ids = sorted(set(rows) | set(opening))
+    matrix = np.array([
+        [to_cents(opening.get(account_id)) + rows.get(account_id, {}).get(f'period_{index}', 0)
+         for index in range(len(periods))]
+        for account_id in account_ids
+    ], dtype=np.int64).reshape(len(account_ids), len(periods))
+    return account_ids, matrix
+
+
+def variances(matrix):
+    """Period-over-period change and percentage change (None where the prior period is zero)"""
+    previous, current = matrix[:, :-1], matrix[:, 1:]
+    change = current - previous
+    percent = np.full(change.shape, np.nan)
+    np.divide(change * 100.0, np.abs(previous), out=percent, where=previous != 0)
+    return change.tolist(), [[None if np.isnan(value) else round(value, 1) for value in row] for row in percent.tolist()]
+
+
+def column_totals(matrix):
+    """Per-period sums, in Python ints when an int64 sum could overflow"""
+    if fits_int64(matrix.ravel()):
+        return matrix.sum(axis=0).tolist()
+    return [sum(column) for column in matrix.T.tolist()]
+
+
+def comparative_report(periods, mode='income_statement', show_zero=False):
+    """Accounts as rows and periods as columns, with period-over-period variances"""
+    periods = list(periods)
+    if not periods:
+        raise ComparativeReportError('No financial periods selected')
+    account_ids, matrix = period_matrix(periods, mode)
+    accounts = Account.objects.select_related('account_type').in_bulk(account_ids)
+    change, percent = variances(matrix)
+    rows_list = matrix.tolist()
+
+    rows = []
+    for position, account_id in enumerate(account_ids):
+        amounts = rows_list[position]
+        if not show_zero and not any(amounts):
+            continue
+        account = accounts[account_id]
+        # Income statement amounts read on their normal side; trial balances stay signed
+        sign = CATEGORY_SIGN[account.account_type.category] if mode == 'income_statement' else 1
+        row = {
+            'account_id': account_id,
+            'account_number': account.account_number,
+            'account_name': account.account_name,
+            'category': account.account_type.category,
+            'amounts': [from_cents(sign * value) for value in amounts],
+            'changes': [from_cents(sign * value) for value in change[position]],
+            'change_percents': [None if value is None else sign * value for value in percent[position]],
+        }
+        # Per-period cells for templates; the first period has nothing to compare with
+        row['cells'] = [
+            {'amount': amount, 'change': change_amount, 'change_percent': change_percent}
+            for amount, change_amount, change_percent in zip(
+                row['amounts'], [None, *row['changes']], [None, *row['change_percents']]
+            )
+        ]
+        rows.append(row)
+    rows.sort(key=lambda row: row['account_number'])
+
+    report = {
+        'report': f'comparative_{mode}',
+        'mode': mode,
+        'periods': [
+            {'id': period.pk, 'label': str(period), 'start_date': period.start_date, 'end_date': period.end_date}
+            for period in periods
+        ],
+        'rows': rows,
+    }
+    totals = column_totals(matrix)
+    if mode == 'income_statement':
+        # Revenue less expenses, i.e. credits less debits
+        report['net_income'] = [from_cents(-value) for value in totals]
+    else:
+        # Zero in every column when the ledger balances
+        report['totals'] = [from_cents(value) for value in totals]
+    return report
+
+
+def comparative_columns(report):
+    return ['account_number', 'account_name', *[period['label'] for period in report['periods']]]
+
+
+def comparative_rows(report):
+    """Flatten a comparative report into comparative_columns() rows for CSV export"""
+    for row in report['rows']:
+        yield [row['account_number'], row['account_name'], *row['amounts']]
+    if report['mode'] == 'income_statement':
+        yield ['', 'Net Income', *report['net_income']]
+    else:
+        yield ['', 'Total', *report['totals']]
@@ -0,0 +1,75 @@
+# General Ledger Dashboard Summary
+"""
+The GL dashboard figures are computed once per ledger version and served
+from the cache until the ledger changes.
+
+The ledger version is a counter in the single LedgerVersion row. It is
+advanced inside every transaction that posts, creates or imports journal
+entries, closes a period or edits the chart of accounts, so it commits
+exactly when the change does and every process reads the same value.
+Snapshots are stored under a key containing the version, so a bump makes
+every older snapshot unreachable without deleting anything, and concurrent
+readers never see a half-updated summary.
+"""
+import time
+from django.core.cache import cache
+from django.db.models import F, Q, Sum
+from .models import Account, JournalEntryHeader, LedgerVersion
+
+LEDGER_VERSION_ID = 1
+SUMMARY_KEY = 'gl:dashboard_summary:{version}'
+# Upper bound on how long a computed summary is kept
+SUMMARY_TIMEOUT = 600
+RECENT_ENTRY_COUNT = 5
+
+
+def ledger_version():
+    """Current ledger version: one primary key lookup"""
+    version = LedgerVersion.objects.filter(pk=LEDGER_VERSION_ID).values_list('version', flat=True).first()
+    return 0 if version is None else version
+
+
+def bump_ledger_version():
+    """Advance the ledger version as part of the current transaction.
+
+    The row stays locked until the transaction ends, so callers bump as the
+    last step before committing.
+    """
+    if not LedgerVersion.objects.filter(pk=LEDGER_VERSION_ID).update(version=F('version') + 1):
+        # Seeded from the clock so versions from before the row was lost are not reused
+        LedgerVersion.objects.bulk_create(
+            [LedgerVersion(pk=LEDGER_VERSION_ID, version=time.time_ns())], ignore_conflicts=True
+        )
+
+
+def compute_gl_summary():
+    """Dashboard figures from the database: account totals, unposted count and recent entries"""
+    balances = Account.objects.aggregate(
+        total_assets=Sum('balance', filter=Q(account_type__category='ASSET')),
+        total_liabilities=Sum('balance', filter=Q(account_type__category='LIABILITY')),
+    )
+    total_assets = balances['total_assets'] or 0
+    total_liabilities = abs(balances['total_liabilities'] or 0)
+    recent_entries = list(
+        JournalEntryHeader.objects.order_by('-created_at')
+        .values('id', 'entry_number', 'description', 'entry_date', 'is_posted', 'total_debit', 'total_credit')
+        [:RECENT_ENTRY_COUNT]
+    )
+    return {
+        'total_assets': total_assets,
+        'total_liabilities': total_liabilities,
+        'net_worth': total_assets - total_liabilities,
+        # Counted from the drafts index rather than a filtered aggregate over every entry
+        'unposted_entries': JournalEntryHeader.objects.filter(is_posted=False).count(),
+        'recent_entries': recent_entries,
+    }
+
+
+def gl_summary():
+    """Cached dashboard figures for the current ledger version"""
+    key = SUMMARY_KEY.format(version=ledger_version())
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_gl_summary()
+        cache.set(key, summary, SUMMARY_TIMEOUT)
+    return summary
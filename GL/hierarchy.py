@@ -0,0 +1,110 @@
+# Chart of Accounts Hierarchy
+"""
+Maintains the AccountClosure table that backs subtree roll-ups.
+
+Every account has a depth-0 row to itself plus one row per ancestor, so
+"all descendants of X" or "sum of X's subtree" is one join instead of a
+recursive walk with a query per level.
+"""
+from decimal import Decimal
+from django.db.models import Max, OuterRef, Subquery, Sum
+from .models import Account, AccountClosure
+
+ZERO = Decimal('0.00')
+
+
+def check_account_parent(account):
+    """Raise ValueError if account's parent lies inside its own subtree"""
+    if account.parent_account_id and AccountClosure.objects.filter(
+        ancestor_id=account.pk, descendant_id=account.parent_account_id
+    ).exists():
+        raise ValueError(f'Account {account.account_number} cannot be moved under its own descendant')
+
+
+def sync_account_closure(account, created, old_parent_id):
+    """Update closure rows after an account is created or re-parented"""
+    if created:
+        rows = [AccountClosure(ancestor_id=account.pk, descendant_id=account.pk, depth=0)]
+        if account.parent_account_id:
+            rows += [
+                AccountClosure(ancestor_id=ancestor_id, descendant_id=account.pk, depth=depth + 1)
+                for ancestor_id, depth in AccountClosure.objects.filter(
+                    descendant_id=account.parent_account_id
+                ).values_list('ancestor_id', 'depth')
+            ]
+        AccountClosure.objects.bulk_create(rows)
+    elif old_parent_id != account.parent_account_id:
+        move_account_subtree(account)
+
+
+def move_account_subtree(account):
+    """Re-link account and its whole subtree under account's current parent"""
+    subtree = list(AccountClosure.objects.filter(ancestor_id=account.pk).values_list('descendant_id', 'depth'))
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+
+    # Drop links from old ancestors into the subtree; links inside it are unchanged
+    AccountClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+    if account.parent_account_id:
+        ancestors = AccountClosure.objects.filter(
+            descendant_id=account.parent_account_id
+        ).values_list('ancestor_id', 'depth')
+        AccountClosure.objects.bulk_create([
+            AccountClosure(ancestor_id=ancestor_id, descendant_id=descendant_id,
+                           depth=ancestor_depth + descendant_depth + 1)
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, descendant_depth in subtree
+        ], batch_size=1000)
+
+
+def closure_rows(parents):
+    """Yield (ancestor_id, descendant_id, depth) for a {account_id: parent_id} map"""
+    for account_id in parents:
+        ancestor_id, depth, seen = account_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            yield ancestor_id, account_id, depth
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+
+
+def rebuild_account_closure():
+    """Recompute the whole closure table from Account.parent_account.
+
+    Needed after bulk_create/update() on accounts, which bypass save().
+    """
+    parents = dict(Account.objects.values_list('id', 'parent_account_id'))
+    AccountClosure.objects.all().delete()
+    AccountClosure.objects.bulk_create(
+        [AccountClosure(ancestor_id=a, descendant_id=d, depth=depth) for a, d, depth in closure_rows(parents)],
+        batch_size=1000,
+    )
+    return len(parents)
+
+
+def roll_up(balances):
+    """Return {account_id: subtree total} for a {account_id: amount} map.
+
+    Every ancestor of an account with an amount receives it, using a single
+    query over the closure table.
+    """
+    totals = {}
+    links = AccountClosure.objects.filter(descendant_id__in=list(balances)).values_list('ancestor_id', 'descendant_id')
+    for ancestor_id, descendant_id in links:
+        totals[ancestor_id] = totals.get(ancestor_id, ZERO) + balances[descendant_id]
+    return totals
+
+
+def accounts_with_rollup():
+    """Accounts annotated with tree ``level`` and ``rollup_balance``.
+
+    rollup_balance is the sum of Account.balance over the account's subtree,
+    computed in the same query through the closure table.
+    """
+    level = AccountClosure.objects.filter(descendant=OuterRef('pk')).values('descendant').annotate(
+        level=Max('depth')
+    ).values('level')
+    return (
+        Account.objects.select_related('account_type')
+        .annotate(level=Subquery(level), rollup_balance=Sum('descendant_links__descendant__balance'))
+        .order_by('account_number')
+    )
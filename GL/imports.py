@@ -0,0 +1,221 @@
+# Journal Entry Bulk Import
+"""
+Streams journal entries from CSV or JSON Lines files into draft entries.
+
+CSV files have one row per line with the columns in CSV_COLUMNS; consecutive
+rows sharing the same ``entry`` key form one journal entry. JSON Lines files
+have one entry object per line with a ``lines`` list. Both readers yield one
+entry at a time, so the whole file is never held in memory.
+
+Entries are validated (known accounts, debit = credit) against a chart of
+accounts cached once per import, then inserted with bulk_create in chunks,
+each chunk in its own transaction.
+"""
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from default.sequences import allocate_document_numbers
+from .dashboard import bump_ledger_version
+from .models import Account, FiscalYear, JournalEntryDetail, JournalEntryHeader
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+# Largest value of the DecimalField(max_digits=15, decimal_places=2) amount columns
+MAX_AMOUNT = Decimal('9999999999999.99')
+MAX_REPORTED_ERRORS = 100
+
+CSV_COLUMNS = [
+    'entry', 'entry_date', 'description', 'reference',
+    'account', 'line_description', 'debit', 'credit',
+]
+
+
+class JournalImportError(Exception):
+    """Raised when an entry in an import file is invalid"""
+
+
+def read_csv_entries(lines):
+    """Yield entry dicts from CSV text lines, grouping rows by the entry column"""
+    entry = None
+    for row_number, row in enumerate(csv.DictReader(lines), start=2):
+        if entry is None or row.get('entry') != entry['key']:
+            if entry is not None:
+                yield entry
+            entry = {
+                'key': row.get('entry'),
+                'source_line': row_number,
+                'entry_date': row.get('entry_date'),
+                'description': row.get('description', ''),
+                'reference': row.get('reference', ''),
+                'lines': [],
+            }
+        entry['lines'].append({
+            'account': row.get('account'),
+            'description': row.get('line_description', ''),
+            'debit': row.get('debit'),
+            'credit': row.get('credit'),
+        })
+    if entry is not None:
+        yield entry
+
+
+def read_jsonl_entries(lines):
+    """Yield entry dicts from JSON Lines text, one entry object per line"""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError as e:
+            entry = {'error': f'invalid JSON ({e})'}
+        if not isinstance(entry, dict):
+            entry = {'error': 'expected a JSON object'}
+        entry.setdefault('key', entry.get('entry', line_number))
+        entry['source_line'] = line_number
+        yield entry
+
+
+READERS = {
+    'csv': read_csv_entries,
+    'jsonl': read_jsonl_entries,
+    'json': read_jsonl_entries,
+}
+
+
+def parse_amount(value):
+    if value in (None, ''):
+        return ZERO
+    try:
+        amount = Decimal(str(value).replace(',', ''))
+        # Checked against MAX_AMOUNT first; quantize() raises for amounts like 1e40
+        valid = amount.is_finite() and 0 <= amount <= MAX_AMOUNT and amount == amount.quantize(CENT)
+    except InvalidOperation:
+        valid = False
+    if not valid:
+        raise JournalImportError(f'invalid amount {value!r}')
+    return amount
+
+
+def parse_text(value, field, max_length):
+    """A text field truncated to max_length; JSON numbers, lists and objects are rejected"""
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise JournalImportError(f'{field} must be a string, not {value!r}')
+    return value[:max_length]
+
+
+class JournalImporter:
+    """Validate and bulk insert journal entries as drafts"""
+
+    def __init__(self, user=None, chunk_size=1000):
+        self.user = user
+        self.chunk_size = chunk_size
+        # Cached once per import instead of one lookup per line
+        self.accounts = dict(Account.objects.filter(is_active=True, is_header=False).values_list('account_number', 'id'))
+        self.fiscal_years = list(FiscalYear.objects.filter(is_closed=False).values_list('id', 'start_date', 'end_date'))
+        self.entry_count = 0
+        self.line_count = 0
+        self.rejected_count = 0
+        self.errors = []  # First MAX_REPORTED_ERRORS rejections
+
+    def fiscal_year_for(self, entry_date):
+        for fiscal_year_id, start_date, end_date in self.fiscal_years:
+            if start_date <= entry_date <= end_date:
+                return fiscal_year_id
+        raise JournalImportError(f'no open fiscal year for {entry_date}')
+
+    def build(self, entry):
+        """Return (header, lines) model instances for a validated entry"""
+        if entry.get('error'):
+            raise JournalImportError(entry['error'])
+        try:
+            entry_date = parse_date(str(entry.get('entry_date') or ''))
+        except ValueError:
+            entry_date = None
+        if entry_date is None:
+            raise JournalImportError(f"invalid entry date {entry.get('entry_date')!r}")
+        if not isinstance(entry.get('lines'), list) or len(entry['lines']) < 2:
+            raise JournalImportError('an entry needs at least two lines')
+
+        lines = []
+        for line in entry['lines']:
+            if not isinstance(line, dict):
+                raise JournalImportError('each line must be an object')
+            account_id = self.accounts.get(str(line.get('account', '')).strip())
+            if account_id is None:
+                raise JournalImportError(f"unknown or inactive account {line.get('account')!r}")
+            debit, credit = parse_amount(line.get('debit')), parse_amount(line.get('credit'))
+            if bool(debit) == bool(credit):
+                raise JournalImportError('each line needs either a debit or a credit amount')
+            lines.append(JournalEntryDetail(
+                account_id=account_id,
+                description=parse_text(line.get('description'), 'line description', 250),
+                debit_amount=debit,
+                credit_amount=credit,
+            ))
+
+        total_debit = sum((line.debit_amount for line in lines), ZERO)
+        total_credit = sum((line.credit_amount for line in lines), ZERO)
+        if total_debit != total_credit:
+            raise JournalImportError(f'debits {total_debit} do not equal credits {total_credit}')
+        if total_debit > MAX_AMOUNT:
+            raise JournalImportError(f'entry total {total_debit} is too large')
+
+        header = JournalEntryHeader(
+            entry_date=entry_date,
+            fiscal_year_id=self.fiscal_year_for(entry_date),
+            description=parse_text(entry.get('description'), 'description', 250),
+            reference=parse_text(entry.get('reference'), 'reference', 100),
+            total_debit=total_debit,
+            total_credit=total_credit,
+            created_by=self.user,
+        )
+        return header, lines
+
+    def flush(self, chunk):
+        """Insert a chunk of (header, lines) pairs in one transaction"""
+        if not chunk:
+            return
+        with transaction.atomic():
+            numbers = allocate_document_numbers('journal_entry', len(chunk))
+            details = []
+            for number, (header, lines) in zip(numbers, chunk):
+                header.entry_number = number
+                for line in lines:
+                    line.journal_entry = header
+                details.extend(lines)
+            JournalEntryHeader.objects.bulk_create([header for header, _ in chunk], batch_size=self.chunk_size)
+            JournalEntryDetail.objects.bulk_create(details, batch_size=self.chunk_size)
+            bump_ledger_version()
+        self.entry_count += len(chunk)
+        self.line_count += len(details)
+
+    def run(self, entries):
+        """Import an iterable of entry dicts; invalid entries are skipped and reported"""
+        chunk, chunk_lines = [], 0
+        for entry in entries:
+            try:
+                header, lines = self.build(entry)
+            except JournalImportError as e:
+                self.rejected_count += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append(f"Entry {entry.get('key')} (line {entry.get('source_line')}): {e}")
+                continue
+            chunk.append((header, lines))
+            chunk_lines += len(lines)
+            if chunk_lines >= self.chunk_size:
+                self.flush(chunk)
+                chunk, chunk_lines = [], 0
+        self.flush(chunk)
+        return self
+
+
+def import_journal_file(lines, file_format='csv', user=None, chunk_size=1000):
+    """Import journal entries from an iterable of text lines"""
+    reader = READERS.get(file_format)
+    if reader is None:
+        raise JournalImportError(f'Unsupported import format: {file_format}')
+    return JournalImporter(user=user, chunk_size=chunk_size).run(reader(lines))
@@ -0,0 +1,64 @@
+# General Ledger Background Jobs
+"""
+Handlers run by default.jobs on the Celery worker: batch posting, recurring
+entry generation and the heavier financial reports. Parameters arrive as JSON, so ids and dates are
+strings here; results are the same dicts the synchronous views return.
+"""
+import uuid
+from django.utils.dateparse import parse_date
+from . import comparative, reports
+from .posting import post_journal_entries
+from .recurring import generate_recurring_entries
+
+# Entries per posting transaction; progress is reported after each chunk
+POSTING_CHUNK_SIZE = 200
+
+
+def post_entries(job, entry_ids):
+    """Post draft entries in chunks, each chunk in its own transaction"""
+    entry_ids = [uuid.UUID(str(entry_id)) for entry_id in entry_ids]
+    results = []
+    job.report_progress(0, len(entry_ids))
+    for start in range(0, len(entry_ids), POSTING_CHUNK_SIZE):
+        results.extend(post_journal_entries(entry_ids[start:start + POSTING_CHUNK_SIZE]))
+        job.report_progress(len(results), len(entry_ids))
+    posted = sum(result['posted'] for result in results)
+    return {'posted': posted, 'rejected': len(results) - posted, 'results': results}
+
+
+def _comparative(date_from, date_to, period_type='MONTHLY', mode='income_statement', show_zero=False):
+    periods = comparative.comparative_periods(date_from, date_to, period_type)
+    return comparative.comparative_report(periods, mode, show_zero=show_zero)
+
+
+# report name -> (builder, names of its date parameters)
+REPORTS = {
+    'trial_balance': (reports.trial_balance, ['as_of_date']),
+    'balance_sheet': (reports.balance_sheet, ['as_of_date']),
+    'income_statement': (reports.income_statement, ['date_from', 'date_to']),
+    'cash_flow_statement': (reports.cash_flow_statement, ['date_from', 'date_to']),
+    'comparative': (_comparative, ['date_from', 'date_to']),
+}
+
+
+def build_report(job, report, **params):
+    """Build one of REPORTS from ISO date strings and its other options"""
+    if report not in REPORTS:
+        raise ValueError(f'Unknown report: {report}')
+    builder, date_params = REPORTS[report]
+    for name in date_params:
+        params[name] = parse_date(params.get(name) or '')
+        if params[name] is None:
+            raise ValueError(f'{name} must be a YYYY-MM-DD date')
+    job.report_progress(0, 1)
+    result = builder(**params)
+    job.report_progress(1, 1)
+    return result
+
+
+def generate_recurring(job, as_of):
+    """Materialise the recurring entries due on or before as_of"""
+    job.report_progress(0, 1)
+    result = generate_recurring_entries(parse_date(as_of))
+    job.report_progress(1, 1)
+    return result
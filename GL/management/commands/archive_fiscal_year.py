@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from GL.archive import ArchiveError, archive_fiscal_year
+from GL.models import FiscalYear
+
+class Command(BaseCommand):
+    help = "Move a closed fiscal year's journal entries from the hot tables to the archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fiscal_year', help='Fiscal year name, e.g. "FY 2023"')
+
+    def handle(self, *args, **options):
+        try:
+            fiscal_year = FiscalYear.objects.get(name=options['fiscal_year'])
+        except FiscalYear.DoesNotExist:
+            raise CommandError('Fiscal year not found')
+
+        try:
+            headers, lines = archive_fiscal_year(fiscal_year)
+        except ArchiveError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {fiscal_year}: {headers} journal entries, {lines} lines'))
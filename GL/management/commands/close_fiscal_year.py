@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from GL.closing import PeriodCloseError, close_fiscal_year, retained_earnings_account
+from GL.models import FiscalYear
+
+class Command(BaseCommand):
+    help = 'Close a fiscal year: post its CLOSING entry to retained earnings and close its periods'
+
+    def add_arguments(self, parser):
+        parser.add_argument('fiscal_year', help='Fiscal year name, e.g. "FY 2025"')
+        parser.add_argument(
+            '--retained-earnings',
+            help='Account number of the retained earnings account (default: the equity account named "Retained Earnings")',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            fiscal_year = FiscalYear.objects.get(name=options['fiscal_year'])
+        except FiscalYear.DoesNotExist:
+            raise CommandError('Fiscal year not found')
+
+        try:
+            entry = close_fiscal_year(fiscal_year, retained_earnings_account(options['retained_earnings']))
+        except PeriodCloseError as e:
+            raise CommandError(str(e))
+
+        if entry:
+            self.stdout.write(self.style.SUCCESS(
+                f'Closed {fiscal_year} with closing entry {entry.entry_number} ({entry.total_debit} debits)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Closed {fiscal_year}; no revenue or expense balances to close'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from GL.closing import PeriodCloseError, close_period
+from GL.models import FinancialPeriod
+
+class Command(BaseCommand):
+    help = 'Close a financial period and store its account balance snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('fiscal_year', help='Fiscal year name, e.g. "FY 2025"')
+        parser.add_argument('period_number', type=int)
+        parser.add_argument(
+            '--type',
+            default='MONTHLY',
+            choices=[choice for choice, _ in FinancialPeriod.PERIOD_TYPES],
+            help='Period type (default: MONTHLY)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            period = FinancialPeriod.objects.get(
+                fiscal_year__name=options['fiscal_year'],
+                period_type=options['type'],
+                period_number=options['period_number'],
+            )
+        except FinancialPeriod.DoesNotExist:
+            raise CommandError('Financial period not found')
+
+        try:
+            close_period(period)
+        except PeriodCloseError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Closed {period} with {period.snapshots.count()} account snapshots'
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from GL.recurring import generate_recurring_entries
+
+class Command(BaseCommand):
+    help = 'Create the journal entries due from recurring entry templates (safe to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help='Generate occurrences dated on or before YYYY-MM-DD (default: today)')
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            as_of = parse_date(options['as_of'])
+            if as_of is None:
+                raise CommandError('--as-of must be a YYYY-MM-DD date')
+
+        result = generate_recurring_entries(as_of)
+        for failed in result['failed']:
+            self.stdout.write(self.style.WARNING(f"Not posted {failed['entry_number']} ({failed['template']}): {failed['error']}"))
+        for skipped in result['skipped']:
+            self.stdout.write(self.style.WARNING(f"Skipped {skipped['template']} {skipped['period']:%Y-%m}: {skipped['reason']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} recurring journal entries, posted {result['posted']}"
+        ))
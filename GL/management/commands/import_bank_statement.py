@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from GL.models import Account
+from GL.reconciliation import READERS, BankReconciliationError, import_bank_statement
+
+class Command(BaseCommand):
+    help = 'Import a CSV or OFX bank statement for a cash account (transactions already imported are skipped)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('account', help='Account number of the cash account, e.g. 1000')
+        parser.add_argument('path', help='Statement file to import')
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='File format (default: taken from the file extension)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+        try:
+            account = Account.objects.get(account_number=options['account'])
+        except Account.DoesNotExist:
+            raise CommandError('Account not found')
+
+        try:
+            with open(path, newline='', encoding='utf-8') as lines:
+                result = import_bank_statement(account, lines, file_format, source_name=path)
+        except (OSError, BankReconciliationError) as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.line_count} bank transactions for {account.account_number} '
+            f'({result.duplicate_count} already imported, {result.rejected_count} rejected)'
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from GL.imports import READERS, JournalImportError, import_journal_file
+
+class Command(BaseCommand):
+    help = 'Bulk import draft journal entries from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='File format (default: taken from the file extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Journal lines inserted per transaction (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+
+        try:
+            with open(path, newline='', encoding='utf-8') as lines:
+                result = import_journal_file(lines, file_format, chunk_size=options['chunk_size'])
+        except (OSError, JournalImportError) as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.entry_count} journal entries with {result.line_count} lines '
+            f'({result.rejected_count} rejected)'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from GL.hierarchy import rebuild_account_closure
+
+class Command(BaseCommand):
+    help = 'Rebuild the chart-of-accounts closure table from parent links'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_account_closure()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt account hierarchy for {count} accounts'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from GL.posting import rebuild_period_balances
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly account balances from all posted journal lines'
+
+    def handle(self, *args, **options):
+        rows = rebuild_period_balances()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} account period balances'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from GL.search import rebuild_search_index
+
+class Command(BaseCommand):
+    help = 'Rebuild the journal entry full-text search index'
+
+    def handle(self, *args, **options):
+        if rebuild_search_index():
+            self.stdout.write(self.style.SUCCESS('Rebuilt journal entry search index'))
+        else:
+            self.stdout.write('The search index is maintained by the database on this backend')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from GL.models import Account
+from GL.reconciliation import DATE_WINDOW_DAYS, reconcile_account
+
+class Command(BaseCommand):
+    help = "Match a cash account's unmatched bank transactions to posted journal lines (safe to re-run)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('account', help='Account number of the cash account, e.g. 1000')
+        parser.add_argument('--from', dest='date_from', help='First bank transaction date, YYYY-MM-DD')
+        parser.add_argument('--to', dest='date_to', help='Last bank transaction date, YYYY-MM-DD')
+        parser.add_argument(
+            '--window',
+            type=int,
+            default=DATE_WINDOW_DAYS,
+            help=f'Days a journal line may be dated before or after the bank transaction (default: {DATE_WINDOW_DAYS})',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            account = Account.objects.get(account_number=options['account'])
+        except Account.DoesNotExist:
+            raise CommandError('Account not found')
+        dates = {}
+        for option in ('date_from', 'date_to'):
+            if options[option]:
+                dates[option] = parse_date(options[option])
+                if dates[option] is None:
+                    raise CommandError(f'--{option[5:]} must be a YYYY-MM-DD date')
+
+        result = reconcile_account(account, date_window=options['window'], **dates)
+        self.stdout.write(self.style.SUCCESS(
+            f"Matched {result['matched_by_amount']} by amount and date, {result['matched_by_reference']} by reference; "
+            f"{result['unmatched']} bank transactions remain unmatched"
+        ))
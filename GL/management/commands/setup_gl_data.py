@@ -22,13 +22,17 @@ class Command(BaseCommand):
             ('Operating Expenses', 'EXPENSE', 'DEBIT'),
         ]
         
+        # Cash flow activities that differ from the category default
+        type_activities = {'Cash': 'CASH', 'Equipment': 'INVESTING', 'Notes Payable': 'FINANCING'}
+        
         for name, category, normal_balance in account_types:
             account_type, created = AccountType.objects.get_or_create(
                 name=name,
                 defaults={
                     'category': category,
                     'normal_balance': normal_balance,
-                    'description': f'{name} account type'
+                    'description': f'{name} account type',
+                    'cash_flow_activity': type_activities.get(name, ''),
                 }
             )
             if created:
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountPeriodBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='GL.account')),
+            ],
+            options={
+                'ordering': ['account', 'period_start'],
+                'unique_together': {('account', 'period_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0002_account_period_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opening_balance', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='GL.account')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='GL.financialperiod')),
+            ],
+            options={
+                'ordering': ['period', 'account'],
+                'unique_together': {('period', 'account')},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_account_closure(apps, schema_editor):
+    """Build closure rows for accounts that existed before the table"""
+    Account = apps.get_model('GL', 'Account')
+    AccountClosure = apps.get_model('GL', 'AccountClosure')
+    parents = dict(Account.objects.values_list('id', 'parent_account_id'))
+    rows = []
+    for account_id in parents:
+        ancestor_id, depth, seen = account_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            rows.append(AccountClosure(ancestor_id=ancestor_id, descendant_id=account_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    AccountClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0003_period_balance_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='GL.account')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='GL.account')),
+            ],
+            options={
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(populate_account_closure, migrations.RunPython.noop),
+    ]
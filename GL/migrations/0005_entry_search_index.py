@@ -0,0 +1,62 @@
+from django.db import migrations
+
+ENTRY_TABLE = '"GL_journalentryheader"'
+COLUMNS = 'entry_number, description, reference'
+
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE gl_entry_search USING fts5({COLUMNS}, "
+    f"content={ENTRY_TABLE}, content_rowid='rowid', tokenize='trigram')",
+    f"""CREATE TRIGGER gl_entry_search_insert AFTER INSERT ON {ENTRY_TABLE} BEGIN
+        INSERT INTO gl_entry_search(rowid, {COLUMNS})
+        VALUES (new.rowid, new.entry_number, new.description, new.reference);
+    END""",
+    f"""CREATE TRIGGER gl_entry_search_delete AFTER DELETE ON {ENTRY_TABLE} BEGIN
+        INSERT INTO gl_entry_search(gl_entry_search, rowid, {COLUMNS})
+        VALUES ('delete', old.rowid, old.entry_number, old.description, old.reference);
+    END""",
+    f"""CREATE TRIGGER gl_entry_search_update AFTER UPDATE OF {COLUMNS} ON {ENTRY_TABLE} BEGIN
+        INSERT INTO gl_entry_search(gl_entry_search, rowid, {COLUMNS})
+        VALUES ('delete', old.rowid, old.entry_number, old.description, old.reference);
+        INSERT INTO gl_entry_search(rowid, {COLUMNS})
+        VALUES (new.rowid, new.entry_number, new.description, new.reference);
+    END""",
+    "INSERT INTO gl_entry_search(gl_entry_search) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS gl_entry_search_update',
+    'DROP TRIGGER IF EXISTS gl_entry_search_delete',
+    'DROP TRIGGER IF EXISTS gl_entry_search_insert',
+    'DROP TABLE IF EXISTS gl_entry_search',
+]
+
+DOCUMENT = "(entry_number || ' ' || description || ' ' || reference)"
+POSTGRESQL_CREATE = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX gl_entry_search_trgm ON {ENTRY_TABLE} USING gin ({DOCUMENT} gin_trgm_ops)',
+    f"CREATE INDEX gl_entry_search_tsv ON {ENTRY_TABLE} USING gin (to_tsvector('simple', {DOCUMENT}))",
+]
+POSTGRESQL_DROP = [
+    'DROP INDEX IF EXISTS gl_entry_search_tsv',
+    'DROP INDEX IF EXISTS gl_entry_search_trgm',
+]
+
+
+def run_for_vendor(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0004_account_closure'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_CREATE, 'postgresql': POSTGRESQL_CREATE}),
+            run_for_vendor({'sqlite': SQLITE_DROP, 'postgresql': POSTGRESQL_DROP}),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0005_entry_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentrydetail',
+            index=models.Index(fields=['account', 'journal_entry'], name='gl_line_account_entry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentryheader',
+            index=models.Index(condition=models.Q(('is_posted', True)), fields=['entry_date', 'created_at'], name='gl_entry_posted_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentryheader',
+            index=models.Index(condition=models.Q(('is_posted', False)), fields=['-created_at'], name='gl_entry_draft_idx'),
+        ),
+    ]
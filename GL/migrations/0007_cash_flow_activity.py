@@ -0,0 +1,46 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+# Account types and accounts created by the setup and sample data commands
+TYPE_ACTIVITIES = {
+    'Cash': 'CASH',
+    'Fixed Assets': 'INVESTING',
+    'Equipment': 'INVESTING',
+    'Long-term Liabilities': 'FINANCING',
+    'Notes Payable': 'FINANCING',
+}
+CASH_ACCOUNT_PREFIXES = ('Cash', 'Petty Cash')
+
+
+def classify_cash_flows(apps, schema_editor):
+    """Classify the seeded account types and cash accounts"""
+    AccountType = apps.get_model('GL', 'AccountType')
+    Account = apps.get_model('GL', 'Account')
+    for name, activity in TYPE_ACTIVITIES.items():
+        AccountType.objects.filter(name=name).update(cash_flow_activity=activity)
+    for prefix in CASH_ACCOUNT_PREFIXES:
+        Account.objects.filter(
+            account_type__category='ASSET', is_header=False, account_name__startswith=prefix
+        ).update(cash_flow_activity='CASH')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0006_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='cash_flow_activity',
+            field=models.CharField(blank=True, choices=[('CASH', 'Cash and Cash Equivalents'), ('OPERATING', 'Operating Activities'), ('INVESTING', 'Investing Activities'), ('FINANCING', 'Financing Activities')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='accounttype',
+            name='cash_flow_activity',
+            field=models.CharField(blank=True, choices=[('CASH', 'Cash and Cash Equivalents'), ('OPERATING', 'Operating Activities'), ('INVESTING', 'Investing Activities'), ('FINANCING', 'Financing Activities')], max_length=20),
+        ),
+        migrations.RunPython(classify_cash_flows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import importlib
+
+search_index = importlib.import_module('GL.migrations.0005_entry_search_index')
+
+
+def restore_search_triggers(apps, schema_editor):
+    """Adding columns rebuilds the header table on SQLite, dropping the FTS triggers and renumbering rowids"""
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in search_index.SQLITE_DROP[:3] + search_index.SQLITE_CREATE[1:]:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('GL', '0007_cash_flow_activity'),
+    ]
+
+    operations = [
+        # Reversing the AddFields below rebuilds the table again
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.CreateModel(
+            name='RecurringEntryTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.CharField(max_length=250)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('frequency', models.CharField(choices=[('MONTHLY', 'Monthly'), ('QUARTERLY', 'Quarterly'), ('YEARLY', 'Yearly')], default='MONTHLY', max_length=10)),
+                ('day_of_month', models.PositiveSmallIntegerField(default=1)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('auto_post', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecurringEntryTemplateLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(blank=True, max_length=250)),
+                ('debit_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('credit_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='journalentryheader',
+            name='recurring_period',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recurringentrytemplateline',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='GL.account'),
+        ),
+        migrations.AddField(
+            model_name='recurringentrytemplateline',
+            name='template',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='GL.recurringentrytemplate'),
+        ),
+        migrations.AddField(
+            model_name='recurringentrytemplate',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='journalentryheader',
+            name='recurring_template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entries', to='GL.recurringentrytemplate'),
+        ),
+        migrations.AddConstraint(
+            model_name='journalentryheader',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurring_template__isnull', False)), fields=('recurring_template', 'recurring_period'), name='gl_entry_recurring_period_uniq'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
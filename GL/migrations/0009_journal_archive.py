@@ -0,0 +1,69 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('GL', '0008_recurring_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fiscalyear',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedJournalEntryHeader',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('entry_number', models.CharField(max_length=50, unique=True)),
+                ('entry_type', models.CharField(choices=[('MANUAL', 'Manual Entry'), ('AUTO', 'Automatic Entry'), ('CLOSING', 'Closing Entry'), ('ADJUSTMENT', 'Adjustment Entry')], max_length=20)),
+                ('entry_date', models.DateField()),
+                ('description', models.CharField(max_length=250)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('total_debit', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('total_credit', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('is_posted', models.BooleanField(default=True)),
+                ('posted_date', models.DateTimeField(blank=True, null=True)),
+                ('recurring_period', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+                ('approved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('fiscal_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_entries', to='GL.fiscalyear')),
+                ('recurring_template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='GL.recurringentrytemplate')),
+            ],
+            options={
+                'ordering': ['-entry_date', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedJournalEntryDetail',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('description', models.CharField(blank=True, max_length=250)),
+                ('debit_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('credit_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='GL.account')),
+                ('journal_entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='GL.archivedjournalentryheader')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedjournalentryheader',
+            index=models.Index(fields=['entry_date', 'created_at'], name='gl_archived_entry_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedjournalentrydetail',
+            index=models.Index(fields=['account', 'journal_entry'], name='gl_archived_line_account_idx'),
+        ),
+    ]
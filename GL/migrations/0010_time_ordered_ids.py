@@ -0,0 +1,26 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:44
+
+import default.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0009_journal_archive'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='journalentrydetail',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='journalentryheader',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+        ]),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('GL', '0010_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(blank=True, max_length=255)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('duplicate_count', models.PositiveIntegerField(default=0)),
+                ('imported_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bank_statements', to='GL.account')),
+                ('imported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-imported_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankStatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=100)),
+                ('transaction_date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('description', models.CharField(blank=True, max_length=250)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('match_method', models.CharField(blank=True, choices=[('AMOUNT_DATE', 'Amount and date'), ('REFERENCE', 'Reference'), ('MANUAL', 'Manual')], max_length=20)),
+                ('matched_at', models.DateTimeField(blank=True, null=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bank_lines', to='GL.account')),
+                ('matched_line', models.OneToOneField(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='bank_match', to='GL.journalentrydetail')),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='GL.bankstatement')),
+            ],
+            options={
+                'ordering': ['transaction_date', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bankstatementline',
+            index=models.Index(condition=models.Q(('matched_line__isnull', True)), fields=['account', 'transaction_date'], name='gl_bank_line_unmatched_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bankstatementline',
+            constraint=models.UniqueConstraint(fields=('account', 'transaction_id'), name='gl_bank_line_transaction_uniq'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.5 on 2026-10-18 16:16
+
+import time
+
+from django.db import migrations, models
+
+
+def create_ledger_version(apps, schema_editor):
+    apps.get_model('GL', 'LedgerVersion').objects.create(pk=1, version=time.time_ns())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0011_bank_reconciliation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_ledger_version, migrations.RunPython.noop),
+    ]
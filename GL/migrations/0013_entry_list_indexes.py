@@ -0,0 +1,21 @@
+# Generated by Django 4.0.5 on 2026-10-18 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0012_ledger_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentryheader',
+            index=models.Index(fields=['entry_date', 'created_at', 'id'], name='gl_entry_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentryheader',
+            index=models.Index(fields=['created_at'], name='gl_entry_created_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+import importlib
+
+from django.db import migrations
+
+search_index = importlib.import_module('GL.migrations.0005_entry_search_index')
+
+ENTRY_TABLE = '"GL_journalentryheader"'
+COLUMNS = 'entry_number, description, reference'
+SEARCH_KEY = '(SELECT id FROM gl_entry_search_key WHERE entry_id = {}.id)'
+
+# The FTS5 rowid is an explicit INTEGER PRIMARY KEY mapped to the entry id,
+# so VACUUM and table rebuilds, which renumber the header rowids, leave it alone
+SQLITE_CREATE = [
+    'CREATE TABLE gl_entry_search_key (id INTEGER PRIMARY KEY, entry_id char(32) NOT NULL UNIQUE)',
+    f"CREATE VIRTUAL TABLE gl_entry_search USING fts5({COLUMNS}, content='', tokenize='trigram')",
+    f"""CREATE TRIGGER gl_entry_search_insert AFTER INSERT ON {ENTRY_TABLE} BEGIN
+        INSERT INTO gl_entry_search_key(entry_id) VALUES (new.id);
+        INSERT INTO gl_entry_search(rowid, {COLUMNS})
+        VALUES ({SEARCH_KEY.format('new')}, new.entry_number, new.description, new.reference);
+    END""",
+    f"""CREATE TRIGGER gl_entry_search_delete AFTER DELETE ON {ENTRY_TABLE} BEGIN
+        INSERT INTO gl_entry_search(gl_entry_search, rowid, {COLUMNS})
+        VALUES ('delete', {SEARCH_KEY.format('old')}, old.entry_number, old.description, old.reference);
+        DELETE FROM gl_entry_search_key WHERE entry_id = old.id;
+    END""",
+    f"""CREATE TRIGGER gl_entry_search_update AFTER UPDATE OF {COLUMNS} ON {ENTRY_TABLE} BEGIN
+        INSERT INTO gl_entry_search(gl_entry_search, rowid, {COLUMNS})
+        VALUES ('delete', {SEARCH_KEY.format('old')}, old.entry_number, old.description, old.reference);
+        INSERT INTO gl_entry_search(rowid, {COLUMNS})
+        VALUES ({SEARCH_KEY.format('new')}, new.entry_number, new.description, new.reference);
+    END""",
+    f'INSERT INTO gl_entry_search_key(entry_id) SELECT id FROM {ENTRY_TABLE}',
+    f"""INSERT INTO gl_entry_search(rowid, {COLUMNS})
+        SELECT search_key.id, entry.entry_number, entry.description, entry.reference
+        FROM {ENTRY_TABLE} AS entry JOIN gl_entry_search_key AS search_key ON search_key.entry_id = entry.id""",
+]
+SQLITE_DROP = search_index.SQLITE_DROP + ['DROP TABLE IF EXISTS gl_entry_search_key']
+
+
+def rowid_index_to_key(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in search_index.SQLITE_DROP + SQLITE_CREATE:
+            schema_editor.execute(statement)
+
+
+def key_to_rowid_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_DROP + search_index.SQLITE_CREATE:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0013_entry_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(rowid_index_to_key, key_to_rowid_index),
+    ]
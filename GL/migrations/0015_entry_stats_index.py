@@ -0,0 +1,17 @@
+# Generated by Django 4.0.5 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0014_entry_search_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentryheader',
+            index=models.Index(fields=['entry_date', 'is_posted', 'total_debit', 'total_credit'], name='gl_entry_stats_idx'),
+        ),
+    ]
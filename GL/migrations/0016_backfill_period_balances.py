@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def backfill_period_balances(apps, schema_editor):
+    """Bucket every posted line by account and month, including entries posted before the table existed"""
+    quote = schema_editor.quote_name
+    vendor = schema_editor.connection.vendor
+    sources = ' UNION ALL '.join(
+        f'SELECT line.account_id, entry.entry_date, line.debit_amount, line.credit_amount '
+        f"FROM {quote(apps.get_model('GL', lines)._meta.db_table)} AS line "
+        f"JOIN {quote(apps.get_model('GL', headers)._meta.db_table)} AS entry ON entry.id = line.journal_entry_id "
+        f'WHERE entry.is_posted'
+        for lines, headers in [
+            ('JournalEntryDetail', 'JournalEntryHeader'), ('ArchivedJournalEntryDetail', 'ArchivedJournalEntryHeader'),
+        ]
+    )
+    if vendor == 'postgresql':
+        month = "CAST(date_trunc('month', posted.entry_date) AS date)"
+    else:
+        month = "date(posted.entry_date, 'start of month')"
+    balance_table = quote(apps.get_model('GL', 'AccountPeriodBalance')._meta.db_table)
+    schema_editor.execute(f'DELETE FROM {balance_table}')
+    schema_editor.execute(
+        f'INSERT INTO {balance_table} (account_id, period_start, debit_total, credit_total) '
+        f'SELECT posted.account_id, {month}, SUM(posted.debit_amount), SUM(posted.credit_amount) '
+        f'FROM ({sources}) AS posted GROUP BY posted.account_id, {month}'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0015_entry_stats_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_period_balances, migrations.RunPython.noop),
+    ]
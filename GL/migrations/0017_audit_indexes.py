@@ -0,0 +1,25 @@
+# Generated by Django 4.0.5 on 2026-10-18 16:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GL', '0016_backfill_period_balances'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='journalentryheader',
+            name='gl_entry_draft_idx',
+        ),
+        migrations.AddIndex(
+            model_name='financialperiod',
+            index=models.Index(condition=models.Q(('is_closed', True)), fields=['period_type', 'end_date'], name='gl_period_closed_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentryheader',
+            index=models.Index(condition=models.Q(('is_posted', False)), fields=['entry_date', 'created_at', 'id', 'is_posted'], name='gl_entry_draft_idx'),
+        ),
+    ]
@@ -2,7 +2,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-import uuid
+from default.ids import uuid7
 
 User = get_user_model()
 
@@ -15,15 +15,31 @@ class AccountType(models.Model):
         ('REVENUE', 'Revenue'),
         ('EXPENSE', 'Expenses'),
     ]
+    CASH_FLOW_ACTIVITIES = [
+        ('CASH', 'Cash and Cash Equivalents'),
+        ('OPERATING', 'Operating Activities'),
+        ('INVESTING', 'Investing Activities'),
+        ('FINANCING', 'Financing Activities'),
+    ]
     
     name = models.CharField(max_length=100, unique=True)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
     normal_balance = models.CharField(max_length=10, choices=[('DEBIT', 'Debit'), ('CREDIT', 'Credit')])
     description = models.TextField(blank=True)
+    # Blank: assets and liabilities are operating, equity is financing
+    cash_flow_activity = models.CharField(max_length=20, choices=CASH_FLOW_ACTIVITIES, blank=True)
 
     def __str__(self):
         return f"{self.name} ({self.category})"
 
+    def save(self, *args, **kwargs):
+        from django.db import transaction
+        from .dashboard import bump_ledger_version
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            bump_ledger_version()
+
 class Account(models.Model):
     """Enhanced Chart of Accounts"""
     account_number = models.CharField(max_length=20, unique=True)
@@ -33,15 +49,81 @@ class Account(models.Model):
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     is_active = models.BooleanField(default=True)
     is_header = models.BooleanField(default=False)  # For grouping accounts
+    # Overrides the account type's activity, e.g. cash accounts under Current Assets
+    cash_flow_activity = models.CharField(max_length=20, choices=AccountType.CASH_FLOW_ACTIVITIES, blank=True)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.account_number} - {self.account_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored parent so save() can detect re-parenting
+        instance._loaded_parent_id = instance.__dict__.get('parent_account_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        from django.db import transaction
+        from .dashboard import bump_ledger_version
+        from .hierarchy import check_account_parent, sync_account_closure
+
+        created = self._state.adding
+        old_parent_id = getattr(self, '_loaded_parent_id', None)
+        with transaction.atomic():
+            if not created:
+                check_account_parent(self)
+            super().save(*args, **kwargs)
+            sync_account_closure(self, created, old_parent_id)
+            # Reports roll up and classify by the chart, so cached ones are stale
+            bump_ledger_version()
+        self._loaded_parent_id = self.parent_account_id
+
+    def delete(self, *args, **kwargs):
+        from django.db import transaction
+        from .dashboard import bump_ledger_version
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            bump_ledger_version()
+        return result
+
     class Meta:
         ordering = ['account_number']
 
+
+class LedgerVersion(models.Model):
+    """Single-row watermark of the ledger, advanced by GL.dashboard.bump_ledger_version().
+
+    Lives in the database rather than a cache so the web and Celery
+    processes all see the same version, and it commits or rolls back with
+    the change that advanced it.
+    """
+    version = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Ledger version {self.version}"
+
+
+class AccountClosure(models.Model):
+    """Closure table of the chart-of-accounts tree.
+
+    One row per (ancestor, descendant) pair including each account with
+    itself at depth 0, so a subtree roll-up is a single join.
+    Maintained by Account.save(); see GL.hierarchy.
+    """
+    ancestor = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+    class Meta:
+        unique_together = ['ancestor', 'descendant']
+
 class FiscalYear(models.Model):
     """Fiscal Year management"""
     name = models.CharField(max_length=50)
@@ -49,6 +131,8 @@ class FiscalYear(models.Model):
     end_date = models.DateField()
     is_current = models.BooleanField(default=False)
     is_closed = models.BooleanField(default=False)
+    # Set once the year's entries have been moved to the archive tables (see GL.archive)
+    archived_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -65,7 +149,7 @@ class JournalEntryHeader(models.Model):
         ('ADJUSTMENT', 'Adjustment Entry'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     entry_number = models.CharField(max_length=50, unique=True)
     entry_type = models.CharField(max_length=20, choices=ENTRY_TYPES, default='MANUAL')
     entry_date = models.DateField(default=timezone.now)
@@ -78,6 +162,11 @@ class JournalEntryHeader(models.Model):
     posted_date = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     approved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='approved_entries')
+    # Set on entries generated from a recurring template (see GL.recurring)
+    recurring_template = models.ForeignKey(
+        'RecurringEntryTemplate', on_delete=models.SET_NULL, null=True, blank=True, related_name='entries'
+    )
+    recurring_period = models.DateField(null=True, blank=True)  # First day of the generated period
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -91,10 +180,35 @@ class JournalEntryHeader(models.Model):
     class Meta:
         ordering = ['-entry_date', '-created_at']
         verbose_name_plural = "Journal Entries"
+        indexes = [
+            # Partial on is_posted: SQLite cannot use a composite index for the
+            # bare boolean test Django emits for is_posted=True
+            models.Index(fields=['entry_date', 'created_at'], condition=models.Q(is_posted=True), name='gl_entry_posted_date_idx'),
+            # Drafts are a small fraction of all entries. In list order, and
+            # holding is_posted so SQLite counts drafts from it alone
+            models.Index(
+                fields=['entry_date', 'created_at', 'id', 'is_posted'], condition=models.Q(is_posted=False),
+                name='gl_entry_draft_idx',
+            ),
+            # Entry list order; also serves the list's month totals by entry_date
+            models.Index(fields=['entry_date', 'created_at', 'id'], name='gl_entry_list_idx'),
+            # Most recent entries on the dashboard
+            models.Index(fields=['created_at'], name='gl_entry_created_idx'),
+            # Covers the entry list statistics aggregate
+            models.Index(fields=['entry_date', 'is_posted', 'total_debit', 'total_credit'], name='gl_entry_stats_idx'),
+        ]
+        constraints = [
+            # One generated entry per template and period, so generation can be re-run
+            models.UniqueConstraint(
+                fields=['recurring_template', 'recurring_period'],
+                condition=models.Q(recurring_template__isnull=False),
+                name='gl_entry_recurring_period_uniq',
+            ),
+        ]
 
 class JournalEntryDetail(models.Model):
     """Journal Entry line items"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     journal_entry = models.ForeignKey(JournalEntryHeader, on_delete=models.CASCADE, related_name='lines')
     account = models.ForeignKey(Account, on_delete=models.CASCADE)
     description = models.CharField(max_length=250, blank=True)
@@ -106,6 +220,9 @@ class JournalEntryDetail(models.Model):
 
     class Meta:
         ordering = ['id']
+        indexes = [
+            models.Index(fields=['account', 'journal_entry'], name='gl_line_account_entry_idx'),
+        ]
 
 class FinancialPeriod(models.Model):
     """Monthly/Quarterly periods for financial reporting"""
@@ -128,4 +245,202 @@ class FinancialPeriod(models.Model):
 
     class Meta:
         unique_together = ['fiscal_year', 'period_type', 'period_number']
-        ordering = ['fiscal_year', 'period_number']
\ No newline at end of file
+        ordering = ['fiscal_year', 'period_number']
+        indexes = [
+            # Latest closed period of a type, where report snapshots start
+            models.Index(fields=['period_type', 'end_date'], condition=models.Q(is_closed=True), name='gl_period_closed_end_idx'),
+        ]
+
+class AccountPeriodBalance(models.Model):
+    """Posted debit/credit activity per account and calendar month.
+
+    Maintained incrementally by GL.posting so balances never require a scan of
+    JournalEntryDetail. ``Account.balance`` holds the running (debit - credit)
+    total; this table holds the same deltas bucketed by month.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='period_balances')
+    period_start = models.DateField()  # First day of the month
+    debit_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    credit_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.account.account_number} - {self.period_start:%Y-%m}"
+
+    @property
+    def net_change(self):
+        return self.debit_total - self.credit_total
+
+    class Meta:
+        unique_together = ['account', 'period_start']
+        ordering = ['account', 'period_start']
+
+
+class PeriodBalanceSnapshot(models.Model):
+    """Per-account balances captured when a FinancialPeriod is closed.
+
+    Balances are signed (debit - credit), matching Account.balance.
+    """
+    period = models.ForeignKey(FinancialPeriod, on_delete=models.CASCADE, related_name='snapshots')
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='snapshots')
+    opening_balance = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    debit_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    credit_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    closing_balance = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.period} - {self.account.account_number}"
+
+    class Meta:
+        unique_together = ['period', 'account']
+        ordering = ['period', 'account']
+
+
+class RecurringEntryTemplate(models.Model):
+    """A journal entry generated every period by GL.recurring, e.g. a monthly accrual"""
+    FREQUENCIES = [
+        ('MONTHLY', 'Monthly'),
+        ('QUARTERLY', 'Quarterly'),
+        ('YEARLY', 'Yearly'),
+    ]
+    FREQUENCY_MONTHS = {'MONTHLY': 1, 'QUARTERLY': 3, 'YEARLY': 12}
+
+    name = models.CharField(max_length=100, unique=True)
+    description = models.CharField(max_length=250)
+    reference = models.CharField(max_length=100, blank=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCIES, default='MONTHLY')
+    day_of_month = models.PositiveSmallIntegerField(default=1)  # Clamped to the month's last day
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    auto_post = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_frequency_display()})"
+
+    class Meta:
+        ordering = ['name']
+
+
+class RecurringEntryTemplateLine(models.Model):
+    """A line copied into every entry generated from the template"""
+    template = models.ForeignKey(RecurringEntryTemplate, on_delete=models.CASCADE, related_name='lines')
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    description = models.CharField(max_length=250, blank=True)
+    debit_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    credit_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.template.name} - {self.account.account_name}"
+
+    class Meta:
+        ordering = ['id']
+
+
+class ArchivedJournalEntryHeader(models.Model):
+    """A JournalEntryHeader of an archived fiscal year, moved out of the hot table by GL.archive"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    entry_number = models.CharField(max_length=50, unique=True)
+    entry_type = models.CharField(max_length=20, choices=JournalEntryHeader.ENTRY_TYPES)
+    entry_date = models.DateField()
+    fiscal_year = models.ForeignKey(FiscalYear, on_delete=models.CASCADE, related_name='archived_entries')
+    description = models.CharField(max_length=250)
+    reference = models.CharField(max_length=100, blank=True)
+    total_debit = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_credit = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    is_posted = models.BooleanField(default=True)
+    posted_date = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    approved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    recurring_template = models.ForeignKey(
+        'RecurringEntryTemplate', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    recurring_period = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.entry_number} - {self.description}"
+
+    class Meta:
+        ordering = ['-entry_date', '-created_at']
+        indexes = [
+            models.Index(fields=['entry_date', 'created_at'], name='gl_archived_entry_date_idx'),
+        ]
+
+
+class ArchivedJournalEntryDetail(models.Model):
+    """A JournalEntryDetail line of an archived fiscal year"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    journal_entry = models.ForeignKey(ArchivedJournalEntryHeader, on_delete=models.CASCADE, related_name='lines')
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='+')
+    description = models.CharField(max_length=250, blank=True)
+    debit_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    credit_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.journal_entry.entry_number} - {self.account.account_name}"
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['account', 'journal_entry'], name='gl_archived_line_account_idx'),
+        ]
+
+
+class BankStatement(models.Model):
+    """One imported bank statement file for a cash account"""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='bank_statements')
+    source_name = models.CharField(max_length=255, blank=True)
+    line_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    imported_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    imported_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.account.account_number} - {self.source_name or self.imported_at:%Y-%m-%d}"
+
+    class Meta:
+        ordering = ['-imported_at']
+
+
+class BankStatementLine(models.Model):
+    """A bank transaction, matched to at most one posted journal line by GL.reconciliation"""
+    MATCH_METHODS = [
+        ('AMOUNT_DATE', 'Amount and date'),
+        ('REFERENCE', 'Reference'),
+        ('MANUAL', 'Manual'),
+    ]
+
+    statement = models.ForeignKey(BankStatement, on_delete=models.CASCADE, related_name='lines')
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='bank_lines')
+    transaction_id = models.CharField(max_length=100)  # The bank's FITID, or a digest of the CSV row
+    transaction_date = models.DateField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2)  # Positive for money in, like a cash debit
+    description = models.CharField(max_length=250, blank=True)
+    reference = models.CharField(max_length=100, blank=True)
+    # No database constraint: matched lines may later move to the archive with their ids
+    matched_line = models.OneToOneField(
+        JournalEntryDetail, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='bank_match',
+    )
+    match_method = models.CharField(max_length=20, choices=MATCH_METHODS, blank=True)
+    matched_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.transaction_date} {self.amount} {self.description}"
+
+    class Meta:
+        ordering = ['transaction_date', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'transaction_id'], name='gl_bank_line_transaction_uniq'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['account', 'transaction_date'], condition=models.Q(matched_line__isnull=True),
+                name='gl_bank_line_unmatched_idx',
+            ),
+        ]
@@ -0,0 +1,260 @@
+# General Ledger Posting Engine
+"""
+Posting applies a journal entry's lines as deltas to the balance store.
+
+Balances are kept signed as (debit - credit): ``Account.balance`` holds the
+running total and ``AccountPeriodBalance`` the same activity bucketed by month,
+so reading a balance never requires a scan of JournalEntryDetail.
+
+post_journal_entries() posts a batch in one transaction: every entry is
+validated from one aggregate over the lines. apply_period_deltas() then
+locks the touched balance rows in key order and changes them with one
+CASE update per BALANCE_BATCH_SIZE rows, so the number of queries does not
+grow with the accounts an entry touches, as in a year-end CLOSING entry.
+rebuild_period_balances() recomputes the monthly buckets from the posted
+lines, for entries posted before the table existed or written around it.
+"""
+from functools import reduce
+from operator import or_
+from django.db import connection, transaction
+from django.db.models import Case, Count, DecimalField, F, Max, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .dashboard import bump_ledger_version
+from .models import (
+    Account, AccountPeriodBalance, ArchivedJournalEntryDetail, ArchivedJournalEntryHeader, FinancialPeriod,
+    JournalEntryDetail, JournalEntryHeader,
+)
+
+
+# Balance rows per UPDATE; keeps the CASE parameters under SQLite's limit of 999
+BALANCE_BATCH_SIZE = 100
+AMOUNT = DecimalField(max_digits=15, decimal_places=2)
+
+
+class PostingError(Exception):
+    """Raised when a journal entry cannot be posted"""
+
+
+def period_start_for(day):
+    """First day of the month containing ``day``"""
+    return day.replace(day=1)
+
+
+def entry_account_deltas(entry):
+    """Return {account_id: (debit, credit)} summed over the entry's lines"""
+    rows = (
+        entry.lines.order_by()
+        .values('account_id')
+        .annotate(debit=Sum('debit_amount'), credit=Sum('credit_amount'))
+    )
+    return {row['account_id']: (row['debit'] or 0, row['credit'] or 0) for row in rows}
+
+
+def apply_period_deltas(period_deltas):
+    """Add {(account_id, period_start): (debit, credit)} to account and period balances.
+
+    Must be called inside a transaction. Updates are expressed with F() so
+    concurrent postings to the same account never lose a delta. Each batch
+    of rows is locked in key order before its single UPDATE, so concurrent
+    postings lock rows in the same order.
+    """
+    account_ids = {account_id for account_id, _ in period_deltas}
+    existing = set(
+        AccountPeriodBalance.objects
+        .filter(account_id__in=account_ids, period_start__in={start for _, start in period_deltas})
+        .order_by().values_list('account_id', 'period_start')
+    )
+    AccountPeriodBalance.objects.bulk_create(
+        [AccountPeriodBalance(account_id=account_id, period_start=period_start)
+         for account_id, period_start in sorted(period_deltas) if (account_id, period_start) not in existing],
+        ignore_conflicts=True,
+    )
+
+    account_changes = {}
+    for (account_id, _), (debit, credit) in period_deltas.items():
+        account_changes[account_id] = account_changes.get(account_id, 0) + debit - credit
+    account_ids = sorted(account_changes)
+    for offset in range(0, len(account_ids), BALANCE_BATCH_SIZE):
+        batch = account_ids[offset:offset + BALANCE_BATCH_SIZE]
+        accounts = Account.objects.filter(pk__in=batch)
+        list(accounts.select_for_update().order_by('pk').values_list('pk', flat=True))
+        accounts.update(balance=F('balance') + Case(
+            *[When(pk=account_id, then=Value(account_changes[account_id])) for account_id in batch], output_field=AMOUNT,
+        ))
+
+    keys = sorted(period_deltas)
+    for offset in range(0, len(keys), BALANCE_BATCH_SIZE):
+        batch = keys[offset:offset + BALANCE_BATCH_SIZE]
+        rows = AccountPeriodBalance.objects.filter(reduce(or_, [
+            Q(account_id=account_id, period_start=period_start) for account_id, period_start in batch
+        ]))
+        list(rows.select_for_update().order_by('account_id', 'period_start').values_list('pk', flat=True))
+        rows.update(**{
+            field: F(field) + Case(*[
+                When(account_id=account_id, period_start=period_start, then=Value(period_deltas[account_id, period_start][side]))
+                for account_id, period_start in batch
+            ], output_field=AMOUNT)
+            for side, field in enumerate(['debit_total', 'credit_total'])
+        })
+
+
+def apply_account_deltas(deltas, period_start):
+    """Add {account_id: (debit, credit)} for a single period to the balance store"""
+    apply_period_deltas({(account_id, period_start): amounts for account_id, amounts in deltas.items()})
+
+
+def closed_through():
+    """End date of the latest closed period, or None when no period is closed.
+
+    Reports read a closed period's snapshots in place of the lines dated up
+    to its end, so nothing dated on or before it can be posted any more,
+    including dates in a gap that no period covers.
+    """
+    return FinancialPeriod.objects.filter(is_closed=True).aggregate(end=Max('end_date'))['end']
+
+
+def post_journal_entry(entry):
+    """Post a journal entry and apply its lines to the balance store.
+
+    The header is locked for the duration of the transaction so the same entry
+    cannot be posted twice concurrently. Header totals are refreshed from the
+    lines. Returns the posted entry.
+    """
+    with transaction.atomic():
+        entry = JournalEntryHeader.objects.select_for_update().get(pk=entry.pk)
+        if entry.is_posted:
+            raise PostingError(f'Journal entry {entry.entry_number} is already posted')
+        closed = closed_through()
+        if closed and entry.entry_date <= closed:
+            raise PostingError(f'Journal entry {entry.entry_number} is dated on or before {closed}, the end of a closed period')
+
+        deltas = entry_account_deltas(entry)
+        if not deltas:
+            raise PostingError(f'Journal entry {entry.entry_number} has no lines')
+        entry.total_debit = sum(debit for debit, _ in deltas.values())
+        entry.total_credit = sum(credit for _, credit in deltas.values())
+        if not entry.is_balanced:
+            raise PostingError(
+                f'Journal entry {entry.entry_number} is not balanced: '
+                f'debits {entry.total_debit} != credits {entry.total_credit}'
+            )
+
+        apply_account_deltas(deltas, period_start_for(entry.entry_date))
+
+        entry.is_posted = True
+        entry.posted_date = timezone.now()
+        entry.save(update_fields=['total_debit', 'total_credit', 'is_posted', 'posted_date', 'updated_at'])
+        bump_ledger_version()
+    return entry
+
+
+def post_journal_entries(entry_ids):
+    """Post many draft journal entries in one transaction.
+
+    Line totals for all entries are validated with one grouped aggregate;
+    entries that are missing, already posted, empty, unbalanced or dated on
+    or before the end of a closed period are skipped. The accounts touched by the valid entries are
+    locked in primary key order before any balance changes, so concurrent
+    batches cannot deadlock on each other. Returns one result dict per
+    requested entry: {'entry_id', 'entry_number', 'posted', 'error'}.
+    """
+    entry_ids = list(dict.fromkeys(entry_ids))
+    with transaction.atomic():
+        entries = {
+            entry.pk: entry
+            for entry in JournalEntryHeader.objects.select_for_update().filter(pk__in=entry_ids).order_by('pk')
+        }
+        totals = {
+            row['journal_entry_id']: row
+            for row in JournalEntryDetail.objects.filter(journal_entry_id__in=list(entries)).order_by()
+            .values('journal_entry_id')
+            .annotate(debit=Sum('debit_amount'), credit=Sum('credit_amount'), line_count=Count('id'))
+        }
+        closed = closed_through()
+
+        results, valid = {}, []
+        for entry_id in entry_ids:
+            entry = entries.get(entry_id)
+            error = None
+            if entry is None:
+                error = 'Journal entry not found'
+            elif entry.is_posted:
+                error = 'Already posted'
+            elif entry_id not in totals:
+                error = 'Has no lines'
+            elif closed and entry.entry_date <= closed:
+                error = f'Dated on or before {closed}, the end of a closed period'
+            else:
+                entry.total_debit = totals[entry_id]['debit'] or 0
+                entry.total_credit = totals[entry_id]['credit'] or 0
+                if not entry.is_balanced:
+                    error = f'Not balanced: debits {entry.total_debit} != credits {entry.total_credit}'
+            if error is None:
+                valid.append(entry)
+            results[entry_id] = {
+                'entry_id': entry_id,
+                'entry_number': entry.entry_number if entry else None,
+                'posted': error is None,
+                'error': error,
+            }
+
+        if valid:
+            period_deltas = {}
+            rows = (
+                JournalEntryDetail.objects.filter(journal_entry_id__in=[entry.pk for entry in valid]).order_by()
+                .annotate(period_start=TruncMonth('journal_entry__entry_date'))
+                .values('account_id', 'period_start')
+                .annotate(debit=Sum('debit_amount'), credit=Sum('credit_amount'))
+            )
+            for row in rows:
+                period_deltas[row['account_id'], row['period_start']] = (row['debit'] or 0, row['credit'] or 0)
+            apply_period_deltas(period_deltas)
+
+            posted_date = timezone.now()
+            for entry in valid:
+                entry.is_posted = True
+                entry.posted_date = posted_date
+                entry.updated_at = posted_date
+            JournalEntryHeader.objects.bulk_update(
+                valid, ['total_debit', 'total_credit', 'is_posted', 'posted_date', 'updated_at'], batch_size=500
+            )
+            bump_ledger_version()
+    return [results[entry_id] for entry_id in entry_ids]
+
+
+def month_start_sql(column, vendor):
+    """SQL for the first day of the month of a date column"""
+    if vendor == 'postgresql':
+        return f"CAST(date_trunc('month', {column}) AS date)"
+    return f"date({column}, 'start of month')"
+
+
+def rebuild_period_balances():
+    """Recompute every AccountPeriodBalance from the posted lines, archived ones included.
+
+    One INSERT ... SELECT ... GROUP BY; returns the number of rows written.
+    """
+    quote = connection.ops.quote_name
+    sources = ' UNION ALL '.join(
+        f'SELECT line.account_id, entry.entry_date, line.debit_amount, line.credit_amount '
+        f'FROM {quote(lines._meta.db_table)} AS line '
+        f'JOIN {quote(headers._meta.db_table)} AS entry ON entry.id = line.journal_entry_id WHERE entry.is_posted'
+        for lines, headers in [
+            (JournalEntryDetail, JournalEntryHeader), (ArchivedJournalEntryDetail, ArchivedJournalEntryHeader),
+        ]
+    )
+    month = month_start_sql('posted.entry_date', connection.vendor)
+    balance_table = quote(AccountPeriodBalance._meta.db_table)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Postings committing during the rebuild wait, then apply their deltas to the new rows
+                cursor.execute(f'LOCK TABLE {balance_table} IN EXCLUSIVE MODE')
+            cursor.execute(f'DELETE FROM {balance_table}')
+            cursor.execute(
+                f'INSERT INTO {balance_table} (account_id, period_start, debit_total, credit_total) '
+                f'SELECT posted.account_id, {month}, SUM(posted.debit_amount), SUM(posted.credit_amount) '
+                f'FROM ({sources}) AS posted GROUP BY posted.account_id, {month}'
+            )
+            return cursor.rowcount
@@ -0,0 +1,518 @@
+# Bank Reconciliation
+"""
+Imports bank statements and matches their transactions to the posted
+journal lines of a cash account.
+
+Statements are read from CSV (BANK_CSV_COLUMNS) or OFX files by generators
+that yield one transaction at a time, and are inserted with bulk_create in
+chunks. Each line carries the bank's transaction id (FITID, or a digest of
+the CSV row), which is unique per account, so re-importing an overlapping
+statement only adds the new transactions.
+
+reconcile_account() matches the unmatched bank lines against the unmatched
+posted lines in two passes:
+
+1. Amount and date: a hash join on the amount in integer cents, read with
+   default.money.Cents so no Decimal is built per line. Journal lines are
+   bucketed by amount and sorted by date, so each bank line only looks at
+   the candidates of its own amount within DATE_WINDOW_DAYS. A bank line
+   matches when one candidate is strictly closer in date than the others.
+2. Reference: bank lines left over, usually because several candidates
+   were equally close, are matched by reference and description similarity
+   within REFERENCE_WINDOW_DAYS. A second hash join on (amount, reference
+   token) picks at most REFERENCE_CANDIDATES lines to compare, so repeated
+   amounts such as fees and subscriptions never compare every pair.
+
+Each lookup bisects to its date window, and claimed journal lines are
+skipped through union-find links instead of being rescanned, so both
+passes stay O(n log n) however skewed the amounts are.
+
+Matches are stored on BankStatementLine. Later runs only consider lines
+that are still unmatched, so they are incremental.
+"""
+import csv
+import difflib
+import hashlib
+import html
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from default.money import Cents
+from .models import Account, BankStatement, BankStatementLine, JournalEntryDetail
+
+CENT = Decimal('0.01')
+# Largest value of BankStatementLine.amount, a DecimalField(max_digits=15, decimal_places=2)
+MAX_AMOUNT = Decimal('9999999999999.99')
+MAX_REPORTED_ERRORS = 100
+DATE_WINDOW_DAYS = 3
+REFERENCE_WINDOW_DAYS = 10
+MIN_REFERENCE_SIMILARITY = 0.6
+# Shorter normalised texts are too generic to count as contained in another
+MIN_CONTAINED_LENGTH = 4
+NOT_ALPHANUMERIC = re.compile(r'[^A-Z0-9]')
+TOKEN = re.compile(r'[A-Z]+|[0-9]+')
+MIN_TOKEN_LENGTH = 3
+# Reference pass bounds: similarity is computed for a fixed number of lines per bank line
+TOKEN_LINE_LIMIT = 50
+REFERENCE_CANDIDATES = 5
+FUZZY_CANDIDATE_LIMIT = 5
+
+BANK_CSV_COLUMNS = ['date', 'amount', 'description', 'reference', 'id']
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+OFX_FIELDS = {
+    'DTPOSTED': 'date',
+    'TRNAMT': 'amount',
+    'FITID': 'transaction_id',
+    'NAME': 'description',
+    'MEMO': 'memo',
+    'CHECKNUM': 'reference',
+    'REFNUM': 'reference',
+}
+
+
+class BankReconciliationError(Exception):
+    """Raised when a bank statement line or a match is invalid"""
+
+
+def read_csv_transactions(lines):
+    """Yield transaction dicts from CSV text lines with BANK_CSV_COLUMNS (``id`` optional)"""
+    occurrences = defaultdict(int)
+    for row_number, row in enumerate(csv.DictReader(lines), start=2):
+        transaction_id = (row.get('id') or '').strip()
+        if not transaction_id:
+            # Identical rows in one file are separate transactions, so each gets its occurrence number
+            digest = hashlib.sha256('|'.join(row.get(column) or '' for column in BANK_CSV_COLUMNS[:4]).encode()).digest()
+            occurrences[digest] += 1
+            transaction_id = f'csv:{digest.hex()[:32]}:{occurrences[digest]}'
+        yield {
+            'source_line': row_number,
+            'transaction_id': transaction_id,
+            'date': row.get('date'),
+            'amount': row.get('amount'),
+            'description': row.get('description') or '',
+            'reference': row.get('reference') or '',
+        }
+
+
+def read_ofx_transactions(lines):
+    """Yield transaction dicts from OFX 1.x (SGML) or 2.x (XML) text, one <STMTTRN> at a time"""
+    current = None
+    for line_number, line in enumerate(lines, start=1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if not closing:
+                    current = {'source_line': line_number}
+                elif current is not None:
+                    # The memo often carries the payer's reference, so it is kept alongside the name
+                    memo = current.pop('memo', '')
+                    current['description'] = ' '.join(text for text in (current.get('description'), memo) if text)
+                    # DTPOSTED is YYYYMMDD, optionally followed by a time and zone
+                    posted = current.get('date') or ''
+                    current['date'] = f'{posted[:4]}-{posted[4:6]}-{posted[6:8]}'
+                    yield current
+                    current = None
+            elif current is not None and not closing and tag in OFX_FIELDS:
+                current.setdefault(OFX_FIELDS[tag], html.unescape(value.strip()))
+
+
+READERS = {
+    'csv': read_csv_transactions,
+    'ofx': read_ofx_transactions,
+    'qfx': read_ofx_transactions,
+}
+
+
+def parse_bank_amount(value):
+    try:
+        amount = Decimal(str(value or '').replace(',', ''))
+        # Checked against MAX_AMOUNT first; quantize() raises for amounts like 1e40
+        valid = amount.is_finite() and 0 < abs(amount) <= MAX_AMOUNT and amount == amount.quantize(CENT)
+    except InvalidOperation:
+        valid = False
+    if not valid:
+        raise BankReconciliationError(f'invalid amount {value!r}')
+    return amount
+
+
+class BankStatementImporter:
+    """Validate and bulk insert bank statement lines, skipping transactions already imported"""
+
+    def __init__(self, account, source_name='', user=None, chunk_size=2000):
+        self.account = account
+        self.chunk_size = chunk_size
+        self.statement = BankStatement.objects.create(account=account, source_name=source_name[:255], imported_by=user)
+        self.line_count = 0
+        self.duplicate_count = 0
+        self.rejected_count = 0
+        self.errors = []  # First MAX_REPORTED_ERRORS rejections
+
+    def build(self, row):
+        try:
+            transaction_date = parse_date(str(row.get('date') or ''))
+        except ValueError:
+            transaction_date = None
+        if transaction_date is None:
+            raise BankReconciliationError(f"invalid date {row.get('date')!r}")
+        transaction_id = str(row.get('transaction_id') or '').strip()
+        if not transaction_id or len(transaction_id) > 100:
+            raise BankReconciliationError('missing or invalid transaction id')
+        return BankStatementLine(
+            statement=self.statement,
+            account=self.account,
+            transaction_id=transaction_id,
+            transaction_date=transaction_date,
+            amount=parse_bank_amount(row.get('amount')),
+            description=(row.get('description') or '')[:250],
+            reference=(row.get('reference') or '')[:100],
+        )
+
+    def flush(self, chunk):
+        """Insert a chunk of lines in one transaction, minus those already imported for the account"""
+        if not chunk:
+            return
+        with transaction.atomic():
+            existing = set(
+                BankStatementLine.objects.filter(
+                    account=self.account, transaction_id__in=[line.transaction_id for line in chunk]
+                ).values_list('transaction_id', flat=True)
+            )
+            new_lines = []
+            for line in chunk:
+                if line.transaction_id not in existing:
+                    existing.add(line.transaction_id)
+                    new_lines.append(line)
+            BankStatementLine.objects.bulk_create(new_lines, batch_size=self.chunk_size)
+        self.line_count += len(new_lines)
+        self.duplicate_count += len(chunk) - len(new_lines)
+
+    def run(self, rows):
+        """Import an iterable of transaction dicts; invalid rows are skipped and reported"""
+        chunk = []
+        for row in rows:
+            try:
+                chunk.append(self.build(row))
+            except BankReconciliationError as e:
+                self.rejected_count += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append(f"Line {row.get('source_line')}: {e}")
+                continue
+            if len(chunk) >= self.chunk_size:
+                self.flush(chunk)
+                chunk = []
+        self.flush(chunk)
+        self.statement.line_count = self.line_count
+        self.statement.duplicate_count = self.duplicate_count
+        self.statement.save(update_fields=['line_count', 'duplicate_count'])
+        return self
+
+
+def import_bank_statement(account, lines, file_format='csv', source_name='', user=None, chunk_size=2000):
+    """Import a bank statement for a cash account from an iterable of text lines"""
+    reader = READERS.get(file_format)
+    if reader is None:
+        raise BankReconciliationError(f'Unsupported statement format: {file_format}')
+    if account.is_header:
+        raise BankReconciliationError(f'{account.account_number} is a header account')
+    return BankStatementImporter(account, source_name, user, chunk_size).run(reader(lines))
+
+
+def normalise(text):
+    return NOT_ALPHANUMERIC.sub('', (text or '').upper())
+
+
+def reference_tokens(texts):
+    """Runs of letters or digits, plus each whole normalised text: the reference pass's join keys"""
+    tokens = set()
+    for text in texts:
+        text = (text or '').upper()
+        tokens.update(token for token in TOKEN.findall(text) if len(token) >= MIN_TOKEN_LENGTH)
+        whole = normalise(text)
+        if len(whole) >= MIN_CONTAINED_LENGTH:
+            tokens.add(whole)
+    return tokens
+
+
+def similarity(left, right):
+    """0..1 similarity of two references; 1.0 when one is contained in the other"""
+    left, right = normalise(left), normalise(right)
+    if not left or not right:
+        return 0.0
+    shorter, longer = sorted([left, right], key=len)
+    if len(shorter) >= MIN_CONTAINED_LENGTH and shorter in longer:
+        return 1.0
+    return difflib.SequenceMatcher(None, left, right).ratio()
+
+
+def reference_score(bank_texts, line_texts):
+    """Best similarity of any bank text to any line text, stopping at the first containment"""
+    best = 0.0
+    for left in bank_texts:
+        for right in line_texts:
+            best = max(best, similarity(left, right))
+            if best == 1.0:
+                return best
+    return best
+
+
+def _find(links, position):
+    """Follow union-find links to the nearest unclaimed position, halving the path as it goes"""
+    while links[position] != position:
+        links[position] = links[links[position]]
+        position = links[position]
+    return position
+
+
+class DateBucket:
+    """Lines of one amount sorted by (date, id), skipping claimed lines in near-constant time.
+
+    ``after`` links each position to the first unclaimed one at or after
+    it (len(lines) when none); ``before`` links position + 1 to the last
+    unclaimed one at or before it, plus one (0 when none).
+    """
+
+    def __init__(self, lines):
+        lines.sort(key=lambda line: line[:2])
+        self.lines = lines
+        self.dates = [line[0] for line in lines]
+        self.after = list(range(len(lines) + 1))
+        self.before = list(range(len(lines) + 1))
+
+    def first_from(self, position):
+        return _find(self.after, position)
+
+    def last_before(self, position):
+        """Last unclaimed position before position, or -1"""
+        return _find(self.before, position) - 1
+
+    def claim(self, position):
+        self.after[position] = position + 1
+        self.before[position + 1] = position
+
+    def closest(self, day, window):
+        """Position of the unclaimed line strictly closest in date within window, else None"""
+        count = len(self.lines)
+        start = bisect_left(self.dates, day)
+        right, left = self.first_from(start), self.last_before(start)
+        nearest = []
+        if right < count and self.dates[right] - day <= window:
+            nearest.append((self.dates[right] - day, right))
+            following = self.first_from(right + 1)
+            if following < count and self.dates[following] == self.dates[right]:
+                nearest.append((self.dates[right] - day, following))
+        if left >= 0 and day - self.dates[left] <= window:
+            nearest.append((day - self.dates[left], left))
+            preceding = self.last_before(left)
+            if preceding >= 0 and self.dates[preceding] == self.dates[left]:
+                nearest.append((day - self.dates[left], preceding))
+        if not nearest:
+            return None
+        nearest.sort(key=lambda found: found[0])
+        if len(nearest) > 1 and nearest[1][0] == nearest[0][0]:
+            return None
+        return nearest[0][1]
+
+    def within(self, day, window, limit):
+        """Positions of up to limit + 1 unclaimed lines dated within window days of day"""
+        found = []
+        position = self.first_from(bisect_left(self.dates, day - window))
+        while position < len(self.lines) and self.dates[position] <= day + window and len(found) <= limit:
+            found.append(position)
+            position = self.first_from(position + 1)
+        return found
+
+
+class MatchCandidates:
+    """Unmatched journal lines, the hash join's build side.
+
+    Lines are bucketed by amount in cents and sorted by date, so a lookup
+    bisects to its date window, and claimed lines are skipped without
+    rescanning them. The reference pass adds a second index on (amount,
+    reference token), built only for the amounts it still needs.
+    """
+
+    def __init__(self, rows):
+        buckets = defaultdict(list)
+        for line_id, cents, entry_date, texts in rows:
+            buckets[cents].append((entry_date, str(line_id), line_id, texts))
+        self.buckets = {cents: DateBucket(lines) for cents, lines in buckets.items()}
+        self.token_buckets = {}
+
+    def closest(self, cents, day, window):
+        """(cents, position) of the unclaimed line strictly closest in date within window days, else None"""
+        bucket = self.buckets.get(cents)
+        position = bucket.closest(day, window) if bucket else None
+        return None if position is None else (cents, position)
+
+    def line(self, key):
+        cents, position = key
+        return self.buckets[cents].lines[position]
+
+    def claim(self, key):
+        cents, position = key
+        self.buckets[cents].claim(position)
+
+    def index_references(self, amounts):
+        """Index the unclaimed lines of these amounts by reference token"""
+        by_token = defaultdict(list)
+        for cents in amounts:
+            bucket = self.buckets.get(cents)
+            if bucket is None:
+                continue
+            position = bucket.first_from(0)
+            while position < len(bucket.lines):
+                entry_date = bucket.dates[position]
+                for token in reference_tokens(bucket.lines[position][3]):
+                    by_token[cents, token].append((entry_date, position))
+                position = bucket.first_from(position + 1)
+        # Already in date order, since each bucket is walked in order
+        self.token_buckets = {key: ([line[0] for line in lines], lines) for key, lines in by_token.items()}
+
+    def by_reference(self, cents, day, window, texts):
+        """Keys of up to REFERENCE_CANDIDATES unclaimed lines sharing the most reference tokens with texts.
+
+        Tokens shared by more than TOKEN_LINE_LIMIT lines in the window, such
+        as a payee's name on every subscription charge, do not discriminate
+        and are skipped. Without a token in common, the lines of the amount
+        are only compared when there are at most FUZZY_CANDIDATE_LIMIT.
+        """
+        bucket = self.buckets.get(cents)
+        if bucket is None:
+            return []
+        shared = defaultdict(int)
+        for token in reference_tokens(texts):
+            indexed = self.token_buckets.get((cents, token))
+            if indexed is None:
+                continue
+            dates, lines = indexed
+            low, high = bisect_left(dates, day - window), bisect_right(dates, day + window)
+            if high - low > TOKEN_LINE_LIMIT:
+                continue
+            for _, position in lines[low:high]:
+                if bucket.first_from(position) == position:
+                    shared[position] += 1
+        if shared:
+            ranked = sorted(shared, key=lambda position: (-shared[position], abs(bucket.dates[position] - day), position))
+            return [(cents, position) for position in ranked[:REFERENCE_CANDIDATES]]
+        positions = bucket.within(day, window, FUZZY_CANDIDATE_LIMIT)
+        return [(cents, position) for position in positions] if len(positions) <= FUZZY_CANDIDATE_LIMIT else []
+
+
+def match_by_amount_and_date(bank_lines, candidates, window):
+    """First pass: {bank_line_id: line_id} where one candidate is strictly closest in date"""
+    matches = {}
+    for bank_id, day, cents, texts in bank_lines:
+        key = candidates.closest(cents, day, window)
+        if key is not None:
+            matches[bank_id] = candidates.line(key)[2]
+            candidates.claim(key)
+    return matches
+
+
+def match_by_reference(bank_lines, candidates, window):
+    """Second pass: {bank_line_id: line_id} for the most similar candidate of the same amount"""
+    candidates.index_references({cents for _, _, cents, _ in bank_lines})
+    matches = {}
+    for bank_id, day, cents, texts in bank_lines:
+        scored = []
+        for key in candidates.by_reference(cents, day, window, texts):
+            entry_date, sort_id, line_id, line_texts = candidates.line(key)
+            scored.append((-reference_score(texts, line_texts), abs((entry_date - day).days), sort_id, key))
+        scored.sort()
+        if scored and -scored[0][0] >= MIN_REFERENCE_SIMILARITY:
+            key = scored[0][3]
+            matches[bank_id] = candidates.line(key)[2]
+            candidates.claim(key)
+    return matches
+
+
+def reconcile_account(account, date_from=None, date_to=None, date_window=DATE_WINDOW_DAYS):
+    """Match a cash account's unmatched bank lines to its unmatched posted journal lines.
+
+    Runs are serialised per account by locking the account row. Returns
+    {'matched_by_amount', 'matched_by_reference', 'unmatched'}.
+    """
+    with transaction.atomic():
+        account = Account.objects.select_for_update().get(pk=account.pk)
+        bank_rows = BankStatementLine.objects.filter(account=account, matched_line__isnull=True)
+        if date_from:
+            bank_rows = bank_rows.filter(transaction_date__gte=date_from)
+        if date_to:
+            bank_rows = bank_rows.filter(transaction_date__lte=date_to)
+        # Amounts are read as integer cents, the hash join's key
+        bank_lines = [
+            (bank_id, day, int(cents), [text for text in (reference, description) if text])
+            for bank_id, day, cents, description, reference in bank_rows.order_by('transaction_date', 'id').values_list(
+                'id', 'transaction_date', Cents('amount'), 'description', 'reference'
+            )
+        ]
+        if not bank_lines:
+            return {'matched_by_amount': 0, 'matched_by_reference': 0, 'unmatched': 0}
+
+        reach = timedelta(days=max(date_window, REFERENCE_WINDOW_DAYS))
+        journal_rows = JournalEntryDetail.objects.filter(
+            account=account,
+            journal_entry__is_posted=True,
+            journal_entry__entry_date__gte=bank_lines[0][1] - reach,
+            journal_entry__entry_date__lte=max(line[1] for line in bank_lines) + reach,
+            bank_match__isnull=True,
+        ).order_by().values_list(
+            'id', Cents(F('debit_amount') - F('credit_amount')), 'journal_entry__entry_date',
+            'journal_entry__reference', 'journal_entry__description', 'description',
+        )
+        candidates = MatchCandidates(
+            (line_id, int(cents), entry_date, [text for text in texts if text])
+            for line_id, cents, entry_date, *texts in journal_rows
+        )
+
+        by_amount = match_by_amount_and_date(bank_lines, candidates, timedelta(days=date_window))
+        remaining = [line for line in bank_lines if line[0] not in by_amount]
+        by_reference = match_by_reference(remaining, candidates, timedelta(days=REFERENCE_WINDOW_DAYS))
+
+        matched_at = timezone.now()
+        BankStatementLine.objects.bulk_update(
+            [
+                BankStatementLine(id=bank_id, matched_line_id=line_id, match_method=method, matched_at=matched_at)
+                for method, matches in (('AMOUNT_DATE', by_amount), ('REFERENCE', by_reference))
+                for bank_id, line_id in matches.items()
+            ],
+            ['matched_line', 'match_method', 'matched_at'],
+            batch_size=1000,
+        )
+    return {
+        'matched_by_amount': len(by_amount),
+        'matched_by_reference': len(by_reference),
+        'unmatched': len(remaining) - len(by_reference),
+    }
+
+
+def match_manually(bank_line, journal_line):
+    """Match a bank line to a posted journal line of the same account and amount"""
+    with transaction.atomic():
+        bank_line = BankStatementLine.objects.select_for_update().get(pk=bank_line.pk)
+        journal_line = JournalEntryDetail.objects.select_related('journal_entry').get(pk=journal_line.pk)
+        if bank_line.matched_line_id:
+            raise BankReconciliationError('The bank line is already matched')
+        if BankStatementLine.objects.filter(matched_line=journal_line).exists():
+            raise BankReconciliationError('The journal line is already matched')
+        if journal_line.account_id != bank_line.account_id or not journal_line.journal_entry.is_posted:
+            raise BankReconciliationError('Bank lines can only match posted lines of the same account')
+        if journal_line.debit_amount - journal_line.credit_amount != bank_line.amount:
+            raise BankReconciliationError('The amounts differ')
+        bank_line.matched_line = journal_line
+        bank_line.match_method = 'MANUAL'
+        bank_line.matched_at = timezone.now()
+        bank_line.save(update_fields=['matched_line', 'match_method', 'matched_at'])
+    return bank_line
+
+
+def unmatch(bank_line):
+    """Clear a bank line's match so the next reconcile_account() run reconsiders it"""
+    BankStatementLine.objects.filter(pk=bank_line.pk).update(matched_line=None, match_method='', matched_at=None)
@@ -0,0 +1,158 @@
+# General Ledger Recurring Entries
+"""
+Materialises due entries from RecurringEntryTemplates, e.g. monthly
+accruals and allocations that were keyed in by hand.
+
+generate_recurring_entries() creates every due (template, period) entry in
+one transaction: the templates are locked, existing entries are found with
+one query, numbers come from a single allocate_document_numbers() call,
+and headers and lines are bulk inserted as AUTO entries. Templates marked
+auto_post are then posted as one batch; entries the batch rejects stay
+drafts and are reported, with their template, under ``failed``. The admin
+refuses templates that do not balance. A unique constraint on
+(recurring_template, recurring_period) guarantees one entry per template
+and period, so the generator is safe to re-run; Celery beat runs it hourly
+through GL.tasks.
+"""
+import calendar
+import logging
+from datetime import date
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Prefetch
+from default.sequences import allocate_document_numbers
+from .dashboard import bump_ledger_version
+from .models import (
+    FiscalYear, JournalEntryDetail, JournalEntryHeader, RecurringEntryTemplate, RecurringEntryTemplateLine,
+)
+from .posting import closed_through, post_journal_entries
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+
+
+def add_months(day, months):
+    """First day of the month ``months`` after the month containing ``day``"""
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def occurrence_date(period_start, day_of_month):
+    """The template's day in the period's first month, clamped to the month's last day"""
+    last_day = calendar.monthrange(period_start.year, period_start.month)[1]
+    return period_start.replace(day=min(max(day_of_month, 1), last_day))
+
+
+def due_occurrences(template, as_of):
+    """Yield (period_start, entry_date) for every occurrence dated on or before as_of"""
+    step = RecurringEntryTemplate.FREQUENCY_MONTHS[template.frequency]
+    period_start = template.start_date.replace(day=1)
+    last_date = min(as_of, template.end_date) if template.end_date else as_of
+    while True:
+        entry_date = occurrence_date(period_start, template.day_of_month)
+        if entry_date > last_date:
+            return
+        if entry_date >= template.start_date:
+            yield period_start, entry_date
+        period_start = add_months(period_start, step)
+
+
+def fiscal_year_for(fiscal_years, day):
+    for fiscal_year in fiscal_years:
+        if fiscal_year.start_date <= day <= fiscal_year.end_date:
+            return fiscal_year
+    return None
+
+
+def generate_recurring_entries(as_of=None, user=None):
+    """Create all due recurring entries that do not exist yet.
+
+    Returns {'created', 'posted', 'failed', 'skipped'}. failed lists the
+    auto_post entries that were created but could not be posted, and skipped
+    the occurrences that could not be generated, each with the reason.
+    Re-running creates nothing new.
+    """
+    as_of = as_of or date.today()
+    with transaction.atomic():
+        # Locked in primary key order so concurrent runs queue behind each other
+        templates = list(
+            RecurringEntryTemplate.objects.select_for_update()
+            .filter(is_active=True, start_date__lte=as_of)
+            .prefetch_related(Prefetch('lines', queryset=RecurringEntryTemplateLine.objects.order_by('id')))
+            .order_by('pk')
+        )
+        if not templates:
+            return {'created': 0, 'posted': 0, 'failed': [], 'skipped': []}
+        earliest = min(template.start_date for template in templates).replace(day=1)
+        existing = set(
+            JournalEntryHeader.objects
+            .filter(recurring_template__isnull=False, recurring_period__gte=earliest)
+            .order_by().values_list('recurring_template_id', 'recurring_period')
+        )
+        fiscal_years = list(FiscalYear.objects.filter(is_closed=False))
+        closed = closed_through()
+
+        due, skipped = [], []
+        for template in templates:
+            template_lines = list(template.lines.all())
+            for period_start, entry_date in due_occurrences(template, as_of):
+                if (template.pk, period_start) in existing:
+                    continue
+                fiscal_year = fiscal_year_for(fiscal_years, entry_date)
+                if not template_lines:
+                    reason = 'Template has no lines'
+                elif fiscal_year is None:
+                    reason = 'No open fiscal year'
+                elif closed and entry_date <= closed:
+                    reason = f'Dated on or before {closed}, the end of a closed period'
+                else:
+                    due.append((template, template_lines, period_start, entry_date, fiscal_year))
+                    continue
+                skipped.append({'template': template.name, 'period': period_start, 'reason': reason})
+
+        due.sort(key=lambda occurrence: (occurrence[3], occurrence[0].name))
+        numbers = allocate_document_numbers('journal_entry', len(due)) if due else []
+        headers, lines = [], []
+        for number, (template, template_lines, period_start, entry_date, fiscal_year) in zip(numbers, due):
+            header = JournalEntryHeader(
+                entry_number=number,
+                entry_type='AUTO',
+                entry_date=entry_date,
+                fiscal_year=fiscal_year,
+                description=f'{template.description} ({period_start:%b %Y})',
+                reference=template.reference,
+                total_debit=sum((line.debit_amount for line in template_lines), ZERO),
+                total_credit=sum((line.credit_amount for line in template_lines), ZERO),
+                created_by=user,
+                recurring_template=template,
+                recurring_period=period_start,
+            )
+            headers.append(header)
+            lines.extend(
+                JournalEntryDetail(
+                    journal_entry=header, account_id=line.account_id, description=line.description,
+                    debit_amount=line.debit_amount, credit_amount=line.credit_amount,
+                )
+                for line in template_lines
+            )
+        JournalEntryHeader.objects.bulk_create(headers, batch_size=500)
+        JournalEntryDetail.objects.bulk_create(lines, batch_size=1000)
+
+        posted, failed = 0, []
+        templates_by_entry = {header.pk: header.recurring_template for header in headers if header.recurring_template.auto_post}
+        if templates_by_entry:
+            for result in post_journal_entries(list(templates_by_entry)):
+                if result['posted']:
+                    posted += 1
+                    continue
+                template = templates_by_entry[result['entry_id']]
+                failed.append({
+                    'template_id': template.pk, 'template': template.name,
+                    'entry_number': result['entry_number'], 'error': result['error'],
+                })
+                logger.warning('Recurring entry %s from template %s was not posted: %s',
+                               result['entry_number'], template.name, result['error'])
+        if headers:
+            bump_ledger_version()
+    return {'created': len(headers), 'posted': posted, 'failed': failed, 'skipped': skipped}
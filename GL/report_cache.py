@@ -0,0 +1,44 @@
+# General Ledger Report Cache
+"""
+Financial reports are cached per (report type, parameters, ledger
+watermark) and served from the cache until the ledger changes.
+
+The watermark is the dashboard's ledger version, a database row advanced
+in every transaction that posts, imports, closes or edits the chart of
+accounts, so all processes agree on it. A posting therefore makes all
+older report entries unreachable without deleting anything. Those entries
+are evicted by the ``reports`` cache itself: its MAX_ENTRIES bound and its
+least-recently-used culling keep hot reports, such as the balance sheet
+opened repeatedly between postings, while stale watermarks age out.
+"""
+import hashlib
+import json
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from .dashboard import ledger_version
+
+REPORT_CACHE = 'reports'
+REPORT_KEY = 'gl:report:{report}:{version}:{params}'
+# Upper bound on how long a computed report is kept
+REPORT_TIMEOUT = 3600
+
+
+def report_cache_key(report, params, version=None):
+    """Cache key for a report with JSON-serialisable parameters at a ledger version"""
+    payload = json.dumps(params, cls=DjangoJSONEncoder, sort_keys=True)
+    return REPORT_KEY.format(
+        report=report,
+        version=ledger_version() if version is None else version,
+        params=hashlib.sha256(payload.encode()).hexdigest(),
+    )
+
+
+def cached_report(report, params, build):
+    """Return the cached report for these parameters, calling build() on a miss"""
+    cache = caches[REPORT_CACHE]
+    key = report_cache_key(report, params)
+    result = cache.get(key)
+    if result is None:
+        result = build()
+        cache.set(key, result, REPORT_TIMEOUT)
+    return result
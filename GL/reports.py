@@ -0,0 +1,470 @@
+# General Ledger Report Engines
+"""
+Report engines return plain dicts/lists so views, templates and exports can
+share the same result. Amounts are Decimals; balances are signed
+(debit - credit) like Account.balance.
+"""
+import base64
+import heapq
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import DecimalField, F, Q, Sum, Value, Window
+from django.utils.dateparse import parse_date, parse_datetime
+from .archive import archive_boundary, line_sources
+from .closing import account_activity, account_balances_as_of, monthly_account_activity, posted_lines
+from .hierarchy import roll_up
+from .models import Account, AccountType
+
+ZERO = Decimal('0.00')
+
+# Sign that presents a (debit - credit) balance on the category's normal side
+CATEGORY_SIGN = {
+    'ASSET': 1,
+    'EXPENSE': 1,
+    'LIABILITY': -1,
+    'EQUITY': -1,
+    'REVENUE': -1,
+}
+
+
+def split_balance(balance):
+    """Return (debit, credit) columns for a signed balance"""
+    if balance >= 0:
+        return balance, ZERO
+    return ZERO, -balance
+
+
+def trial_balance(as_of_date, show_zero=False):
+    """Trial balance of posted activity up to and including as_of_date.
+
+    Balances come from account_balances_as_of: the nearest closing snapshot
+    plus a single grouped query over the posted lines after it, so the cost
+    does not grow with the number of accounts.
+    """
+    balances = account_balances_as_of(as_of_date)
+    accounts = Account.objects.select_related('account_type').order_by('account_number')
+
+    sections = {
+        category: {'category': category, 'label': label, 'rows': [],
+                   'total_debit': ZERO, 'total_credit': ZERO, 'total_balance': ZERO}
+        for category, label in AccountType.CATEGORY_CHOICES
+    }
+    for account in accounts:
+        balance = balances.get(account.pk, ZERO)
+        if not balance and not show_zero:
+            continue
+        debit, credit = split_balance(balance)
+        section = sections[account.account_type.category]
+        section['rows'].append({
+            'account_id': account.pk,
+            'account_number': account.account_number,
+            'account_name': account.account_name,
+            'debit': debit,
+            'credit': credit,
+            'balance': balance,
+        })
+        section['total_debit'] += debit
+        section['total_credit'] += credit
+        section['total_balance'] += balance
+
+    sections = [section for section in sections.values() if section['rows']]
+    total_debit = sum((section['total_debit'] for section in sections), ZERO)
+    total_credit = sum((section['total_credit'] for section in sections), ZERO)
+    return {
+        'report': 'trial_balance',
+        'as_of_date': as_of_date,
+        'sections': sections,
+        'total_debit': total_debit,
+        'total_credit': total_credit,
+        'total_balance': total_debit - total_credit,
+        'balanced': total_debit == total_credit,
+    }
+
+
+def normal_sign(normal_balance):
+    return 1 if normal_balance == 'DEBIT' else -1
+
+
+def statement_sections(accounts, categories, balances, show_zero=False):
+    """Group accounts of the given categories into signed statement sections.
+
+    Each section holds one group per AccountType. Rows are presented on their
+    account type's normal side; header accounts show their subtree roll-up.
+    Group and section totals are built from each account's own balance so
+    headers are never double counted.
+    """
+    rollups = roll_up(balances)
+    labels = dict(AccountType.CATEGORY_CHOICES)
+    sections = {
+        category: {'category': category, 'label': labels[category], 'groups': [], 'total': ZERO}
+        for category in categories
+    }
+    groups = {}
+    for account in accounts:
+        account_type = account.account_type
+        if account_type.category not in sections:
+            continue
+        balance = balances.get(account.pk, ZERO)
+        shown = rollups.get(account.pk, ZERO) if account.is_header else balance
+        if not shown and not show_zero:
+            continue
+
+        sign = normal_sign(account_type.normal_balance)
+        section = sections[account_type.category]
+        group = groups.get(account_type.pk)
+        if group is None:
+            group = groups[account_type.pk] = {'name': account_type.name, 'rows': [], 'total': ZERO}
+            section['groups'].append(group)
+        group['rows'].append({
+            'account_id': account.pk,
+            'account_number': account.account_number,
+            'account_name': account.account_name,
+            'is_header': account.is_header,
+            'amount': sign * shown,
+        })
+        group['total'] += sign * balance
+        section['total'] += CATEGORY_SIGN[account_type.category] * balance
+    return [sections[category] for category in categories]
+
+
+def statement_accounts():
+    return list(Account.objects.select_related('account_type').order_by('account_number'))
+
+
+def net_income_from(accounts, balances):
+    """Revenue less expenses for a {account_id: (debit - credit)} map"""
+    return -sum(
+        (balances.get(account.pk, ZERO) for account in accounts
+         if account.account_type.category in ('REVENUE', 'EXPENSE')),
+        ZERO,
+    )
+
+
+def balance_sheet(as_of_date, show_zero=False):
+    """Balance sheet of posted activity up to and including as_of_date.
+
+    Revenue and expense not yet closed to retained earnings is reported as
+    ``net_income`` within equity.
+    """
+    accounts = statement_accounts()
+    balances = account_balances_as_of(as_of_date)
+    assets, liabilities, equity = statement_sections(
+        accounts, ['ASSET', 'LIABILITY', 'EQUITY'], balances, show_zero
+    )
+    net_income = net_income_from(accounts, balances)
+    total_equity = equity['total'] + net_income
+    return {
+        'report': 'balance_sheet',
+        'as_of_date': as_of_date,
+        'sections': [assets, liabilities, equity],
+        'net_income': net_income,
+        'total_assets': assets['total'],
+        'total_liabilities': liabilities['total'],
+        'total_equity': total_equity,
+        'total_liabilities_and_equity': liabilities['total'] + total_equity,
+        'balanced': assets['total'] == liabilities['total'] + total_equity,
+    }
+
+
+def income_statement(date_from, date_to, show_zero=False):
+    """Income statement of posted activity between date_from and date_to inclusive.
+
+    Year-end CLOSING entries are left out, so a closed year still reports its results.
+    """
+    accounts = statement_accounts()
+    balances = {
+        account_id: debit - credit
+        for account_id, (debit, credit) in account_activity(date_from, date_to, include_closing=False).items()
+    }
+    revenue, expenses = statement_sections(accounts, ['REVENUE', 'EXPENSE'], balances, show_zero)
+    return {
+        'report': 'income_statement',
+        'date_from': date_from,
+        'date_to': date_to,
+        'sections': [revenue, expenses],
+        'total_revenue': revenue['total'],
+        'total_expenses': expenses['total'],
+        'net_income': revenue['total'] - expenses['total'],
+    }
+
+
+STATEMENT_COLUMNS = ['section', 'group', 'account_number', 'account_name', 'amount']
+
+
+def statement_rows(report):
+    """Flatten a statement into STATEMENT_COLUMNS rows for CSV export"""
+    for section in report['sections']:
+        for group in section['groups']:
+            for row in group['rows']:
+                yield [section['label'], group['name'], row['account_number'], row['account_name'], row['amount']]
+            yield [section['label'], group['name'], '', f"Total {group['name']}", group['total']]
+        yield [section['label'], '', '', f"Total {section['label']}", section['total']]
+    yield ['', '', '', 'Net Income', report['net_income']]
+
+
+CASH_FLOW_SECTIONS = [
+    ('OPERATING', 'Cash Flows from Operating Activities'),
+    ('INVESTING', 'Cash Flows from Investing Activities'),
+    ('FINANCING', 'Cash Flows from Financing Activities'),
+]
+# Activity of accounts whose type does not set one; revenue and expense feed net income
+CATEGORY_ACTIVITY = {'ASSET': 'OPERATING', 'LIABILITY': 'OPERATING', 'EQUITY': 'FINANCING'}
+
+
+def cash_flow_activity(account):
+    """CASH, OPERATING, INVESTING, FINANCING, or None for income statement accounts"""
+    return (
+        account.cash_flow_activity
+        or account.account_type.cash_flow_activity
+        or CATEGORY_ACTIVITY.get(account.account_type.category)
+    )
+
+
+def month_periods(date_from, date_to):
+    """(start, end) of each calendar month overlapping the range, clipped to it"""
+    periods = []
+    start = date_from
+    while start <= date_to:
+        next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        periods.append((start, min(next_month - timedelta(days=1), date_to)))
+        start = next_month
+    return periods
+
+
+def cash_flow_statement(date_from, date_to):
+    """Indirect-method cash flow for each month between date_from and date_to.
+
+    Net income is adjusted by the change in every non-cash balance sheet
+    account, summed per AccountType within its cash flow activity. All months
+    come from the same grouped activity query, so the query count does not
+    grow with the number of months. Amounts are lists aligned with
+    ``periods``; year-end CLOSING entries are left out.
+    """
+    periods = month_periods(date_from, date_to)
+    columns = {start.replace(day=1): index for index, (start, _) in enumerate(periods)}
+
+    def zeros():
+        return [ZERO] * len(periods)
+
+    accounts = {account.pk: account for account in statement_accounts()}
+    net_income, cash_change, by_type = zeros(), zeros(), {}
+    for (account_id, month), (debit, credit) in monthly_account_activity(date_from, date_to, include_closing=False).items():
+        account = accounts[account_id]
+        column, delta = columns[month], debit - credit
+        activity = cash_flow_activity(account)
+        if activity is None:
+            net_income[column] -= delta
+        elif activity == 'CASH':
+            cash_change[column] += delta
+        else:
+            # An increase in a non-cash asset uses cash; one in a liability or equity provides it
+            amounts = by_type.setdefault((activity, account.account_type), zeros())
+            amounts[column] -= delta
+
+    sections = []
+    for activity, label in CASH_FLOW_SECTIONS:
+        rows = [
+            {'account_type': account_type.name, 'amounts': amounts, 'total': sum(amounts, ZERO)}
+            for (row_activity, account_type), amounts in sorted(by_type.items(), key=lambda item: item[0][1].name)
+            if row_activity == activity
+        ]
+        totals = [sum(amounts, ZERO) for amounts in zip(*[row['amounts'] for row in rows])] or zeros()
+        if activity == 'OPERATING':
+            totals = [total + income for total, income in zip(totals, net_income)]
+        sections.append({'activity': activity, 'label': label, 'rows': rows, 'totals': totals, 'total': sum(totals, ZERO)})
+
+    net_change = [sum(amounts, ZERO) for amounts in zip(*[section['totals'] for section in sections])]
+    cash_ids = [account_id for account_id, account in accounts.items() if cash_flow_activity(account) == 'CASH']
+    opening = sum(account_balances_as_of(date_from - timedelta(days=1), cash_ids).values(), ZERO)
+    opening_cash, closing_cash = [], []
+    for change in cash_change:
+        opening_cash.append(opening)
+        opening += change
+        closing_cash.append(opening)
+
+    return {
+        'report': 'cash_flow_statement',
+        'date_from': date_from,
+        'date_to': date_to,
+        'periods': [{'start': start, 'end': end, 'label': start.strftime('%b %Y')} for start, end in periods],
+        'net_income': net_income,
+        'sections': sections,
+        'net_change': net_change,
+        'opening_cash': opening_cash,
+        'closing_cash': closing_cash,
+        # Every change in cash is explained when all posted entries balance
+        'balanced': net_change == cash_change,
+    }
+
+
+def cash_flow_columns(report):
+    return ['section', 'account_type', *[period['label'] for period in report['periods']], 'total']
+
+
+def cash_flow_rows(report):
+    """Flatten a cash flow statement into cash_flow_columns() rows for CSV export"""
+    yield ['Opening Cash', '', *report['opening_cash'], report['opening_cash'][0] if report['opening_cash'] else ZERO]
+    for section in report['sections']:
+        if section['activity'] == 'OPERATING':
+            yield [section['label'], 'Net Income', *report['net_income'], sum(report['net_income'], ZERO)]
+        for row in section['rows']:
+            yield [section['label'], row['account_type'], *row['amounts'], row['total']]
+        yield [section['label'], f"Net Cash from {section['label'][len('Cash Flows from '):]}", *section['totals'], section['total']]
+    yield ['Net Change in Cash', '', *report['net_change'], sum(report['net_change'], ZERO)]
+    yield ['Closing Cash', '', *report['closing_cash'], report['closing_cash'][-1] if report['closing_cash'] else ZERO]
+
+
+# Keyset order of the general ledger: unique, so pages never overlap
+LEDGER_ORDER = ['journal_entry__entry_date', 'journal_entry__created_at', 'id']
+
+LEDGER_COLUMNS = [
+    'account_number', 'account_name', 'entry_date', 'entry_number', 'reference',
+    'description', 'debit', 'credit', 'balance',
+]
+
+
+def ledger_segments(date_from, date_to):
+    """[(date_from, date_to, archived)] splitting the range at the archive boundary, oldest first"""
+    boundary = archive_boundary()
+    return [
+        (date_from, min(date_to, boundary), True) if archived
+        else (boundary + timedelta(days=1) if boundary and boundary >= date_from else date_from, date_to, False)
+        for archived in line_sources(date_from, date_to)
+    ]
+
+
+def ledger_lines(date_from, date_to, account_ids=None, archived=False):
+    """Posted lines annotated with a per-account running (debit - credit) total.
+
+    The running total is a window function over LEDGER_ORDER, so it covers the
+    lines matching the queryset's filters, not the whole ledger.
+    """
+    lines = posted_lines(date_from, date_to, archived)
+    if account_ids is not None:
+        lines = lines.filter(account_id__in=account_ids)
+    return lines.annotate(
+        entry_date=F('journal_entry__entry_date'),
+        entry_created_at=F('journal_entry__created_at'),
+        entry_number=F('journal_entry__entry_number'),
+        reference=F('journal_entry__reference'),
+        running_total=Window(
+            Sum(F('debit_amount') - F('credit_amount'), output_field=DecimalField(max_digits=17, decimal_places=2)),
+            partition_by=[F('account_id')],
+            order_by=[F(field).asc() for field in LEDGER_ORDER],
+        ),
+    )
+
+
+def encode_ledger_cursor(line, balance):
+    """Opaque cursor holding the last line's keyset and the balance carried forward"""
+    raw = '|'.join([line.entry_date.isoformat(), line.entry_created_at.isoformat(), str(line.pk), str(balance)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_ledger_cursor(cursor):
+    """Return (entry_date, created_at, line_id, balance); ValueError if malformed"""
+    try:
+        entry_date, created_at, line_id, balance = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        keyset = (parse_date(entry_date), parse_datetime(created_at), line_id, Decimal(balance))
+    except Exception:
+        raise ValueError('Invalid ledger cursor')
+    if None in keyset:
+        raise ValueError('Invalid ledger cursor')
+    return keyset
+
+
+def general_ledger(account, date_from, date_to, cursor=None, page_size=100):
+    """One page of an account's ledger with running balances.
+
+    Pages use keyset pagination on LEDGER_ORDER. The first page starts from the
+    opening balance before date_from; later pages start from the balance carried
+    in the cursor, so no page re-reads the lines before it. A range crossing the
+    archive boundary reads the archive first and carries its balance into the
+    hot lines.
+    """
+    if cursor:
+        entry_date, created_at, line_id, balance_forward = decode_ledger_cursor(cursor)
+        after_cursor = (
+            Q(journal_entry__entry_date__gt=entry_date)
+            | Q(journal_entry__entry_date=entry_date, journal_entry__created_at__gt=created_at)
+            | Q(journal_entry__entry_date=entry_date, journal_entry__created_at=created_at, id__gt=line_id)
+        )
+    else:
+        balance_forward = account_balances_as_of(date_from - timedelta(days=1), [account.pk]).get(account.pk, ZERO)
+
+    page, rows, balance = [], [], balance_forward
+    for segment_from, segment_to, archived in ledger_segments(date_from, date_to):
+        if len(page) > page_size:
+            break
+        if cursor and segment_to and segment_to < entry_date:
+            continue
+        lines = ledger_lines(segment_from, segment_to, [account.pk], archived)
+        if cursor:
+            lines = lines.filter(after_cursor)
+        segment = list(lines.order_by(*LEDGER_ORDER)[:page_size + 1 - len(page)])
+        page.extend(segment)
+        opening = balance
+        for line in segment:
+            balance = opening + line.running_total
+            rows.append({
+                'line_id': line.pk,
+                'entry_id': line.journal_entry_id,
+                'entry_date': line.entry_date,
+                'entry_number': line.entry_number,
+                'reference': line.reference,
+                'description': line.description,
+                'debit': line.debit_amount,
+                'credit': line.credit_amount,
+                'balance': balance,
+            })
+    has_more = len(page) > page_size
+    page, rows = page[:page_size], rows[:page_size]
+
+    return {
+        'report': 'general_ledger',
+        'account_id': account.pk,
+        'account_number': account.account_number,
+        'account_name': account.account_name,
+        'date_from': date_from,
+        'date_to': date_to,
+        'balance_forward': balance_forward,
+        'is_first_page': not cursor,
+        'rows': rows,
+        'total_debit': sum((row['debit'] for row in rows), ZERO),
+        'total_credit': sum((row['credit'] for row in rows), ZERO),
+        'closing_balance': rows[-1]['balance'] if rows else balance_forward,
+        'next_cursor': encode_ledger_cursor(page[-1], rows[-1]['balance']) if has_more else None,
+    }
+
+
+def general_ledger_rows(date_from, date_to, account_ids=None):
+    """Yield LEDGER_COLUMNS rows for every line in the range.
+
+    Rows are read with a streaming iterator, so memory use does not grow with
+    the size of the ledger. Each account starts with an opening balance row.
+    When the range crosses the archive boundary, the archive and hot streams
+    are merged by account, and each account's archived lines come first.
+    """
+    openings = account_balances_as_of(date_from - timedelta(days=1), account_ids)
+    streams = []
+    for position, (segment_from, segment_to, archived) in enumerate(ledger_segments(date_from, date_to)):
+        lines = ledger_lines(segment_from, segment_to, account_ids, archived).order_by(
+            'account__account_number', *LEDGER_ORDER
+        ).values_list(
+            'account__account_number', Value(position), 'account_id', 'account__account_name', 'entry_date',
+            'entry_number', 'reference', 'description', 'debit_amount', 'credit_amount', 'running_total',
+        )
+        streams.append(lines.iterator(chunk_size=2000))
+
+    current_account = None
+    for (number, position, account_id, name, entry_date, entry_number,
+         reference, description, debit, credit, running_total) in heapq.merge(*streams, key=lambda row: row[:2]):
+        if account_id != current_account:
+            current_account, current_position = account_id, position
+            opening = balance = openings.get(account_id, ZERO)
+            yield [number, name, date_from, '', '', 'Opening balance', '', '', opening]
+        if position != current_position:
+            # Hot lines continue from the account's last archived balance
+            current_position, opening = position, balance
+        balance = opening + running_total
+        yield [number, name, entry_date, entry_number, reference, description, debit, credit, balance]
@@ -0,0 +1,111 @@
+# Journal Entry Search
+"""
+Ranked search over journal entry numbers, descriptions and references.
+
+The index is created by migrations 0005 and 0014 and maintained by the
+database, so it stays in sync with every save, including bulk_create imports:
+
+* SQLite: a contentless FTS5 table with the trigram tokenizer, fed by
+  triggers on the header table. Its rowids come from gl_entry_search_key,
+  an INTEGER PRIMARY KEY per entry id, so VACUUM and table rebuilds cannot
+  detach it from the entries. Migrations that rebuild the header table must
+  recreate the triggers. Trigrams match any substring, like the icontains
+  filter this replaces, and results are ranked by bm25.
+* PostgreSQL: GIN indexes on the concatenated text, one with trigram ops
+  for substring (ILIKE) matches and one on its ``simple`` tsvector for word
+  matches. Results are ranked by ts_rank plus trigram similarity.
+
+search_entries() annotates ``search_rank`` where lower sorts first on every
+backend, so callers can order and paginate on it.
+"""
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'gl_entry_search'
+SEARCH_KEY_TABLE = 'gl_entry_search_key'
+# The trigram tokenizer cannot match terms shorter than three characters
+MIN_TERM_LENGTH = 3
+
+ENTRY_TABLE = '"GL_journalentryheader"'
+SEARCH_DOCUMENT = (
+    f"({ENTRY_TABLE}.entry_number || ' ' || {ENTRY_TABLE}.description || ' ' || {ENTRY_TABLE}.reference)"
+)
+
+
+def fts_query(search):
+    """FTS5 query matching every whitespace-separated term as a literal substring"""
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in search.split())
+
+
+def like_pattern(search):
+    return '%{}%'.format(search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_'))
+
+
+def _substring_search(entries, search):
+    """Unindexed fallback used for very short terms and other backends"""
+    return entries.filter(
+        Q(entry_number__icontains=search) |
+        Q(description__icontains=search) |
+        Q(reference__icontains=search)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _sqlite_search(entries, search):
+    match = fts_query(search)
+    return entries.filter(
+        id__in=RawSQL(
+            f'SELECT search_key.entry_id FROM {SEARCH_TABLE} '
+            f'JOIN {SEARCH_KEY_TABLE} AS search_key ON search_key.id = {SEARCH_TABLE}.rowid '
+            f'WHERE {SEARCH_TABLE} MATCH %s',
+            [match],
+        )
+    ).annotate(search_rank=RawSQL(
+        f'SELECT rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND {SEARCH_TABLE}.rowid = '
+        f'(SELECT id FROM {SEARCH_KEY_TABLE} WHERE entry_id = {ENTRY_TABLE}.id)',
+        [match],
+        output_field=FloatField(),
+    ))
+
+
+def _postgresql_search(entries, search):
+    document = f"to_tsvector('simple', {SEARCH_DOCUMENT})"
+    query = "plainto_tsquery('simple', %s)"
+    return entries.annotate(
+        search_match=RawSQL(
+            f"({SEARCH_DOCUMENT} ILIKE %s OR {document} @@ {query})",
+            [like_pattern(search), search],
+            output_field=BooleanField(),
+        ),
+        search_rank=RawSQL(
+            f"(-(ts_rank({document}, {query}) + similarity({SEARCH_DOCUMENT}, %s)))::float8",
+            [search, search],
+            output_field=FloatField(),
+        ),
+    ).filter(search_match=True)
+
+
+def search_entries(entries, search):
+    """Filter a JournalEntryHeader queryset by search text and annotate search_rank"""
+    search = search.strip()
+    if connection.vendor == 'postgresql':
+        return _postgresql_search(entries, search)
+    if connection.vendor == 'sqlite' and search and all(len(term) >= MIN_TERM_LENGTH for term in search.split()):
+        return _sqlite_search(entries, search)
+    return _substring_search(entries, search)
+
+
+def rebuild_search_index():
+    """Repopulate the SQLite FTS table and its keys from the headers, e.g. after a bulk load with triggers off"""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('delete-all')")
+        cursor.execute(f'DELETE FROM {SEARCH_KEY_TABLE} WHERE entry_id NOT IN (SELECT id FROM {ENTRY_TABLE})')
+        cursor.execute(f'INSERT OR IGNORE INTO {SEARCH_KEY_TABLE}(entry_id) SELECT id FROM {ENTRY_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE}(rowid, entry_number, description, reference) '
+            f'SELECT search_key.id, entry.entry_number, entry.description, entry.reference FROM {ENTRY_TABLE} AS entry '
+            f'JOIN {SEARCH_KEY_TABLE} AS search_key ON search_key.entry_id = entry.id'
+        )
+    return True
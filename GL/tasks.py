@@ -0,0 +1,15 @@
+# General Ledger Celery Tasks
+"""Discovered by the Celery app in easyerp.celery and scheduled by beat (CELERY_BEAT_SCHEDULE)"""
+from celery import shared_task
+from django.utils import timezone
+from default.jobs import submit_job
+
+
+@shared_task(name='GL.generate_recurring_entries', ignore_result=True)
+def generate_recurring_entries():
+    """Queue a recurring entry run; a redelivered beat tick reuses the same hourly job"""
+    now = timezone.localtime()
+    submit_job(
+        'gl.recurring_entries', {'as_of': now.date().isoformat()},
+        key=f'gl.recurring_entries:{now:%Y-%m-%dT%H}',
+    )
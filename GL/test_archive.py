@@ -0,0 +1,134 @@
+"""
+Tests for archiving closed fiscal years out of the hot journal tables.
+"""
+
+import io
+from datetime import date
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from GL import reports
+from GL.archive import ArchiveError, archive_fiscal_year, line_sources
+from GL.models import (
+    ArchivedJournalEntryDetail, ArchivedJournalEntryHeader, FiscalYear, JournalEntryDetail, JournalEntryHeader,
+)
+from GL.test_reports import ReportTestCase
+
+
+class ArchiveTests(ReportTestCase):
+    """FY 2024 is closed and can be archived; FY 2025 stays hot"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        fiscal_year_2025 = cls.fiscal_year
+        cls.fiscal_year = cls.previous_year = FiscalYear.objects.create(
+            name='FY 2024', start_date=date(2024, 1, 1), end_date=date(2024, 12, 31), is_closed=True
+        )
+        cls.post(date(2024, 6, 1), [(cls.cash, '500.00', '0'), (cls.capital, '0', '500.00')])
+        cls.post(date(2024, 11, 15), [(cls.rent, '80.00', '0'), (cls.cash, '0', '80.00')])
+        cls.fiscal_year = fiscal_year_2025
+
+    def archive(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return archive_fiscal_year(self.previous_year)
+
+    def ledger(self, **kwargs):
+        return list(reports.general_ledger_rows(date(2024, 1, 1), date(2025, 12, 31), **kwargs))
+
+    def test_archive_moves_the_year_out_of_the_hot_tables(self):
+        self.assertEqual(self.archive(), (2, 4))
+
+        self.assertEqual(JournalEntryHeader.objects.filter(entry_date__year=2024).count(), 0)
+        self.assertEqual(JournalEntryHeader.objects.count(), 3)
+        self.assertEqual(ArchivedJournalEntryHeader.objects.count(), 2)
+        self.assertEqual(ArchivedJournalEntryDetail.objects.filter(journal_entry__is_posted=True).count(), 4)
+        self.previous_year.refresh_from_db()
+        self.assertIsNotNone(self.previous_year.archived_at)
+
+    def test_reports_are_unchanged_across_the_boundary(self):
+        trial_balance = reports.trial_balance(date(2025, 12, 31))
+        income = reports.income_statement(date(2024, 1, 1), date(2025, 12, 31))
+        ledger = self.ledger()
+        self.setUp()
+
+        self.archive()
+
+        self.assertEqual(reports.trial_balance(date(2025, 12, 31)), trial_balance)
+        self.assertEqual(reports.income_statement(date(2024, 1, 1), date(2025, 12, 31)), income)
+        self.assertEqual(self.ledger(), ledger)
+
+    def test_general_ledger_pages_across_the_boundary(self):
+        def all_pages():
+            rows, cursor = [], None
+            while True:
+                page = reports.general_ledger(self.cash, date(2024, 1, 1), date(2025, 12, 31), cursor, page_size=1)
+                rows.extend(page['rows'])
+                cursor = page['next_cursor']
+                if not cursor:
+                    return rows
+
+        before = all_pages()
+        self.archive()
+        after = all_pages()
+
+        self.assertEqual(after, before)
+        self.cash.refresh_from_db()
+        self.assertEqual(after[-1]['balance'], self.cash.balance)
+
+    def test_line_sources_read_the_archive_only_when_needed(self):
+        self.assertEqual(line_sources(), [False])
+        self.archive()
+
+        self.assertEqual(line_sources(date(2025, 1, 1), date(2025, 12, 31)), [False])
+        self.assertEqual(line_sources(date(2024, 1, 1), date(2024, 12, 31)), [True])
+        self.assertEqual(line_sources(None, date(2025, 1, 31)), [True, False])
+
+    def test_boundary_does_not_depend_on_the_ledger_version(self):
+        self.assertEqual(line_sources(), [False])
+
+        # As from a management command in another process: this process's version is not bumped
+        archive_fiscal_year(self.previous_year)
+
+        self.assertEqual(line_sources(), [True, False])
+
+    def test_recent_reports_skip_the_archive(self):
+        self.archive()
+
+        with CaptureQueriesContext(connection) as queries:
+            reports.income_statement(date(2025, 1, 1), date(2025, 12, 31))
+
+        self.assertFalse([query for query in queries if 'GL_archived' in query['sql']])
+
+    def test_open_or_out_of_order_years_are_rejected(self):
+        with self.assertRaisesMessage(ArchiveError, 'must be closed'):
+            archive_fiscal_year(self.fiscal_year)
+
+        FiscalYear.objects.filter(pk=self.fiscal_year.pk).update(is_closed=True)
+        with self.assertRaisesMessage(ArchiveError, 'Earlier fiscal years must be archived first'):
+            archive_fiscal_year(self.fiscal_year)
+
+        self.archive()
+        with self.assertRaisesMessage(ArchiveError, 'already archived'):
+            archive_fiscal_year(self.previous_year)
+
+    def test_drafts_block_the_archive(self):
+        JournalEntryHeader.objects.create(
+            entry_number='JE-DRAFT', entry_date=date(2024, 12, 1), fiscal_year=self.previous_year, description='Draft',
+        )
+
+        with self.assertRaisesMessage(ArchiveError, 'unposted'):
+            archive_fiscal_year(self.previous_year)
+        self.assertEqual(JournalEntryDetail.objects.filter(journal_entry__entry_date__year=2024).count(), 4)
+
+    def test_archive_command(self):
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_fiscal_year', 'FY 2024', stdout=out)
+
+        self.assertIn('Archived FY 2024: 2 journal entries, 4 lines', out.getvalue())
+        with self.assertRaisesMessage(CommandError, 'already archived'):
+            call_command('archive_fiscal_year', 'FY 2024', stdout=io.StringIO())
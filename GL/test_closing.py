@@ -0,0 +1,279 @@
+"""
+Tests for financial period closing snapshots.
+"""
+
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from GL.closing import (
+    PeriodCloseError, account_activity, account_balances_as_of, close_fiscal_year, close_period, split_months,
+)
+from GL.models import (
+    Account, AccountPeriodBalance, AccountType, FinancialPeriod, FiscalYear,
+    JournalEntryDetail, JournalEntryHeader,
+)
+from GL.posting import PostingError, post_journal_entry
+from GL.reports import income_statement, trial_balance
+from GL.test_reports import ReportTestCase
+
+
+class ClosingFixtures:
+    """Cash and sales accounts with January and February 2025 periods"""
+
+    @classmethod
+    def setUpTestData(cls):
+        asset = AccountType.objects.create(name='Cash', category='ASSET', normal_balance='DEBIT')
+        revenue = AccountType.objects.create(name='Sales', category='REVENUE', normal_balance='CREDIT')
+        cls.cash = Account.objects.create(account_number='1000', account_name='Cash', account_type=asset)
+        cls.sales = Account.objects.create(account_number='4000', account_name='Sales', account_type=revenue)
+        cls.fiscal_year = FiscalYear.objects.create(
+            name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31), is_current=True
+        )
+        cls.january = FinancialPeriod.objects.create(
+            fiscal_year=cls.fiscal_year, period_type='MONTHLY', period_number=1,
+            start_date=date(2025, 1, 1), end_date=date(2025, 1, 31),
+        )
+        cls.february = FinancialPeriod.objects.create(
+            fiscal_year=cls.fiscal_year, period_type='MONTHLY', period_number=2,
+            start_date=date(2025, 2, 1), end_date=date(2025, 2, 28),
+        )
+
+    def post_sale(self, number, amount, entry_date):
+        entry = JournalEntryHeader.objects.create(
+            entry_number=number, entry_date=entry_date,
+            fiscal_year=self.fiscal_year, description='Cash sale',
+        )
+        JournalEntryDetail.objects.create(journal_entry=entry, account=self.cash, debit_amount=amount)
+        JournalEntryDetail.objects.create(journal_entry=entry, account=self.sales, credit_amount=amount)
+        return post_journal_entry(entry)
+
+
+class PeriodCloseTests(ClosingFixtures, TestCase):
+    """Closing a period snapshots balances used by as-of queries"""
+
+    def test_close_writes_snapshots(self):
+        self.post_sale('JE-0001', Decimal('100.00'), date(2025, 1, 10))
+        close_period(self.january)
+        self.post_sale('JE-0002', Decimal('30.00'), date(2025, 2, 5))
+        close_period(self.february)
+
+        snapshot = self.february.snapshots.get(account=self.cash)
+        self.assertEqual(snapshot.opening_balance, Decimal('100.00'))
+        self.assertEqual(snapshot.debit_total, Decimal('30.00'))
+        self.assertEqual(snapshot.closing_balance, Decimal('130.00'))
+        self.february.refresh_from_db()
+        self.assertTrue(self.february.is_closed)
+        self.assertIsNotNone(self.february.closed_date)
+
+    def test_balances_as_of_start_from_snapshot(self):
+        self.post_sale('JE-0001', Decimal('100.00'), date(2025, 1, 10))
+        close_period(self.january)
+        self.post_sale('JE-0002', Decimal('30.00'), date(2025, 2, 5))
+        self.post_sale('JE-0003', Decimal('5.00'), date(2025, 2, 20))
+
+        self.assertEqual(account_balances_as_of(date(2025, 1, 31))[self.cash.pk], Decimal('100.00'))
+        self.assertEqual(account_balances_as_of(date(2025, 2, 10))[self.cash.pk], Decimal('130.00'))
+        self.assertEqual(account_balances_as_of(date(2025, 2, 28))[self.sales.pk], Decimal('-135.00'))
+
+    def test_closed_period_rejects_close_and_posting(self):
+        close_period(self.january)
+
+        with self.assertRaises(PeriodCloseError):
+            close_period(self.january)
+        with self.assertRaises(PostingError):
+            self.post_sale('JE-0001', Decimal('10.00'), date(2025, 1, 15))
+
+    def test_dates_in_a_gap_before_a_closed_period_are_rejected(self):
+        march = FinancialPeriod.objects.create(
+            fiscal_year=self.fiscal_year, period_type='MONTHLY', period_number=3,
+            start_date=date(2025, 3, 1), end_date=date(2025, 3, 31),
+        )
+        self.february.delete()
+        self.post_sale('JE-0001', Decimal('100.00'), date(2025, 1, 10))
+        close_period(self.january)
+        close_period(march)
+
+        # No period covers February, but the March snapshot already counts it
+        with self.assertRaisesMessage(PostingError, 'dated on or before 2025-03-31'):
+            self.post_sale('JE-0002', Decimal('30.00'), date(2025, 2, 10))
+        self.post_sale('JE-0003', Decimal('5.00'), date(2025, 4, 1))
+
+        self.assertEqual(account_balances_as_of(date(2025, 4, 30))[self.cash.pk], Decimal('105.00'))
+        self.cash.refresh_from_db()
+        self.assertEqual(self.cash.balance, Decimal('105.00'))
+
+    def test_later_period_waits_for_earlier_ones(self):
+        self.post_sale('JE-0001', Decimal('100.00'), date(2025, 1, 10))
+        with self.assertRaises(PeriodCloseError):
+            close_period(self.february)
+
+        # A late posting into January is still accepted, and counted once February closes
+        self.post_sale('JE-0002', Decimal('50.00'), date(2025, 1, 20))
+        close_period(self.january)
+        close_period(self.february)
+
+        self.cash.refresh_from_db()
+        self.assertEqual(account_balances_as_of(date(2025, 4, 30))[self.cash.pk], self.cash.balance)
+        self.assertEqual(self.cash.balance, Decimal('150.00'))
+
+    def test_snapshots_of_other_period_types_are_ignored(self):
+        quarter = FinancialPeriod.objects.create(
+            fiscal_year=self.fiscal_year, period_type='QUARTERLY', period_number=1,
+            start_date=date(2025, 1, 1), end_date=date(2025, 3, 31),
+        )
+        self.post_sale('JE-0001', Decimal('100.00'), date(2025, 1, 10))
+        close_period(quarter)
+        quarter.snapshots.filter(account=self.cash).update(closing_balance=Decimal('999.00'))
+
+        self.assertEqual(account_balances_as_of(date(2025, 4, 30))[self.cash.pk], Decimal('100.00'))
+        self.assertEqual(
+            account_balances_as_of(date(2025, 4, 30), period_type='QUARTERLY')[self.cash.pk], Decimal('999.00')
+        )
+
+
+class FiscalYearCloseTests(ClosingFixtures, TestCase):
+    """Year-end close moves income statement balances to retained earnings"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        equity = AccountType.objects.create(name='Equity', category='EQUITY', normal_balance='CREDIT')
+        expense = AccountType.objects.create(name='Rent', category='EXPENSE', normal_balance='DEBIT')
+        cls.retained = Account.objects.create(account_number='3100', account_name='Retained Earnings', account_type=equity)
+        cls.rent = Account.objects.create(account_number='6100', account_name='Rent', account_type=expense)
+
+    def post_rent(self, amount, entry_date):
+        entry = JournalEntryHeader.objects.create(
+            entry_number='JE-R', entry_date=entry_date, fiscal_year=self.fiscal_year, description='Rent',
+        )
+        JournalEntryDetail.objects.create(journal_entry=entry, account=self.rent, debit_amount=amount)
+        JournalEntryDetail.objects.create(journal_entry=entry, account=self.cash, credit_amount=amount)
+        return post_journal_entry(entry)
+
+    def test_close_fiscal_year(self):
+        self.post_sale('JE-0001', Decimal('100.00'), date(2025, 1, 10))
+        self.post_sale('JE-0002', Decimal('30.00'), date(2025, 2, 5))
+        self.post_rent(Decimal('40.00'), date(2025, 2, 6))
+
+        entry = close_fiscal_year(self.fiscal_year)
+
+        self.assertEqual(entry.entry_type, 'CLOSING')
+        self.assertEqual(entry.entry_date, date(2025, 12, 31))
+        self.assertTrue(entry.is_posted)
+        self.assertEqual(entry.total_debit, Decimal('130.00'))
+        self.assertEqual(entry.total_credit, Decimal('130.00'))
+        balances = account_balances_as_of(date(2025, 12, 31))
+        self.assertEqual(balances[self.sales.pk], Decimal('0.00'))
+        self.assertEqual(balances[self.rent.pk], Decimal('0.00'))
+        self.assertEqual(balances[self.retained.pk], Decimal('-90.00'))
+        self.assertEqual(income_statement(date(2025, 1, 1), date(2025, 12, 31))['net_income'], Decimal('90.00'))
+        self.fiscal_year.refresh_from_db()
+        self.assertTrue(self.fiscal_year.is_closed)
+        self.assertFalse(FinancialPeriod.objects.filter(fiscal_year=self.fiscal_year, is_closed=False).exists())
+
+    def test_close_rejects_drafts_and_second_close(self):
+        JournalEntryHeader.objects.create(
+            entry_number='JE-D', entry_date=date(2025, 6, 1), fiscal_year=self.fiscal_year, description='Draft',
+        )
+        with self.assertRaises(PeriodCloseError):
+            close_fiscal_year(self.fiscal_year)
+
+        JournalEntryHeader.objects.filter(entry_number='JE-D').delete()
+        self.assertIsNone(close_fiscal_year(self.fiscal_year))
+        with self.assertRaises(PeriodCloseError):
+            close_fiscal_year(self.fiscal_year)
+
+    def close_with_expense_accounts(self, account_count):
+        """Post a sale and one expense line on each of account_count accounts, then close the year"""
+        expense = self.rent.account_type
+        accounts = [self.rent] + [
+            Account.objects.create(account_number=f'61{number:02d}', account_name=f'Expense {number}', account_type=expense)
+            for number in range(1, account_count)
+        ]
+        entry = JournalEntryHeader.objects.create(
+            entry_number='JE-E', entry_date=date(2025, 2, 6), fiscal_year=self.fiscal_year, description='Expenses',
+        )
+        JournalEntryDetail.objects.bulk_create([
+            JournalEntryDetail(journal_entry=entry, account=account, debit_amount=Decimal('10.00')) for account in accounts
+        ] + [JournalEntryDetail(journal_entry=entry, account=self.cash, credit_amount=10 * Decimal(account_count))])
+        post_journal_entry(entry)
+        self.post_sale('JE-0001', Decimal('100.00'), date(2025, 1, 10))
+
+        # Balance updates are batched, so the queries do not depend on account_count
+        with self.assertNumQueries(53):
+            closing = close_fiscal_year(self.fiscal_year)
+
+        # Sales, retained earnings and one line per expense account
+        self.assertEqual(closing.lines.count(), account_count + 2)
+        self.assertEqual(set(Account.objects.filter(account_type=expense).values_list('balance', flat=True)), {Decimal('0.00')})
+        self.assertEqual(account_balances_as_of(date(2025, 12, 31))[self.retained.pk], 10 * account_count - Decimal('100.00'))
+
+    def test_close_queries_with_two_expense_accounts(self):
+        self.close_with_expense_accounts(2)
+
+    def test_close_queries_with_twenty_expense_accounts(self):
+        self.close_with_expense_accounts(20)
+
+    def test_management_command(self):
+        self.post_sale('JE-0001', Decimal('100.00'), date(2025, 1, 10))
+        out = io.StringIO()
+
+        call_command('close_fiscal_year', 'FY 2025', '--retained-earnings', '3100', stdout=out)
+
+        self.assertIn('Closed FY 2025 with closing entry', out.getvalue())
+
+
+class SplitMonthsTests(SimpleTestCase):
+
+    def test_whole_months_and_edges(self):
+        self.assertEqual(split_months(date(2025, 1, 1), date(2025, 3, 31)), ((date(2025, 1, 1), date(2025, 4, 1)), []))
+        self.assertEqual(split_months(date(2025, 1, 15), date(2025, 3, 10)), (
+            (date(2025, 2, 1), date(2025, 3, 1)), [(date(2025, 1, 15), date(2025, 1, 31)), (date(2025, 3, 1), date(2025, 3, 10))],
+        ))
+        self.assertEqual(split_months(None, date(2025, 2, 28)), ((None, date(2025, 3, 1)), []))
+        self.assertEqual(split_months(date(2025, 12, 2), None), ((date(2026, 1, 1), None), [(date(2025, 12, 2), date(2025, 12, 31))]))
+        self.assertEqual(split_months(date(2025, 2, 3), date(2025, 2, 27)), (None, [(date(2025, 2, 3), date(2025, 2, 27))]))
+
+
+class PeriodBalanceReadTests(ReportTestCase):
+    """Whole months are read from AccountPeriodBalance, the rest from the lines"""
+
+    def line_queries(self, function, *args):
+        with CaptureQueriesContext(connection) as queries:
+            function(*args)
+        return [query['sql'] for query in queries if 'GL_journalentrydetail' in query['sql']]
+
+    def test_month_aligned_reads_skip_the_lines(self):
+        january = FinancialPeriod.objects.create(
+            fiscal_year=self.fiscal_year, period_type='MONTHLY', period_number=1,
+            start_date=date(2025, 1, 1), end_date=date(2025, 1, 31),
+        )
+
+        self.assertEqual(self.line_queries(trial_balance, date(2025, 12, 31)), [])
+        self.assertEqual(self.line_queries(close_period, january), [])
+        self.assertEqual(january.snapshots.get(account=self.cash).closing_balance, Decimal('1000.00'))
+
+    def test_partial_months_add_the_lines(self):
+        self.assertEqual(income_statement(date(2025, 2, 10), date(2025, 3, 1))['net_income'], Decimal('250.00'))
+        self.assertEqual(income_statement(date(2025, 2, 11), date(2025, 2, 28))['net_income'], Decimal('0.00'))
+        self.assertEqual(account_activity(date(2025, 1, 2), date(2025, 2, 28), [self.cash.pk]), {
+            self.cash.pk: (Decimal('1400.00'), Decimal('0.00')),
+        })
+
+    def test_rebuild_backfills_the_monthly_balances(self):
+        expected = list(AccountPeriodBalance.objects.values_list('account_id', 'period_start', 'debit_total', 'credit_total'))
+        AccountPeriodBalance.objects.all().delete()
+
+        out = io.StringIO()
+        call_command('rebuild_period_balances', stdout=out)
+
+        self.assertIn(f'Rebuilt {len(expected)} account period balances', out.getvalue())
+        self.assertEqual(
+            list(AccountPeriodBalance.objects.values_list('account_id', 'period_start', 'debit_total', 'credit_total')), expected,
+        )
@@ -0,0 +1,61 @@
+"""
+Tests for the cached GL dashboard summary.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from GL.dashboard import gl_summary, ledger_version
+from GL.models import Account, AccountType, FiscalYear, JournalEntryDetail, JournalEntryHeader
+from GL.posting import post_journal_entry
+
+
+class DashboardSummaryTests(TestCase):
+    """The summary is cached per ledger version and refreshed by posting"""
+
+    @classmethod
+    def setUpTestData(cls):
+        asset = AccountType.objects.create(name='Cash', category='ASSET', normal_balance='DEBIT')
+        liability = AccountType.objects.create(name='Loans', category='LIABILITY', normal_balance='CREDIT')
+        cls.cash = Account.objects.create(account_number='1000', account_name='Cash', account_type=asset)
+        cls.loan = Account.objects.create(account_number='2000', account_name='Loan', account_type=liability)
+        cls.fiscal_year = FiscalYear.objects.create(name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+
+    def setUp(self):
+        cache.clear()
+        self.entry = JournalEntryHeader.objects.create(
+            entry_number='JE-0001', entry_date=date(2025, 5, 1), fiscal_year=self.fiscal_year, description='Loan',
+        )
+        JournalEntryDetail.objects.create(journal_entry=self.entry, account=self.cash, debit_amount=Decimal('500.00'))
+        JournalEntryDetail.objects.create(journal_entry=self.entry, account=self.loan, credit_amount=Decimal('500.00'))
+
+    def test_summary_is_served_from_cache(self):
+        self.assertEqual(gl_summary()['unposted_entries'], 1)
+
+        with self.assertNumQueries(1):  # The ledger version
+            gl_summary()
+
+    def test_posting_invalidates_summary(self):
+        version = ledger_version()
+        self.assertEqual(gl_summary()['total_assets'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post_journal_entry(self.entry)
+
+        self.assertGreater(ledger_version(), version)
+        summary = gl_summary()
+        self.assertEqual(summary['total_assets'], Decimal('500.00'))
+        self.assertEqual(summary['total_liabilities'], Decimal('500.00'))
+        self.assertEqual(summary['unposted_entries'], 0)
+
+    def test_dashboard_view(self):
+        self.client.force_login(get_user_model().objects.create_user(username='cfo', password='pw'))
+
+        response = self.client.get('/gl/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'JE-0001')
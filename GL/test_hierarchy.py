@@ -0,0 +1,88 @@
+"""
+Tests for the chart-of-accounts closure table.
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase
+
+from GL.hierarchy import accounts_with_rollup, rebuild_account_closure, roll_up
+from GL.models import Account, AccountClosure, AccountType
+
+
+class AccountHierarchyTests(TestCase):
+    """Closure rows follow account creation and re-parenting"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.asset = AccountType.objects.create(name='Assets', category='ASSET', normal_balance='DEBIT')
+
+    def make_account(self, number, parent=None, balance='0'):
+        return Account.objects.create(
+            account_number=number, account_name=f'Account {number}', account_type=self.asset,
+            parent_account=parent, is_header=parent is None, balance=Decimal(balance),
+        )
+
+    def ancestors(self, account):
+        return dict(AccountClosure.objects.filter(descendant=account).values_list('ancestor__account_number', 'depth'))
+
+    def test_create_links_all_ancestors(self):
+        root = self.make_account('1')
+        current = self.make_account('11', root)
+        cash = self.make_account('1100', current)
+
+        self.assertEqual(self.ancestors(cash), {'1': 2, '11': 1, '1100': 0})
+
+    def test_reparent_moves_subtree(self):
+        root = self.make_account('1')
+        current = self.make_account('11', root)
+        other = self.make_account('2')
+        cash = self.make_account('1100', current)
+
+        current.parent_account = other
+        current.save()
+
+        self.assertEqual(self.ancestors(cash), {'2': 2, '11': 1, '1100': 0})
+
+    def test_reparent_under_descendant_is_rejected(self):
+        root = self.make_account('1')
+        child = self.make_account('11', root)
+
+        root.parent_account = child
+        with self.assertRaises(ValueError):
+            root.save()
+
+    def test_rollup_sums_subtree(self):
+        root = self.make_account('1')
+        current = self.make_account('11', root)
+        self.make_account('1100', current, balance='100.00')
+        self.make_account('1200', current, balance='50.00')
+        self.make_account('1500', root, balance='25.00')
+
+        rollups = {account.account_number: account.rollup_balance for account in accounts_with_rollup()}
+        self.assertEqual(rollups['1'], Decimal('175.00'))
+        self.assertEqual(rollups['11'], Decimal('150.00'))
+
+        totals = roll_up({account.pk: account.balance for account in Account.objects.all()})
+        self.assertEqual(totals[root.pk], Decimal('175.00'))
+
+    def test_rebuild_matches_incremental(self):
+        root = self.make_account('1')
+        child = self.make_account('11', root)
+        self.make_account('1100', child)
+        expected = set(AccountClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+        rebuild_account_closure()
+
+        self.assertEqual(set(AccountClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth')), expected)
+
+    def test_chart_of_accounts_view(self):
+        from django.contrib.auth import get_user_model
+        root = self.make_account('1')
+        self.make_account('1100', root, balance='10.00')
+        self.client.force_login(get_user_model().objects.create_user(username='controller', password='pw'))
+
+        response = self.client.get('/gl/chart-of-accounts/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Account 1100')
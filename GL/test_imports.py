@@ -0,0 +1,121 @@
+"""
+Tests for streaming journal entry imports.
+"""
+
+import io
+import json
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from GL.imports import import_journal_file
+from GL.models import Account, AccountType, FiscalYear, JournalEntryDetail, JournalEntryHeader
+
+CSV_FILE = """entry,entry_date,description,reference,account,line_description,debit,credit
+A,2025-03-01,Cash sale,INV-1,1000,Cash in,100.00,
+A,2025-03-01,Cash sale,INV-1,4000,Revenue,,100.00
+B,2025-03-02,Unbalanced,INV-2,1000,Cash in,10.00,
+B,2025-03-02,Unbalanced,INV-2,4000,Revenue,,9.00
+C,2025-03-03,Unknown account,INV-3,9999,Cash in,5.00,
+C,2025-03-03,Unknown account,INV-3,4000,Revenue,,5.00
+D,2025-03-04,Second sale,INV-4,1000,Cash in,20.50,
+D,2025-03-04,Second sale,INV-4,4000,Revenue,,20.50
+"""
+
+JSONL_FILE = """{"entry": "X", "entry_date": "2025-04-01", "description": "Rent", "lines": [{"account": "1000", "credit": "75.00"}, {"account": "4000", "debit": "75.00"}]}
+not json
+"""
+
+
+class JournalImportTests(TestCase):
+    """Imports validate entries and bulk insert drafts in chunks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        asset = AccountType.objects.create(name='Cash', category='ASSET', normal_balance='DEBIT')
+        revenue = AccountType.objects.create(name='Sales', category='REVENUE', normal_balance='CREDIT')
+        Account.objects.create(account_number='1000', account_name='Cash', account_type=asset)
+        Account.objects.create(account_number='4000', account_name='Sales', account_type=revenue)
+        FiscalYear.objects.create(name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+
+    def test_csv_import_skips_invalid_entries(self):
+        result = import_journal_file(io.StringIO(CSV_FILE), 'csv', chunk_size=2)
+
+        self.assertEqual(result.entry_count, 2)
+        self.assertEqual(result.line_count, 4)
+        self.assertEqual(result.rejected_count, 2)
+        self.assertIn('do not equal', result.errors[0])
+        self.assertIn('unknown or inactive account', result.errors[1])
+
+        entries = JournalEntryHeader.objects.order_by('entry_date')
+        self.assertEqual([entry.entry_number for entry in entries], ['JE-0001', 'JE-0002'])
+        self.assertEqual(entries[1].total_debit, Decimal('20.50'))
+        self.assertFalse(entries[0].is_posted)
+        self.assertEqual(JournalEntryDetail.objects.filter(journal_entry=entries[0]).count(), 2)
+
+    def test_jsonl_import(self):
+        result = import_journal_file(io.StringIO(JSONL_FILE), 'jsonl')
+
+        self.assertEqual(result.entry_count, 1)
+        self.assertEqual(result.rejected_count, 1)
+        self.assertEqual(JournalEntryHeader.objects.get().total_credit, Decimal('75.00'))
+
+    def test_out_of_range_amounts_and_non_text_fields_are_row_errors(self):
+        lines = '\n'.join(json.dumps({'entry': key, 'entry_date': '2025-04-01', **fields, 'lines': [
+            {'account': '1000', 'debit': debit, **line_fields}, {'account': '4000', 'credit': debit},
+        ]}) for key, debit, fields, line_fields in [
+            ('huge', '1e40', {}, {}),
+            ('over', '10000000000000.00', {}, {}),
+            ('largest', '9999999999999.99', {}, {}),
+            ('number', '5.00', {'description': 42}, {}),
+            ('list', '5.00', {'reference': ['INV-1']}, {}),
+            ('object', '5.00', {}, {'description': {'text': 'Cash in'}}),
+            ('ok', '5.00', {'description': 'Cash sale', 'reference': None}, {}),
+        ])
+        lines += '\n' + json.dumps({'entry': 'sum', 'entry_date': '2025-04-01', 'lines': [
+            {'account': '1000', 'debit': '9999999999999.99'}, {'account': '1000', 'debit': '0.01'},
+            {'account': '4000', 'credit': '9999999999999.99'}, {'account': '4000', 'credit': '0.01'},
+        ]})
+
+        result = import_journal_file(io.StringIO(lines), 'jsonl')
+
+        self.assertEqual(result.entry_count, 2)
+        self.assertEqual([error.split(':', 1)[1].strip() for error in result.errors], [
+            "invalid amount '1e40'",
+            "invalid amount '10000000000000.00'",
+            'description must be a string, not 42',
+            "reference must be a string, not ['INV-1']",
+            "line description must be a string, not {'text': 'Cash in'}",
+            'entry total 10000000000000.00 is too large',
+        ])
+        self.assertEqual(
+            list(JournalEntryHeader.objects.order_by('total_debit').values_list('description', 'total_debit')),
+            [('Cash sale', Decimal('5.00')), ('', Decimal('9999999999999.99'))],
+        )
+
+    def test_management_command(self):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w') as journal_file:
+            journal_file.write(CSV_FILE)
+        out = io.StringIO()
+
+        call_command('import_journal_entries', path, stdout=out, stderr=io.StringIO())
+
+        self.assertIn('Imported 2 journal entries with 4 lines (2 rejected)', out.getvalue())
+
+    def test_upload_view(self):
+        self.client.force_login(get_user_model().objects.create_user(username='clerk', password='pw'))
+        upload = SimpleUploadedFile('journal.csv', CSV_FILE.encode('utf-8'), content_type='text/csv')
+
+        response = self.client.post('/gl/entries/import/', {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(JournalEntryHeader.objects.count(), 2)
+        self.assertEqual(len(response.context['import_errors']), 2)
@@ -0,0 +1,149 @@
+"""
+Tests for the General Ledger posting engine.
+"""
+
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from GL.models import (
+    Account, AccountPeriodBalance, AccountType, FinancialPeriod, FiscalYear,
+    JournalEntryDetail, JournalEntryHeader,
+)
+from GL.posting import PostingError, post_journal_entries, post_journal_entry
+
+
+class PostingEngineTests(TestCase):
+    """Posting applies journal lines to account and period balances"""
+
+    @classmethod
+    def setUpTestData(cls):
+        asset = AccountType.objects.create(name='Cash', category='ASSET', normal_balance='DEBIT')
+        revenue = AccountType.objects.create(name='Sales', category='REVENUE', normal_balance='CREDIT')
+        cls.cash = Account.objects.create(account_number='1000', account_name='Cash', account_type=asset)
+        cls.sales = Account.objects.create(account_number='4000', account_name='Sales', account_type=revenue)
+        cls.fiscal_year = FiscalYear.objects.create(
+            name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31), is_current=True
+        )
+
+    def make_entry(self, number, amount, entry_date=date(2025, 3, 15)):
+        entry = JournalEntryHeader.objects.create(
+            entry_number=number, entry_date=entry_date,
+            fiscal_year=self.fiscal_year, description='Cash sale',
+        )
+        JournalEntryDetail.objects.create(journal_entry=entry, account=self.cash, debit_amount=amount)
+        JournalEntryDetail.objects.create(journal_entry=entry, account=self.sales, credit_amount=amount)
+        return entry
+
+    def test_post_updates_account_balances(self):
+        post_journal_entry(self.make_entry('JE-0001', Decimal('150.00')))
+        post_journal_entry(self.make_entry('JE-0002', Decimal('50.25')))
+
+        self.cash.refresh_from_db()
+        self.sales.refresh_from_db()
+        self.assertEqual(self.cash.balance, Decimal('200.25'))
+        self.assertEqual(self.sales.balance, Decimal('-200.25'))
+
+    def test_post_updates_period_balances(self):
+        post_journal_entry(self.make_entry('JE-0001', Decimal('100.00')))
+        post_journal_entry(self.make_entry('JE-0002', Decimal('40.00'), entry_date=date(2025, 4, 2)))
+
+        march = AccountPeriodBalance.objects.get(account=self.cash, period_start=date(2025, 3, 1))
+        april = AccountPeriodBalance.objects.get(account=self.sales, period_start=date(2025, 4, 1))
+        self.assertEqual(march.debit_total, Decimal('100.00'))
+        self.assertEqual(march.net_change, Decimal('100.00'))
+        self.assertEqual(april.credit_total, Decimal('40.00'))
+
+    def test_balance_updates_in_batches(self):
+        entries = [
+            self.make_entry('JE-0001', Decimal('100.00')),
+            self.make_entry('JE-0002', Decimal('40.00'), entry_date=date(2025, 4, 2)),
+        ]
+        with mock.patch('GL.posting.BALANCE_BATCH_SIZE', 1):
+            post_journal_entries([entry.pk for entry in entries])
+
+        self.cash.refresh_from_db()
+        self.assertEqual(self.cash.balance, Decimal('140.00'))
+        self.assertEqual(
+            sorted(AccountPeriodBalance.objects.values_list('account_id', 'period_start', 'debit_total', 'credit_total')),
+            [(self.cash.pk, date(2025, 3, 1), Decimal('100.00'), Decimal('0.00')),
+             (self.cash.pk, date(2025, 4, 1), Decimal('40.00'), Decimal('0.00')),
+             (self.sales.pk, date(2025, 3, 1), Decimal('0.00'), Decimal('100.00')),
+             (self.sales.pk, date(2025, 4, 1), Decimal('0.00'), Decimal('40.00'))],
+        )
+
+    def test_post_sets_header_totals_and_status(self):
+        entry = post_journal_entry(self.make_entry('JE-0001', Decimal('75.00')))
+
+        self.assertTrue(entry.is_posted)
+        self.assertIsNotNone(entry.posted_date)
+        self.assertEqual(entry.total_debit, Decimal('75.00'))
+        self.assertEqual(entry.total_credit, Decimal('75.00'))
+
+    def test_post_twice_is_rejected(self):
+        entry = self.make_entry('JE-0001', Decimal('10.00'))
+        post_journal_entry(entry)
+
+        with self.assertRaises(PostingError):
+            post_journal_entry(entry)
+        self.cash.refresh_from_db()
+        self.assertEqual(self.cash.balance, Decimal('10.00'))
+
+    def test_unbalanced_entry_is_rejected(self):
+        entry = self.make_entry('JE-0001', Decimal('10.00'))
+        JournalEntryDetail.objects.create(journal_entry=entry, account=self.cash, debit_amount=Decimal('1.00'))
+
+        with self.assertRaisesMessage(PostingError, 'not balanced'):
+            post_journal_entry(entry)
+        entry.refresh_from_db()
+        self.assertFalse(entry.is_posted)
+
+
+class BatchPostingTests(PostingEngineTests):
+    """post_journal_entries posts valid drafts together and reports the rest"""
+
+    def test_batch_posts_valid_entries_and_reports_rejections(self):
+        good = [self.make_entry(f'JE-{n:04d}', Decimal('10.00')) for n in range(1, 4)]
+        april = self.make_entry('JE-0004', Decimal('5.00'), entry_date=date(2025, 4, 1))
+        unbalanced = self.make_entry('JE-0005', Decimal('7.00'))
+        JournalEntryDetail.objects.create(journal_entry=unbalanced, account=self.sales, credit_amount=Decimal('1.00'))
+        posted = post_journal_entry(self.make_entry('JE-0006', Decimal('2.00')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            results = post_journal_entries([entry.pk for entry in [*good, april, unbalanced, posted]])
+
+        self.assertEqual([result['posted'] for result in results], [True, True, True, True, False, False])
+        self.assertIn('Not balanced', results[4]['error'])
+        self.assertEqual(results[5]['error'], 'Already posted')
+        self.cash.refresh_from_db()
+        self.assertEqual(self.cash.balance, Decimal('37.00'))
+        march = AccountPeriodBalance.objects.get(account=self.sales, period_start=date(2025, 3, 1))
+        self.assertEqual(march.credit_total, Decimal('32.00'))
+        self.assertEqual(JournalEntryHeader.objects.filter(is_posted=True).count(), 5)
+        unbalanced.refresh_from_db()
+        self.assertFalse(unbalanced.is_posted)
+
+    def test_batch_validates_in_constant_queries(self):
+        entries = [self.make_entry(f'JE-{n:04d}', Decimal('1.00')) for n in range(1, 21)]
+        with self.assertNumQueries(14):
+            post_journal_entries([entry.pk for entry in entries[:2]])
+        # Nine times the entries; only the period row inserts are no longer needed
+        with self.assertNumQueries(13):
+            post_journal_entries([entry.pk for entry in entries[2:]])
+
+    def test_batch_rejects_closed_period_and_missing_entries(self):
+        FinancialPeriod.objects.create(
+            fiscal_year=self.fiscal_year, period_type='MONTHLY', period_number=3,
+            start_date=date(2025, 3, 1), end_date=date(2025, 3, 31), is_closed=True,
+        )
+        entry = self.make_entry('JE-0001', Decimal('10.00'))
+        entry_id = entry.pk
+        entry.delete()
+        closed = self.make_entry('JE-0002', Decimal('10.00'))
+
+        results = post_journal_entries([entry_id, closed.pk])
+
+        self.assertEqual([result['error'] for result in results], ['Journal entry not found', 'Dated on or before 2025-03-31, the end of a closed period'])
+        self.assertFalse(AccountPeriodBalance.objects.exists())
@@ -0,0 +1,251 @@
+"""
+Tests for bank statement imports and reconciliation matching.
+"""
+
+import io
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from GL.models import (
+    Account, AccountType, BankStatementLine, FiscalYear, JournalEntryDetail, JournalEntryHeader,
+)
+from GL.posting import post_journal_entry
+from GL import reconciliation
+from GL.reconciliation import (
+    BankReconciliationError, MatchCandidates, import_bank_statement, match_by_amount_and_date, match_by_reference,
+    match_manually, reconcile_account, similarity, unmatch,
+)
+
+CSV_STATEMENT = """date,amount,description,reference,id
+2025-03-03,100.00,Card sale,,T1
+2025-03-05,-40.00,Office rent,RENT-MAR,T2
+2025-03-05,not money,Broken row,,T3
+2025-03-20,55.00,Unknown deposit,,T4
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+DATA:OFXSGML
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20250310120000[-5:EST]
+<TRNAMT>250.00
+<FITID>OFX-1
+<NAME>ACME &amp; SONS
+<MEMO>Payment INV-0042
+</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250311<TRNAMT>-12.50<FITID>OFX-2<MEMO>Bank fee</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class BankReconciliationTests(TestCase):
+    """Bank lines are imported once and matched to posted cash lines"""
+
+    @classmethod
+    def setUpTestData(cls):
+        asset = AccountType.objects.create(name='Cash', category='ASSET', normal_balance='DEBIT')
+        revenue = AccountType.objects.create(name='Sales', category='REVENUE', normal_balance='CREDIT')
+        cls.cash = Account.objects.create(account_number='1000', account_name='Cash', account_type=asset)
+        cls.sales = Account.objects.create(account_number='4000', account_name='Sales', account_type=revenue)
+        cls.fiscal_year = FiscalYear.objects.create(name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+
+    def entry(self, entry_date, amount, reference='', posted=True):
+        """A cash receipt (positive amount) or payment (negative amount)"""
+        entry = JournalEntryHeader.objects.create(
+            entry_number=f'JE-{JournalEntryHeader.objects.count() + 1:04d}', entry_date=entry_date,
+            fiscal_year=self.fiscal_year, description='Cash movement', reference=reference,
+        )
+        amount = Decimal(amount)
+        cash = JournalEntryDetail.objects.create(
+            journal_entry=entry, account=self.cash,
+            debit_amount=max(amount, 0), credit_amount=max(-amount, 0),
+        )
+        JournalEntryDetail.objects.create(
+            journal_entry=entry, account=self.sales,
+            debit_amount=max(-amount, 0), credit_amount=max(amount, 0),
+        )
+        if posted:
+            post_journal_entry(entry)
+        return cash
+
+    def bank_line(self, transaction_id):
+        return BankStatementLine.objects.get(transaction_id=transaction_id)
+
+    def test_csv_import_skips_invalid_and_already_imported_rows(self):
+        result = import_bank_statement(self.cash, io.StringIO(CSV_STATEMENT), 'csv', source_name='march.csv')
+
+        self.assertEqual((result.line_count, result.duplicate_count, result.rejected_count), (3, 0, 1))
+        self.assertIn("invalid amount 'not money'", result.errors[0])
+        self.assertEqual(self.bank_line('T2').amount, Decimal('-40.00'))
+        self.assertEqual(result.statement.line_count, 3)
+
+        again = import_bank_statement(self.cash, io.StringIO(CSV_STATEMENT), 'csv', chunk_size=2)
+        self.assertEqual((again.line_count, again.duplicate_count), (0, 3))
+        self.assertEqual(BankStatementLine.objects.count(), 3)
+
+    def test_csv_rows_without_ids_are_identified_by_content(self):
+        statement = 'date,amount,description\n2025-03-03,5.00,Coffee\n2025-03-03,5.00,Coffee\n'
+
+        self.assertEqual(import_bank_statement(self.cash, io.StringIO(statement)).line_count, 2)
+        self.assertEqual(import_bank_statement(self.cash, io.StringIO(statement)).duplicate_count, 2)
+
+    def test_ofx_import(self):
+        result = import_bank_statement(self.cash, io.StringIO(OFX_STATEMENT), 'ofx')
+
+        self.assertEqual(result.line_count, 2)
+        line = self.bank_line('OFX-1')
+        self.assertEqual(line.transaction_date, date(2025, 3, 10))
+        self.assertEqual(line.amount, Decimal('250.00'))
+        self.assertEqual(line.description, 'ACME & SONS Payment INV-0042')
+        fee = self.bank_line('OFX-2')
+        self.assertEqual((fee.amount, fee.description), (Decimal('-12.50'), 'Bank fee'))
+
+    def test_unsupported_format(self):
+        with self.assertRaisesMessage(BankReconciliationError, 'Unsupported statement format'):
+            import_bank_statement(self.cash, io.StringIO(''), 'qif')
+
+    def test_matches_by_amount_within_the_date_window(self):
+        sale = self.entry(date(2025, 3, 2), '100.00')
+        rent = self.entry(date(2025, 3, 5), '-40.00')
+        self.entry(date(2025, 3, 20), '55.00', posted=False)
+        import_bank_statement(self.cash, io.StringIO(CSV_STATEMENT))
+
+        result = reconcile_account(self.cash)
+
+        self.assertEqual(result, {'matched_by_amount': 2, 'matched_by_reference': 0, 'unmatched': 1})
+        self.assertEqual(self.bank_line('T1').matched_line, sale)
+        self.assertEqual(self.bank_line('T2').match_method, 'AMOUNT_DATE')
+        self.assertEqual(rent.bank_match, self.bank_line('T2'))
+        self.assertIsNone(self.bank_line('T4').matched_line)
+
+    def test_closest_date_wins_and_ties_fall_back_to_references(self):
+        near, far = self.entry(date(2025, 3, 3), '100.00'), self.entry(date(2025, 3, 1), '100.00')
+        acme = self.entry(date(2025, 3, 9), '250.00', reference='INV-0042')
+        other = self.entry(date(2025, 3, 11), '250.00', reference='INV-0099')
+        import_bank_statement(self.cash, io.StringIO(CSV_STATEMENT))
+        import_bank_statement(self.cash, io.StringIO(OFX_STATEMENT), 'ofx')
+
+        result = reconcile_account(self.cash)
+
+        self.assertEqual(result['matched_by_amount'], 1)
+        self.assertEqual(result['matched_by_reference'], 1)
+        self.assertEqual(self.bank_line('T1').matched_line, near)
+        self.assertEqual(self.bank_line('OFX-1').matched_line, acme)
+        self.assertEqual(self.bank_line('OFX-1').match_method, 'REFERENCE')
+        self.assertFalse(BankStatementLine.objects.filter(matched_line__in=[far, other]).exists())
+
+    def test_reruns_are_incremental(self):
+        self.entry(date(2025, 3, 3), '100.00')
+        import_bank_statement(self.cash, io.StringIO(CSV_STATEMENT))
+        reconcile_account(self.cash)
+        deposit = self.entry(date(2025, 3, 21), '55.00')
+
+        result = reconcile_account(self.cash)
+
+        self.assertEqual(result, {'matched_by_amount': 1, 'matched_by_reference': 0, 'unmatched': 1})
+        self.assertEqual(self.bank_line('T4').matched_line, deposit)
+        self.assertEqual(BankStatementLine.objects.filter(matched_line__isnull=False).count(), 2)
+
+    def test_manual_match_and_unmatch(self):
+        import_bank_statement(self.cash, io.StringIO(CSV_STATEMENT))
+        late = self.entry(date(2025, 4, 30), '55.00')
+        wrong_amount = self.entry(date(2025, 3, 20), '56.00')
+
+        with self.assertRaisesMessage(BankReconciliationError, 'amounts differ'):
+            match_manually(self.bank_line('T4'), wrong_amount)
+        match_manually(self.bank_line('T4'), late)
+        self.assertEqual(self.bank_line('T4').match_method, 'MANUAL')
+        with self.assertRaisesMessage(BankReconciliationError, 'already matched'):
+            match_manually(self.bank_line('T4'), late)
+
+        unmatch(self.bank_line('T4'))
+        self.assertIsNone(self.bank_line('T4').matched_line)
+
+    def test_similarity(self):
+        self.assertEqual(similarity('Payment INV-0042', 'inv0042'), 1.0)
+        self.assertGreater(similarity('ACME SONS LTD', 'ACME & SONS'), 0.6)
+        self.assertLess(similarity('RENT', 'PAYROLL'), 0.6)
+        self.assertEqual(similarity('', 'INV-1'), 0.0)
+
+    def test_matching_runs_in_constant_queries(self):
+        entries = JournalEntryHeader.objects.bulk_create([
+            JournalEntryHeader(
+                entry_number=f'JE-{number:05d}', entry_date=date(2025, 1, 1) + timedelta(days=number % 300),
+                fiscal_year=self.fiscal_year, description='Receipt', is_posted=True,
+            )
+            for number in range(1500)
+        ])
+        JournalEntryDetail.objects.bulk_create([
+            JournalEntryDetail(journal_entry=entry, account=self.cash, debit_amount=Decimal(number + 1))
+            for number, entry in enumerate(entries)
+        ])
+        statement = 'date,amount,id\n' + ''.join(
+            f'{entry.entry_date + timedelta(days=1)},{number + 1}.00,B{number}\n' for number, entry in enumerate(entries)
+        )
+        import_bank_statement(self.cash, io.StringIO(statement))
+
+        with CaptureQueriesContext(connection) as queries:
+            result = reconcile_account(self.cash)
+
+        self.assertEqual(result['matched_by_amount'], 1500)
+        self.assertLess(len(queries), 20)
+
+    def test_commands(self):
+        self.entry(date(2025, 3, 3), '100.00')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'march.csv')
+            with open(path, 'w') as statement:
+                statement.write(CSV_STATEMENT)
+            out, err = io.StringIO(), io.StringIO()
+            call_command('import_bank_statement', '1000', path, stdout=out, stderr=err)
+
+        self.assertIn('Imported 3 bank transactions for 1000 (0 already imported, 1 rejected)', out.getvalue())
+        self.assertIn('invalid amount', err.getvalue())
+
+        out = io.StringIO()
+        call_command('reconcile_bank_account', '1000', '--to', '2025-03-31', stdout=out)
+        self.assertIn('Matched 1 by amount and date, 0 by reference; 2 bank transactions remain unmatched', out.getvalue())
+
+
+class BankAmountTests(SimpleTestCase):
+
+    def test_amounts_the_column_cannot_hold_are_rejected(self):
+        self.assertEqual(reconciliation.parse_bank_amount('-1,234.50'), Decimal('-1234.50'))
+        self.assertEqual(reconciliation.parse_bank_amount('-9999999999999.99'), Decimal('-9999999999999.99'))
+        for value in ['1e40', '-1e40', '10000000000000.00', '0.001', '0', 'NaN', '', None]:
+            with self.subTest(value=value), self.assertRaisesMessage(BankReconciliationError, 'invalid amount'):
+                reconciliation.parse_bank_amount(value)
+
+
+class MatchingScaleTests(SimpleTestCase):
+    """Repeated amounts keep both matching passes linear"""
+
+    def test_skewed_amounts_compare_a_bounded_number_of_references(self):
+        journal, bank = [], []
+        for number in range(6000):
+            day = date(2025, 1, 1) + timedelta(days=number % 90)
+            # A third of the lines share five amounts, like fees and subscriptions
+            cents = 1000 * (number % 5 + 1) if number % 3 == 0 else 100000 + number
+            reference = f'SUBSCRIPTION {number:06d}'
+            journal.append((number, cents, day, [reference, 'Receipt']))
+            bank.append((f'B{number}', day + timedelta(days=number % 2), cents, [reference]))
+        candidates = MatchCandidates(journal)
+
+        by_amount = match_by_amount_and_date(bank, candidates, timedelta(days=3))
+        remaining = [line for line in bank if line[0] not in by_amount]
+        with mock.patch.object(reconciliation, 'similarity', wraps=similarity) as compared:
+            by_reference = match_by_reference(remaining, candidates, timedelta(days=10))
+
+        self.assertEqual(len(by_amount) + len(by_reference), 6000)
+        self.assertEqual({**by_amount, **by_reference}, {f'B{number}': number for number in range(6000)})
+        self.assertGreater(len(remaining), 1000)
+        self.assertLessEqual(compared.call_count, 2 * reconciliation.REFERENCE_CANDIDATES * len(remaining))
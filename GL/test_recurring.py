@@ -0,0 +1,164 @@
+"""
+Tests for recurring journal entry generation.
+"""
+
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from default.jobs import submit_job
+from easyerp import celery_app
+from GL.models import (
+    Account, AccountType, FinancialPeriod, FiscalYear, JournalEntryHeader,
+    RecurringEntryTemplate, RecurringEntryTemplateLine,
+)
+from GL.recurring import due_occurrences, generate_recurring_entries
+
+
+class RecurringEntryTests(TestCase):
+    """Due occurrences become AUTO entries exactly once per template and period"""
+
+    @classmethod
+    def setUpTestData(cls):
+        expense = AccountType.objects.create(name='Rent', category='EXPENSE', normal_balance='DEBIT')
+        liability = AccountType.objects.create(name='Accruals', category='LIABILITY', normal_balance='CREDIT')
+        cls.rent = Account.objects.create(account_number='6100', account_name='Rent', account_type=expense)
+        cls.accrued = Account.objects.create(account_number='2100', account_name='Accrued', account_type=liability)
+        cls.fiscal_year = FiscalYear.objects.create(name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        cls.template = cls.make_template('Rent accrual', day_of_month=31)
+
+    @classmethod
+    def make_template(cls, name, amount='1200.00', **fields):
+        fields.setdefault('start_date', date(2025, 1, 1))
+        template = RecurringEntryTemplate.objects.create(name=name, description=name, **fields)
+        RecurringEntryTemplateLine.objects.create(template=template, account=cls.rent, debit_amount=Decimal(amount))
+        RecurringEntryTemplateLine.objects.create(template=template, account=cls.accrued, credit_amount=Decimal(amount))
+        return template
+
+    def test_occurrences_clamp_to_month_end(self):
+        occurrences = list(due_occurrences(self.template, date(2025, 3, 31)))
+
+        self.assertEqual([entry_date for _, entry_date in occurrences], [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)])
+
+    def test_quarterly_occurrences_respect_start_and_end(self):
+        template = RecurringEntryTemplate(
+            frequency='QUARTERLY', day_of_month=15, start_date=date(2025, 2, 20), end_date=date(2025, 9, 1),
+        )
+
+        self.assertEqual(
+            [period for period, _ in due_occurrences(template, date(2025, 12, 31))],
+            [date(2025, 5, 1), date(2025, 8, 1)],
+        )
+
+    def test_generation_is_idempotent(self):
+        first = generate_recurring_entries(date(2025, 3, 31))
+        again = generate_recurring_entries(date(2025, 3, 31))
+        later = generate_recurring_entries(date(2025, 4, 30))
+
+        self.assertEqual((first['created'], again['created'], later['created']), (3, 0, 1))
+        entries = JournalEntryHeader.objects.filter(recurring_template=self.template).order_by('entry_date')
+        self.assertEqual([entry.entry_number for entry in entries], ['JE-0001', 'JE-0002', 'JE-0003', 'JE-0004'])
+        self.assertTrue(all(entry.entry_type == 'AUTO' and not entry.is_posted for entry in entries))
+        self.assertEqual(entries[0].lines.count(), 2)
+        self.assertEqual(entries[0].total_debit, Decimal('1200.00'))
+
+    def test_bulk_generation_uses_constant_queries(self):
+        for number in range(30):
+            self.make_template(f'Allocation {number:02d}', amount='10.00', day_of_month=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = generate_recurring_entries(date(2025, 2, 28))
+
+        self.assertEqual(result['created'], 62)
+        # Lookups, one sequence allocation and batched inserts; nothing per entry
+        self.assertLess(len(queries), 20)
+
+    def test_auto_post_and_closed_periods(self):
+        self.make_template('Depreciation', amount='50.00', day_of_month=1, auto_post=True)
+        FinancialPeriod.objects.create(
+            fiscal_year=self.fiscal_year, period_type='MONTHLY', period_number=1,
+            start_date=date(2025, 1, 1), end_date=date(2025, 1, 31), is_closed=True,
+        )
+
+        result = generate_recurring_entries(date(2025, 2, 28))
+
+        self.assertEqual((result['created'], result['posted']), (2, 1))
+        self.assertEqual({skipped['reason'] for skipped in result['skipped']}, {'Dated on or before 2025-01-31, the end of a closed period'})
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.balance, Decimal('50.00'))
+
+    def test_auto_post_failures_are_reported(self):
+        template = self.make_template('Depreciation', amount='50.00', day_of_month=1, auto_post=True)
+        # Written around the admin, which refuses templates that do not balance
+        RecurringEntryTemplateLine.objects.create(template=template, account=self.rent, debit_amount=Decimal('1.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job, _ = submit_job('gl.recurring_entries', {'as_of': '2025-01-31'})
+        job.refresh_from_db()
+        out = StringIO()
+        call_command('generate_recurring_entries', '--as-of', '2025-02-28', stdout=out)
+
+        self.assertEqual((job.result['created'], job.result['posted']), (2, 0))
+        [failed] = job.result['failed']
+        self.assertEqual((failed['template_id'], failed['template']), (template.pk, 'Depreciation'))
+        self.assertTrue(failed['error'].startswith('Not balanced: debits 51'))
+        self.assertFalse(JournalEntryHeader.objects.get(entry_number=failed['entry_number']).is_posted)
+        self.assertIn('Not posted JE-0003 (Depreciation): Not balanced', out.getvalue())
+
+    def test_admin_refuses_unbalanced_templates(self):
+        self.client.force_login(get_user_model().objects.create_superuser(username='admin', password='pw'))
+        form = {
+            'name': 'Insurance', 'description': 'Insurance', 'frequency': 'MONTHLY', 'day_of_month': 1,
+            'start_date': '2025-01-01', 'is_active': 'on',
+            'lines-TOTAL_FORMS': 2, 'lines-INITIAL_FORMS': 0, 'lines-MIN_NUM_FORMS': 0, 'lines-MAX_NUM_FORMS': 1000,
+            'lines-0-account': self.rent.pk, 'lines-0-debit_amount': '100.00', 'lines-0-credit_amount': '0',
+            'lines-1-account': self.accrued.pk, 'lines-1-debit_amount': '0', 'lines-1-credit_amount': '90.00',
+        }
+
+        refused = self.client.post('/admin/GL/recurringentrytemplate/add/', form)
+        saved = self.client.post('/admin/GL/recurringentrytemplate/add/', {**form, 'lines-1-credit_amount': '100.00'})
+
+        self.assertContains(refused, 'Template does not balance: debits 100.00 != credits 90.00')
+        self.assertEqual(saved.status_code, 302)
+        self.assertEqual(RecurringEntryTemplate.objects.get(name='Insurance').lines.count(), 2)
+
+    def test_beat_job_and_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job, _ = submit_job('gl.recurring_entries', {'as_of': '2025-01-31'})
+        job.refresh_from_db()
+        out = StringIO()
+        call_command('generate_recurring_entries', '--as-of', '2025-02-28', stdout=out)
+
+        self.assertEqual(job.result['created'], 1)
+        self.assertIn('Created 1 recurring journal entries', out.getvalue())
+
+
+class BeatScheduleTests(SimpleTestCase):
+    """Beat runs the generator from CELERY_BEAT_SCHEDULE"""
+
+    def test_worker_uses_the_default_scheduler(self):
+        command = (settings.BASE_DIR / 'celery_start').read_text()
+
+        # The database scheduler would ignore CELERY_BEAT_SCHEDULE and needs django_celery_beat installed
+        self.assertNotIn('--scheduler', command)
+        self.assertNotIn(' -S ', command)
+
+    @skipIf(celery_app is None, 'Celery is not installed')
+    def test_schedule_loads(self):
+        from celery.beat import Scheduler
+
+        schedule = Scheduler(app=celery_app).schedule
+        celery_app.loader.import_default_modules()
+
+        entry = schedule['gl-recurring-entries']
+        self.assertEqual(entry.task, 'GL.generate_recurring_entries')
+        self.assertIn(entry.task, celery_app.tasks)
+        self.assertEqual(entry.schedule.run_every.total_seconds(), 3600)
@@ -0,0 +1,105 @@
+"""
+Tests for the ledger-versioned report cache.
+"""
+
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import F
+
+from GL.closing import close_period
+from GL.dashboard import ledger_version
+from GL.models import FinancialPeriod, LedgerVersion
+from GL.report_cache import REPORT_CACHE, cached_report, report_cache_key
+from GL.test_reports import ReportTestCase
+
+
+class ReportCacheTests(ReportTestCase):
+    """Reports are reused until a posting or period close advances the watermark"""
+
+    def setUp(self):
+        super().setUp()
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return {'builds': self.builds}
+
+    def test_hit_until_watermark_advances(self):
+        params = {'as_of_date': date(2025, 12, 31)}
+        self.assertEqual(cached_report('balance_sheet', params, self.build), {'builds': 1})
+        self.assertEqual(cached_report('balance_sheet', params, self.build), {'builds': 1})
+        self.assertEqual(cached_report('balance_sheet', {'as_of_date': date(2025, 6, 30)}, self.build), {'builds': 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post(date(2025, 4, 1), [(self.cash, '10.00', '0'), (self.sales, '0', '10.00')])
+
+        self.assertEqual(cached_report('balance_sheet', params, self.build), {'builds': 3})
+
+    def test_period_close_advances_watermark(self):
+        period = FinancialPeriod.objects.create(
+            fiscal_year=self.fiscal_year, period_type='MONTHLY', period_number=1,
+            start_date=date(2025, 1, 1), end_date=date(2025, 1, 31),
+        )
+        version = ledger_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            close_period(period)
+
+        self.assertGreater(ledger_version(), version)
+
+    def test_chart_changes_advance_watermark(self):
+        version = ledger_version()
+
+        self.cash.cash_flow_activity = 'OPERATING'
+        self.cash.save()
+        self.assertGreater(ledger_version(), version)
+
+        version = ledger_version()
+        self.cash.account_type.cash_flow_activity = 'INVESTING'
+        self.cash.account_type.save()
+        self.assertGreater(ledger_version(), version)
+
+    def test_watermark_is_shared_through_the_database(self):
+        params = {'as_of_date': date(2025, 12, 31)}
+        cached_report('balance_sheet', params, self.build)
+
+        # As from another process: only the database row changes
+        LedgerVersion.objects.update(version=F('version') + 1)
+
+        self.assertEqual(cached_report('balance_sheet', params, self.build), {'builds': 2})
+
+    def test_key_ignores_parameter_order(self):
+        self.assertEqual(
+            report_cache_key('income_statement', {'date_from': date(2025, 1, 1), 'date_to': date(2025, 3, 31)}, 1),
+            report_cache_key('income_statement', {'date_to': date(2025, 3, 31), 'date_from': date(2025, 1, 1)}, 1),
+        )
+        self.assertNotEqual(
+            report_cache_key('income_statement', {'show_zero': True}, 1),
+            report_cache_key('income_statement', {'show_zero': True}, 2),
+        )
+
+    def test_view_serves_cached_balance_sheet(self):
+        self.client.force_login(get_user_model().objects.create_user(username='cfo', password='pw'))
+        self.client.get('/gl/reports/balance-sheet/', {'as_of_date': '2025-12-31'})
+
+        with self.assertNumQueries(3):  # session, user and ledger version only
+            response = self.client.get('/gl/reports/balance-sheet/', {'as_of_date': '2025-12-31', 'format': 'json'})
+        self.assertEqual(response.json()['report'], 'balance_sheet')
+
+    def test_least_recently_used_reports_are_evicted(self):
+        bounded = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'bounded-reports',
+            'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3},
+        }
+        with self.settings(CACHES={'default': settings.CACHES['default'], REPORT_CACHE: bounded}):
+            for day in (1, 2, 3):
+                cached_report('trial_balance', {'day': day}, self.build)
+            cached_report('trial_balance', {'day': 1}, self.build)
+            cached_report('trial_balance', {'day': 4}, self.build)
+
+            self.assertIsNotNone(caches[REPORT_CACHE].get(report_cache_key('trial_balance', {'day': 1})))
+            self.assertIsNone(caches[REPORT_CACHE].get(report_cache_key('trial_balance', {'day': 2})))
@@ -0,0 +1,255 @@
+"""
+Tests for the General Ledger report engines.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+
+from GL import reports
+from GL.models import (
+    Account, AccountType, FiscalYear, JournalEntryDetail, JournalEntryHeader,
+)
+from GL.posting import post_journal_entry
+
+
+class ReportTestCase(TestCase):
+    """Small chart of accounts with a few posted entries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        types = {
+            category: AccountType.objects.create(name=category.title(), category=category, normal_balance=normal)
+            for category, normal in [
+                ('ASSET', 'DEBIT'), ('LIABILITY', 'CREDIT'), ('EQUITY', 'CREDIT'),
+                ('REVENUE', 'CREDIT'), ('EXPENSE', 'DEBIT'),
+            ]
+        }
+        cls.cash = Account.objects.create(account_number='1000', account_name='Cash', account_type=types['ASSET'])
+        cls.payable = Account.objects.create(account_number='2000', account_name='Payables', account_type=types['LIABILITY'])
+        cls.capital = Account.objects.create(account_number='3000', account_name='Capital', account_type=types['EQUITY'])
+        cls.sales = Account.objects.create(account_number='4000', account_name='Sales', account_type=types['REVENUE'])
+        cls.rent = Account.objects.create(account_number='6100', account_name='Rent', account_type=types['EXPENSE'])
+        cls.fiscal_year = FiscalYear.objects.create(
+            name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31), is_current=True
+        )
+
+        cls.post(date(2025, 1, 2), [(cls.cash, '1000.00', '0'), (cls.capital, '0', '1000.00')])
+        cls.post(date(2025, 2, 10), [(cls.cash, '400.00', '0'), (cls.sales, '0', '400.00')])
+        cls.post(date(2025, 3, 1), [(cls.rent, '150.00', '0'), (cls.payable, '0', '150.00')])
+
+    @classmethod
+    def post(cls, entry_date, lines):
+        entry = JournalEntryHeader.objects.create(
+            entry_number=f'JE-{JournalEntryHeader.objects.count() + 1:04d}',
+            entry_date=entry_date, fiscal_year=cls.fiscal_year, description='Test entry',
+        )
+        for account, debit, credit in lines:
+            JournalEntryDetail.objects.create(
+                journal_entry=entry, account=account,
+                debit_amount=Decimal(debit), credit_amount=Decimal(credit),
+            )
+        return post_journal_entry(entry)
+
+    def setUp(self):
+        # Reports are cached per ledger version, which each test rolls back
+        caches['reports'].clear()
+
+
+class TrialBalanceTests(ReportTestCase):
+
+    def test_trial_balance_is_balanced(self):
+        report = reports.trial_balance(date(2025, 12, 31))
+
+        self.assertTrue(report['balanced'])
+        self.assertEqual(report['total_debit'], Decimal('1550.00'))
+        self.assertEqual(report['total_credit'], Decimal('1550.00'))
+
+    def test_trial_balance_honors_as_of_date(self):
+        report = reports.trial_balance(date(2025, 1, 31))
+
+        rows = [row for section in report['sections'] for row in section['rows']]
+        self.assertEqual([row['account_number'] for row in rows], ['1000', '3000'])
+
+    def test_trial_balance_show_zero(self):
+        report = reports.trial_balance(date(2025, 1, 31), show_zero=True)
+
+        rows = [row for section in report['sections'] for row in section['rows']]
+        self.assertEqual(len(rows), 5)
+
+    def test_trial_balance_query_count_is_constant(self):
+        # Accounts, the snapshot lookup and the monthly balances; whole months never read the lines
+        with self.assertNumQueries(3):
+            reports.trial_balance(date(2025, 12, 31))
+
+    def test_trial_balance_view(self):
+        user = get_user_model().objects.create_user(username='controller', password='pw')
+        self.client.force_login(user)
+
+        response = self.client.get('/gl/reports/trial-balance/', {'as_of_date': '2025-12-31'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Capital')
+        self.assertTrue(response.context['balanced'])
+
+
+class FinancialStatementTests(ReportTestCase):
+
+    def test_balance_sheet_balances(self):
+        report = reports.balance_sheet(date(2025, 12, 31))
+
+        self.assertEqual(report['total_assets'], Decimal('1400.00'))
+        self.assertEqual(report['total_liabilities'], Decimal('150.00'))
+        self.assertEqual(report['net_income'], Decimal('250.00'))
+        self.assertEqual(report['total_equity'], Decimal('1250.00'))
+        self.assertTrue(report['balanced'])
+
+    def test_income_statement_for_date_range(self):
+        report = reports.income_statement(date(2025, 2, 1), date(2025, 3, 31))
+
+        self.assertEqual(report['total_revenue'], Decimal('400.00'))
+        self.assertEqual(report['total_expenses'], Decimal('150.00'))
+        self.assertEqual(report['net_income'], Decimal('250.00'))
+        revenue_row = report['sections'][0]['groups'][0]['rows'][0]
+        self.assertEqual(revenue_row['amount'], Decimal('400.00'))
+
+    def test_header_accounts_show_subtree_rollup(self):
+        header = Account.objects.create(
+            account_number='1', account_name='Total Assets',
+            account_type=self.cash.account_type, is_header=True,
+        )
+        self.cash.parent_account = header
+        self.cash.save()
+
+        report = reports.balance_sheet(date(2025, 12, 31))
+
+        rows = {row['account_number']: row['amount'] for row in report['sections'][0]['groups'][0]['rows']}
+        self.assertEqual(rows['1'], Decimal('1400.00'))
+        self.assertEqual(report['total_assets'], Decimal('1400.00'))
+
+    def test_statement_query_count_is_constant(self):
+        with self.assertNumQueries(4):
+            reports.balance_sheet(date(2025, 12, 31))
+
+    def test_statement_exports(self):
+        user = get_user_model().objects.create_user(username='controller', password='pw')
+        self.client.force_login(user)
+
+        response = self.client.get('/gl/reports/balance-sheet/', {'as_of_date': '2025-12-31', 'format': 'json'})
+        self.assertEqual(response.json()['total_assets'], '1400.00')
+
+        response = self.client.get('/gl/reports/income-statement/', {
+            'date_from': '2025-01-01', 'date_to': '2025-12-31', 'format': 'csv',
+        })
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('Net Income,250.00', response.content.decode())
+
+        response = self.client.get('/gl/reports/balance-sheet/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/gl/reports/income-statement/')
+        self.assertEqual(response.status_code, 200)
+
+
+class GeneralLedgerTests(ReportTestCase):
+
+    def test_running_balance(self):
+        report = reports.general_ledger(self.cash, date(2025, 1, 1), date(2025, 12, 31))
+
+        self.assertEqual([row['balance'] for row in report['rows']], [Decimal('1000.00'), Decimal('1400.00')])
+        self.assertEqual(report['balance_forward'], Decimal('0'))
+        self.assertIsNone(report['next_cursor'])
+
+    def test_opening_balance_before_date_from(self):
+        report = reports.general_ledger(self.cash, date(2025, 2, 1), date(2025, 12, 31))
+
+        self.assertEqual(report['balance_forward'], Decimal('1000.00'))
+        self.assertEqual(report['closing_balance'], Decimal('1400.00'))
+
+    def test_keyset_pages_carry_balance(self):
+        self.post(date(2025, 2, 10), [(self.cash, '25.00', '0'), (self.sales, '0', '25.00')])
+        self.post(date(2025, 4, 1), [(self.rent, '50.00', '0'), (self.cash, '0', '50.00')])
+
+        first = reports.general_ledger(self.cash, date(2025, 1, 1), date(2025, 12, 31), page_size=2)
+        second = reports.general_ledger(self.cash, date(2025, 1, 1), date(2025, 12, 31), cursor=first['next_cursor'], page_size=2)
+
+        first_ids = {row['line_id'] for row in first['rows']}
+        self.assertFalse(first_ids & {row['line_id'] for row in second['rows']})
+        self.assertEqual(second['balance_forward'], Decimal('1400.00'))
+        self.assertEqual([row['balance'] for row in second['rows']], [Decimal('1425.00'), Decimal('1375.00')])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            reports.general_ledger(self.cash, date(2025, 1, 1), date(2025, 12, 31), cursor='garbage')
+
+    def test_csv_export_streams(self):
+        self.client.force_login(get_user_model().objects.create_user(username='auditor', password='pw'))
+
+        response = self.client.get('/gl/reports/general-ledger/', {
+            'date_from': '2025-02-01', 'date_to': '2025-12-31', 'format': 'csv',
+        })
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ','.join(reports.LEDGER_COLUMNS))
+        self.assertIn('1000,Cash,2025-02-01,,,Opening balance,,,1000.00', lines)
+        self.assertIn('1000,Cash,2025-02-10,JE-0002,,,400.00,0.00,1400.00', lines)
+
+    def test_report_page(self):
+        self.client.force_login(get_user_model().objects.create_user(username='auditor', password='pw'))
+
+        response = self.client.get('/gl/reports/general-ledger/', {'account': '1000', 'date_from': '2025-01-01'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['report']['rows']), 2)
+
+
+class CashFlowTests(ReportTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Account.objects.filter(pk=cls.cash.pk).update(cash_flow_activity='CASH')
+
+    def test_monthly_indirect_cash_flow(self):
+        report = reports.cash_flow_statement(date(2025, 1, 1), date(2025, 3, 31))
+
+        operating, investing, financing = report['sections']
+        self.assertEqual([period['label'] for period in report['periods']], ['Jan 2025', 'Feb 2025', 'Mar 2025'])
+        self.assertEqual(report['net_income'], [Decimal('0'), Decimal('400.00'), Decimal('-150.00')])
+        self.assertEqual(operating['rows'][0]['account_type'], 'Liability')
+        self.assertEqual(operating['totals'], [Decimal('0'), Decimal('400.00'), Decimal('0.00')])
+        self.assertEqual(financing['totals'], [Decimal('1000.00'), Decimal('0'), Decimal('0')])
+        self.assertEqual(investing['rows'], [])
+        self.assertEqual(report['closing_cash'], [Decimal('1000.00'), Decimal('1400.00'), Decimal('1400.00')])
+        self.assertTrue(report['balanced'])
+
+    def test_partial_months_and_opening_cash(self):
+        report = reports.cash_flow_statement(date(2025, 2, 15), date(2025, 3, 10))
+
+        self.assertEqual(report['periods'][0]['start'], date(2025, 2, 15))
+        self.assertEqual(report['periods'][-1]['end'], date(2025, 3, 10))
+        self.assertEqual(report['opening_cash'][0], Decimal('1400.00'))
+        self.assertEqual(report['net_change'], [Decimal('0'), Decimal('0.00')])
+
+    def test_query_count_does_not_grow_with_months(self):
+        # Opening balances and monthly activity each look up the archive boundary
+        with self.assertNumQueries(6):
+            report = reports.cash_flow_statement(date(2023, 1, 1), date(2025, 12, 31))
+        self.assertEqual(len(report['periods']), 36)
+
+    def test_cash_flow_view_exports(self):
+        self.client.force_login(get_user_model().objects.create_user(username='treasury', password='pw'))
+
+        response = self.client.get('/gl/reports/cash-flow-statement/', {
+            'date_from': '2025-01-01', 'date_to': '2025-03-31', 'format': 'csv',
+        })
+        lines = response.content.decode().splitlines()
+        self.assertEqual(lines[0], 'section,account_type,Jan 2025,Feb 2025,Mar 2025,total')
+        self.assertIn('Closing Cash,,1000.00,1400.00,1400.00,1400.00', lines)
+
+        response = self.client.get('/gl/reports/cash-flow-statement/', {'date_from': '2025-01-01', 'date_to': '2025-03-31'})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,122 @@
+"""
+Tests for indexed journal entry search.
+"""
+
+import importlib
+import io
+from datetime import date
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from GL.models import FiscalYear, JournalEntryHeader
+from GL.search import SEARCH_DOCUMENT, search_entries
+
+SEARCH_KEY_MIGRATION = importlib.import_module('GL.migrations.0014_entry_search_key')
+
+
+def search_numbers(text):
+    return [entry.entry_number for entry in search_entries(JournalEntryHeader.objects.all(), text).order_by('search_rank', 'entry_number')]
+
+
+class JournalEntrySearchTests(TestCase):
+    """The search index follows inserts, updates and deletes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        fiscal_year = FiscalYear.objects.create(name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        entries = [
+            ('JE-0001', 'Customer receipt', 'INV-2025-0001'),
+            ('JE-0002', 'Customer receipt INV-2025-0002', 'INV-2025-0002'),
+            ('JE-0003', 'Office rent', 'LEASE-7'),
+        ]
+        JournalEntryHeader.objects.bulk_create([
+            JournalEntryHeader(entry_number=number, description=description, reference=reference,
+                               entry_date=date(2025, 3, 1), fiscal_year=fiscal_year)
+            for number, description, reference in entries
+        ])
+
+    def search(self, text):
+        return search_numbers(text)
+
+    def test_substring_search_is_ranked(self):
+        self.assertEqual(self.search('inv-2025'), ['JE-0002', 'JE-0001'])
+        self.assertEqual(self.search('rent'), ['JE-0003'])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('customer 0001'), ['JE-0001'])
+
+    def test_short_terms_fall_back_to_substring_filter(self):
+        self.assertEqual(self.search('7'), ['JE-0003'])
+
+    def test_index_follows_updates_and_deletes(self):
+        entry = JournalEntryHeader.objects.get(entry_number='JE-0003')
+        entry.description = 'Warehouse lease'
+        entry.save()
+        self.assertEqual(self.search('warehouse'), ['JE-0003'])
+        self.assertEqual(self.search('office'), [])
+
+        entry.delete()
+        self.assertEqual(self.search('warehouse'), [])
+
+    def test_list_view_pages_ranked_results(self):
+        self.client.force_login(get_user_model().objects.create_user(username='clerk', password='pw'))
+
+        first = self.client.get('/gl/entries/', {'search': 'INV-2025', 'per_page': 1})
+        second = self.client.get('/gl/entries/', {'search': 'INV-2025', 'per_page': 1, 'cursor': first.context['next_cursor']})
+
+        self.assertEqual([entry.entry_number for entry in first.context['entries']], ['JE-0002'])
+        self.assertEqual([entry.entry_number for entry in second.context['entries']], ['JE-0001'])
+        self.assertIsNone(second.context['next_cursor'])
+
+    def test_rebuild_command(self):
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+
+        self.assertIn('Rebuilt', out.getvalue())
+        self.assertEqual(self.search('lease-7'), ['JE-0003'])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 index')
+class SearchIndexKeyTests(TransactionTestCase):
+    """The FTS rows follow the entry ids, not the rowids a table rebuild renumbers"""
+
+    def test_index_survives_a_table_rebuild(self):
+        fiscal_year = FiscalYear.objects.create(name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        for number, description in [('JE-0001', 'Opening stock'), ('JE-0002', 'Office rent'), ('JE-0003', 'Bank fees')]:
+            JournalEntryHeader.objects.create(
+                entry_number=number, description=description, entry_date=date(2025, 3, 1), fiscal_year=fiscal_year,
+            )
+        JournalEntryHeader.objects.filter(entry_number='JE-0001').delete()
+
+        # As when a migration alters the header table; the copy renumbers the rowids and drops the triggers
+        with connection.schema_editor() as editor:
+            editor._remake_table(JournalEntryHeader)
+            for statement in SEARCH_KEY_MIGRATION.SQLITE_CREATE[2:5]:
+                editor.execute(statement)
+
+        self.assertEqual(search_numbers('rent'), ['JE-0002'])
+        self.assertEqual(search_numbers('fees'), ['JE-0003'])
+        self.assertEqual(search_numbers('stock'), [])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL GIN indexes')
+class PostgreSQLSearchTests(JournalEntrySearchTests):
+    """The same searches through the trigram and tsvector indexes"""
+
+    def test_word_matches(self):
+        self.assertCountEqual(self.search('receipt'), ['JE-0001', 'JE-0002'])
+
+    def test_searches_use_the_gin_indexes(self):
+        conditions = [
+            (f'{SEARCH_DOCUMENT} ILIKE %s', '%rent%', 'gl_entry_search_trgm'),
+            (f"to_tsvector('simple', {SEARCH_DOCUMENT}) @@ plainto_tsquery('simple', %s)", 'rent', 'gl_entry_search_tsv'),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            for condition, param, index in conditions:
+                cursor.execute(f'EXPLAIN SELECT 1 FROM "GL_journalentryheader" WHERE {condition}', [param])
+                self.assertIn(index, '\n'.join(row[0] for row in cursor.fetchall()))
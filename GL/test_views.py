@@ -0,0 +1,197 @@
+"""
+Tests for the General Ledger list, detail and posting views.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from GL.models import Account, AccountType, FiscalYear, JournalEntryDetail, JournalEntryHeader
+
+
+class JournalEntryListTests(TestCase):
+    """The entry list pages with a keyset cursor and aggregates stats in one query"""
+
+    @classmethod
+    def setUpTestData(cls):
+        fiscal_year = FiscalYear.objects.create(name='FY', start_date=date(2000, 1, 1), end_date=date(2099, 12, 31))
+        today = date.today()
+        for number in range(5):
+            JournalEntryHeader.objects.create(
+                entry_number=f'JE-{number + 1:04d}', entry_date=today - timedelta(days=number * 40),
+                fiscal_year=fiscal_year, description=f'Entry {number + 1}',
+                total_debit=Decimal('10.00'), total_credit=Decimal('10.00'), is_posted=number % 2 == 0,
+            )
+        cls.user = get_user_model().objects.create_user(username='clerk', password='pw')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_statistics(self):
+        # Session, user, the page and one aggregate for all four statistics
+        with self.assertNumQueries(4):
+            response = self.client.get('/gl/entries/')
+
+        self.assertEqual(response.context['draft_count'], 2)
+        self.assertEqual(response.context['posted_count'], 3)
+        self.assertEqual(response.context['monthly_debits'], Decimal('10.00'))
+
+    def test_keyset_pages(self):
+        first = self.client.get('/gl/entries/', {'per_page': 2})
+        second = self.client.get('/gl/entries/', {'per_page': 2, 'cursor': first.context['next_cursor']})
+        third = self.client.get('/gl/entries/', {'per_page': 2, 'cursor': second.context['next_cursor']})
+
+        numbers = [entry.entry_number for page in (first, second, third) for entry in page.context['entries']]
+        self.assertEqual(numbers, ['JE-0001', 'JE-0002', 'JE-0003', 'JE-0004', 'JE-0005'])
+        self.assertIsNone(third.context['next_cursor'])
+
+    def test_filters_apply_to_pages(self):
+        response = self.client.get('/gl/entries/', {'status': 'POSTED', 'per_page': 2})
+
+        self.assertEqual([entry.entry_number for entry in response.context['entries']], ['JE-0001', 'JE-0003'])
+        self.assertIn('status=POSTED', response.context['page_query'])
+
+    def test_invalid_cursor_shows_first_page(self):
+        response = self.client.get('/gl/entries/', {'cursor': 'bogus'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['entries']), 5)
+
+
+class BatchPostViewTests(TestCase):
+    """The batch posting endpoint returns a per-entry JSON report"""
+
+    @classmethod
+    def setUpTestData(cls):
+        fiscal_year = FiscalYear.objects.create(name='FY', start_date=date(2000, 1, 1), end_date=date(2099, 12, 31))
+        asset = AccountType.objects.create(name='Cash', category='ASSET', normal_balance='DEBIT')
+        cash = Account.objects.create(account_number='1000', account_name='Cash', account_type=asset)
+        cls.entries = []
+        for number, credit in enumerate([Decimal('5.00'), Decimal('4.00')], start=1):
+            entry = JournalEntryHeader.objects.create(
+                entry_number=f'JE-{number:04d}', entry_date=date.today(), fiscal_year=fiscal_year,
+            )
+            JournalEntryDetail.objects.create(journal_entry=entry, account=cash, debit_amount=Decimal('5.00'))
+            JournalEntryDetail.objects.create(journal_entry=entry, account=cash, credit_amount=credit)
+            cls.entries.append(entry)
+        cls.user = get_user_model().objects.create_user(username='clerk', password='pw')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_json_batch(self):
+        response = self.client.post(
+            '/gl/entries/post-batch/',
+            {'entry_ids': [str(entry.pk) for entry in self.entries]},
+            content_type='application/json',
+        )
+
+        report = response.json()
+        self.assertEqual((report['posted'], report['rejected']), (1, 1))
+        self.assertEqual([result['entry_number'] for result in report['results']], ['JE-0001', 'JE-0002'])
+        self.assertTrue(JournalEntryHeader.objects.get(pk=self.entries[0].pk).is_posted)
+
+    def test_async_batch_returns_job(self):
+        ids = [str(entry.pk) for entry in self.entries]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/gl/entries/post-batch/?async=1', {'entry_ids': ids},
+                content_type='application/json', HTTP_IDEMPOTENCY_KEY='batch-1',
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            repeated = self.client.post(
+                '/gl/entries/post-batch/?async=1', {'entry_ids': ids},
+                content_type='application/json', HTTP_IDEMPOTENCY_KEY='batch-1',
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(repeated.json()['job_id'], response.json()['job_id'])
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['status'], 'SUCCESS')
+        self.assertEqual(status['progress']['done'], 2)
+        self.assertEqual((status['result']['posted'], status['result']['rejected']), (1, 1))
+
+    def test_idempotency_keys_are_per_user_and_params(self):
+        ids = [str(entry.pk) for entry in self.entries]
+
+        def post(entry_ids):
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.post(
+                    '/gl/entries/post-batch/?async=1', {'entry_ids': entry_ids},
+                    content_type='application/json', HTTP_IDEMPOTENCY_KEY='batch-1',
+                )
+
+        first = post(ids)
+        changed = post(ids[:1])
+        self.client.force_login(get_user_model().objects.create_user(username='other', password='pw'))
+        other_user = post(ids)
+
+        self.assertEqual(changed.status_code, 422)
+        self.assertEqual(other_user.status_code, 202)
+        self.assertNotEqual(other_user.json()['job_id'], first.json()['job_id'])
+
+    def test_report_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/gl/reports/jobs/', {'report': 'trial_balance', 'as_of_date': '2099-01-01'},
+                content_type='application/json',
+            )
+        unknown = self.client.post('/gl/reports/jobs/', {'report': 'nope'}, content_type='application/json')
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['result']['report'], 'trial_balance')
+        self.assertEqual(unknown.status_code, 400)
+
+    def test_rejects_bad_ids(self):
+        response = self.client.post('/gl/entries/post-batch/', {'entry_ids': ['nope']}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class JournalEntryDetailTests(TestCase):
+    """The detail page loads lines with their accounts in constant queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        fiscal_year = FiscalYear.objects.create(name='FY', start_date=date(2000, 1, 1), end_date=date(2099, 12, 31))
+        expense = AccountType.objects.create(name='Payroll', category='EXPENSE', normal_balance='DEBIT')
+        asset = AccountType.objects.create(name='Bank', category='ASSET', normal_balance='DEBIT')
+        cls.bank = Account.objects.create(account_number='1010', account_name='Bank', account_type=asset)
+        cls.wages = [
+            Account.objects.create(account_number=f'61{number:02d}', account_name=f'Wages {number}', account_type=expense)
+            for number in range(5)
+        ]
+        cls.entry = JournalEntryHeader.objects.create(entry_number='JE-0001', fiscal_year=fiscal_year, description='Payroll')
+        JournalEntryDetail.objects.bulk_create([
+            JournalEntryDetail(journal_entry=cls.entry, account=cls.wages[number % 5], debit_amount=Decimal('10.00'))
+            for number in range(24)
+        ] + [JournalEntryDetail(journal_entry=cls.entry, account=cls.bank, credit_amount=Decimal('240.00'))])
+        cls.user = get_user_model().objects.create_user(username='clerk', password='pw')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_queries_do_not_grow_with_lines(self):
+        with self.assertNumQueries(4):  # session, user, entry, lines
+            response = self.client.get(f'/gl/entries/{self.entry.pk}/')
+
+        self.assertContains(response, 'Wages 3')
+        self.assertIsNone(response.context['page_obj'])
+        self.assertEqual(response.context['line_count'], 25)
+        self.assertEqual(
+            [(group['account_type'], group['debit'], group['credit']) for group in response.context['type_totals']],
+            [('Bank', Decimal('0.00'), Decimal('240.00')), ('Payroll', Decimal('240.00'), Decimal('0.00'))],
+        )
+
+    def test_large_entries_are_paginated(self):
+        with mock.patch('GL.views.ENTRY_LINES_PER_PAGE', 10):
+            response = self.client.get(f'/gl/entries/{self.entry.pk}/')
+            last = self.client.get(f'/gl/entries/{self.entry.pk}/', {'page': 3})
+
+        self.assertEqual(len(response.context['lines']), 10)
+        self.assertEqual(len(last.context['lines']), 5)
+        self.assertEqual(last.context['line_count'], 25)
+        self.assertEqual(last.context['total_debit'], last.context['total_credit'])
@@ -17,6 +17,8 @@ urlpatterns = [
     # Journal Entries
     path('entries/', views.journal_entry_list, name='entry_list'),
     path('entries/create/', views.journal_entry_create, name='entry_create'),
+    path('entries/import/', views.journal_entry_import, name='entry_import'),
+    path('entries/post-batch/', views.journal_entry_post_batch, name='entry_post_batch'),
     path('entries/<uuid:pk>/', views.journal_entry_detail, name='entry_detail'),
     path('entries/<uuid:pk>/edit/', views.journal_entry_edit, name='entry_edit'),
     path('entries/<uuid:pk>/post/', views.journal_entry_post, name='entry_post'),
@@ -28,6 +30,8 @@ urlpatterns = [
     path('reports/balance-sheet/', views.balance_sheet, name='balance_sheet'),
     path('reports/cash-flow-statement/', views.cash_flow_statement, name='cash_flow_statement'),
     path('reports/general-ledger/', views.general_ledger_report, name='general_ledger_report'),
+    path('reports/comparative/', views.comparative_report, name='comparative_report'),
+    path('reports/jobs/', views.report_job, name='report_job'),
     
     # Chart of Accounts
     path('chart-of-accounts/', views.chart_of_accounts, name='chart_of_accounts'),
@@ -1,38 +1,55 @@
 # General Ledger Module Views
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from datetime import date
-from .models import JournalEntryHeader, JournalEntryDetail, Account, AccountType, FiscalYear
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.core.paginator import Paginator
+from django.db.models import Count, Q, Sum
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_POST
+from datetime import date, timedelta
+from decimal import Decimal
+import base64
+import csv
+import io
+import itertools
+import json
+import uuid
+from default.jobs import JobConflictError, idempotency_key, submit_job
+from default.sequences import next_document_number
+from .models import JournalEntryHeader, JournalEntryDetail, Account, AccountType, FinancialPeriod, FiscalYear
+from .dashboard import bump_ledger_version, gl_summary, ledger_version
+from .hierarchy import accounts_with_rollup
+from .jobs import REPORTS as REPORT_JOBS
+from .report_cache import cached_report
+from .imports import CSV_COLUMNS, JournalImportError, import_journal_file
+from .posting import PostingError, post_journal_entries, post_journal_entry
+from .search import search_entries
+from . import comparative, reports
+
+def _date_param(request, name, default=None):
+    """Parse a YYYY-MM-DD query parameter, falling back to default"""
+    try:
+        return parse_date(request.GET.get(name, '')) or default
+    except ValueError:
+        return default
 
 @login_required
 def gl_dashboard(request):
     """General Ledger Dashboard"""
-    from django.db.models import Sum, Q
-    from datetime import datetime, timedelta
-    
-    # Calculate total assets (ASSET accounts with debit balance)
-    asset_accounts = Account.objects.filter(account_type__category='ASSET')
-    total_assets = asset_accounts.aggregate(Sum('balance'))['balance__sum'] or 0
-    
-    # Calculate total liabilities (LIABILITY accounts with credit balance)
-    liability_accounts = Account.objects.filter(account_type__category='LIABILITY')
-    total_liabilities = abs(liability_accounts.aggregate(Sum('balance'))['balance__sum'] or 0)
-    
-    # Calculate net worth (Assets - Liabilities)
-    net_worth = total_assets - total_liabilities
-    
-    # Count unposted journal entries
-    unposted_entries = JournalEntryHeader.objects.filter(is_posted=False).count()
+    from datetime import datetime
     
-    # Get recent journal entries (last 5)
-    recent_entries = JournalEntryHeader.objects.order_by('-created_at')[:5]
+    # Served from the cache until a posting changes the ledger
+    summary = gl_summary()
     
     # Format recent entries for display
     formatted_recent_entries = []
-    for entry in recent_entries:
+    for entry in summary['recent_entries']:
         # Calculate days ago
-        days_ago = (datetime.now().date() - entry.entry_date).days
+        days_ago = (datetime.now().date() - entry['entry_date']).days
         if days_ago == 0:
             time_display = "Today"
         elif days_ago == 1:
@@ -40,10 +57,10 @@ def gl_dashboard(request):
         elif days_ago < 7:
             time_display = f"{days_ago} days ago"
         else:
-            time_display = entry.entry_date.strftime("%b %d")
+            time_display = entry['entry_date'].strftime("%b %d")
         
         # Determine status color
-        if entry.is_posted:
+        if entry['is_posted']:
             status_color = "success"
         else:
             status_color = "warning"
@@ -52,16 +69,16 @@ def gl_dashboard(request):
             'entry': entry,
             'time_display': time_display,
             'status_color': status_color,
-            'amount_display': f"${entry.total_debit:,.2f}" if entry.total_debit else f"${entry.total_credit:,.2f}"
+            'amount_display': f"${entry['total_debit']:,.2f}" if entry['total_debit'] else f"${entry['total_credit']:,.2f}"
         })
     
     context = {
         'page_title': 'General Ledger Dashboard',
         'module_name': 'General Ledger',
-        'total_assets': total_assets,
-        'total_liabilities': total_liabilities,
-        'net_worth': net_worth,
-        'unposted_entries': unposted_entries,
+        'total_assets': summary['total_assets'],
+        'total_liabilities': summary['total_liabilities'],
+        'net_worth': summary['net_worth'],
+        'unposted_entries': summary['unposted_entries'],
         'recent_entries': formatted_recent_entries,
     }
     return render(request, 'gl/dashboard.html', context)
@@ -72,6 +89,7 @@ def chart_of_accounts(request):
     context = {
         'page_title': 'Chart of Accounts',
         'today': date.today().isoformat(),
+        'accounts': accounts_with_rollup(),
     }
     return render(request, 'gl/chart_of_accounts.html', context)
 
@@ -95,26 +113,58 @@ def account_edit(request, pk):
     """Edit account"""
     return render(request, 'gl/account_form.html', {'page_title': 'Edit Account'})
 
+ENTRIES_PER_PAGE = 50
+MAX_ENTRIES_PER_PAGE = 200
+ENTRY_LIST_ORDER = ['-entry_date', '-created_at', '-id']
+
+def _entry_cursor(entry, ranked=False):
+    """Opaque keyset cursor for the last entry on a journal entry list page"""
+    keys = [entry.entry_date.isoformat(), entry.created_at.isoformat(), str(entry.pk)]
+    if ranked:
+        keys.insert(0, repr(entry.search_rank))
+    return base64.urlsafe_b64encode('|'.join(keys).encode()).decode()
+
+def _entries_after(entries, cursor, ranked=False):
+    """Entries that sort after the cursor in the list order; ValueError if malformed"""
+    try:
+        keys = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        rank = float(keys.pop(0)) if ranked else None
+        entry_date, created_at, entry_id = keys
+        entry_date, created_at, entry_id = parse_date(entry_date), parse_datetime(created_at), uuid.UUID(entry_id)
+    except Exception:
+        raise ValueError('Invalid page cursor')
+    if entry_date is None or created_at is None:
+        raise ValueError('Invalid page cursor')
+    after = (
+        Q(entry_date__lt=entry_date)
+        | Q(entry_date=entry_date, created_at__lt=created_at)
+        | Q(entry_date=entry_date, created_at=created_at, id__lt=entry_id)
+    )
+    if ranked:
+        after = Q(search_rank__gt=rank) | (Q(search_rank=rank) & after)
+    return entries.filter(after)
+
 @login_required
 def journal_entry_list(request):
     """List journal entries"""
-    from django.db import models
-    
     # Get search parameters
-    search = request.GET.get('search', '')
+    search = request.GET.get('search', '').strip()
     status = request.GET.get('status', '')
-    date_from = request.GET.get('date_from', '')
+    date_from = _date_param(request, 'date_from')
+    try:
+        per_page = min(max(int(request.GET.get('per_page', ENTRIES_PER_PAGE)), 1), MAX_ENTRIES_PER_PAGE)
+    except ValueError:
+        per_page = ENTRIES_PER_PAGE
     
     # Base query
     entries = JournalEntryHeader.objects.all()
     
     # Apply filters
+    order = ENTRY_LIST_ORDER
     if search:
-        entries = entries.filter(
-            models.Q(entry_number__icontains=search) |
-            models.Q(description__icontains=search) |
-            models.Q(reference__icontains=search)
-        )
+        # Indexed search, best matches first
+        entries = search_entries(entries, search)
+        order = ['search_rank', *ENTRY_LIST_ORDER]
     
     if status:
         if status == 'POSTED':
@@ -125,30 +175,45 @@ def journal_entry_list(request):
     if date_from:
         entries = entries.filter(entry_date__gte=date_from)
     
-    # Get statistics
-    draft_count = JournalEntryHeader.objects.filter(is_posted=False).count()
-    posted_count = JournalEntryHeader.objects.filter(is_posted=True).count()
-    
-    # Calculate monthly totals
-    from django.db.models import Sum
-    from datetime import datetime
-    current_month = datetime.now().month
-    current_year = datetime.now().year
+    # Keyset pagination: fetch one extra row to know whether a next page exists
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            entries = _entries_after(entries, cursor, ranked=bool(search))
+        except ValueError as e:
+            messages.error(request, str(e))
+            cursor = None
+    page = list(entries.order_by(*order)[:per_page + 1])
+    next_cursor = _entry_cursor(page[per_page - 1], ranked=bool(search)) if len(page) > per_page else None
+    page = page[:per_page]
     
-    monthly_entries = JournalEntryHeader.objects.filter(
-        entry_date__month=current_month,
-        entry_date__year=current_year
+    # Statistics in one conditional aggregate; the month is a date range so
+    # no month/year extraction is needed. gl_entry_stats_idx holds every
+    # column it reads, so the aggregate scans that index, not the table.
+    month_start = date.today().replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    this_month = Q(entry_date__gte=month_start, entry_date__lt=next_month)
+    stats = JournalEntryHeader.objects.aggregate(
+        draft_count=Count('is_posted', filter=Q(is_posted=False)),
+        posted_count=Count('is_posted', filter=Q(is_posted=True)),
+        monthly_debits=Sum('total_debit', filter=this_month),
+        monthly_credits=Sum('total_credit', filter=this_month),
     )
-    monthly_debits = monthly_entries.aggregate(Sum('total_debit'))['total_debit__sum'] or 0
-    monthly_credits = monthly_entries.aggregate(Sum('total_credit'))['total_credit__sum'] or 0
+    
+    # Query string for the next page link, without the current cursor
+    params = request.GET.copy()
+    params.pop('cursor', None)
     
     context = {
         'page_title': 'Journal Entries',
-        'entries': entries,
-        'draft_count': draft_count,
-        'posted_count': posted_count,
-        'monthly_debits': monthly_debits,
-        'monthly_credits': monthly_credits,
+        'entries': page,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
+        'page_query': params.urlencode(),
+        'draft_count': stats['draft_count'],
+        'posted_count': stats['posted_count'],
+        'monthly_debits': stats['monthly_debits'] or 0,
+        'monthly_credits': stats['monthly_credits'] or 0,
     }
     return render(request, 'gl/journal_entry_list.html', context)
 
@@ -172,25 +237,18 @@ def journal_entry_create(request):
                     is_closed=False
                 )
             
-            # Get next entry number
-            last_entry = JournalEntryHeader.objects.order_by('-entry_number').first()
-            if last_entry:
-                last_num = int(last_entry.entry_number.split('-')[1]) if '-' in last_entry.entry_number else 0
-                next_num = last_num + 1
-            else:
-                next_num = 1
-            
-            entry_number = f"JE-{next_num:04d}"
-            
-            # Create journal entry
-            entry = JournalEntryHeader.objects.create(
-                entry_number=entry_number,
-                entry_date=request.POST.get('entry_date'),
-                description=request.POST.get('description'),
-                reference=request.POST.get('reference', ''),
-                created_by=request.user,
-                fiscal_year=fiscal_year
-            )
+            # Allocate the number and create the entry together so numbering stays gap-free
+            with transaction.atomic():
+                entry_number = next_document_number('journal_entry')
+                entry = JournalEntryHeader.objects.create(
+                    entry_number=entry_number,
+                    entry_date=request.POST.get('entry_date'),
+                    description=request.POST.get('description'),
+                    reference=request.POST.get('reference', ''),
+                    created_by=request.user,
+                    fiscal_year=fiscal_year
+                )
+                bump_ledger_version()
             
             messages.success(request, f'Journal entry {entry_number} created successfully!')
             return redirect('gl:entry_detail', pk=entry.pk)
@@ -214,24 +272,109 @@ def journal_entry_create(request):
     }
     return render(request, 'gl/journal_entry_form.html', context)
 
+@login_required
+def journal_entry_import(request):
+    """Bulk import journal entries from an uploaded CSV or JSON Lines file"""
+    context = {
+        'page_title': 'Import Journal Entries',
+        'csv_columns': CSV_COLUMNS,
+    }
+    upload = request.FILES.get('file') if request.method == 'POST' else None
+    if upload:
+        file_format = upload.name.rsplit('.', 1)[-1].lower()
+        try:
+            lines = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+            result = import_journal_file(lines, file_format, user=request.user)
+        except (JournalImportError, UnicodeDecodeError) as e:
+            messages.error(request, f'Error importing journal entries: {str(e)}')
+        else:
+            messages.success(
+                request,
+                f'Imported {result.entry_count} journal entries with {result.line_count} lines.'
+            )
+            if result.rejected_count:
+                messages.warning(request, f'{result.rejected_count} entries were rejected.')
+            context['import_errors'] = result.errors
+    return render(request, 'gl/journal_entry_import.html', context)
+
 @login_required
 def journal_entry_detail(request, pk):
-    """Journal entry detail"""
-    try:
-        entry = get_object_or_404(JournalEntryHeader, pk=pk)
-        context = {
-            'page_title': 'Journal Entry Details',
-            'entry': entry,
-        }
-    except:
-        # If no entry found, show message
-        messages.error(request, 'Journal entry not found.')
-        context = {
-            'page_title': 'Journal Entry Details',
-            'entry': None,
-        }
+    """Journal entry detail.
+
+    Lines are loaded with their accounts in one query and totalled by account
+    type in the same pass. Entries with more than ENTRY_LINES_PER_PAGE lines
+    (or any ?page= request) are shown a page of lines at a time, with the
+    totals taken from one grouped aggregate instead.
+    """
+    entry = get_object_or_404(JournalEntryHeader.objects.select_related('created_by', 'fiscal_year'), pk=pk)
+    lines = entry.lines.select_related('account__account_type')
+    page_obj = None
+    paginate = 'page' in request.GET
+    if not paginate:
+        # One extra line tells us whether the entry needs paging
+        all_lines = list(lines[:ENTRY_LINES_PER_PAGE + 1])
+        paginate = len(all_lines) > ENTRY_LINES_PER_PAGE
+    if paginate:
+        page_obj = Paginator(lines, ENTRY_LINES_PER_PAGE).get_page(request.GET.get('page'))
+        lines, type_totals = page_obj.object_list, _account_type_totals_from_db(entry)
+    else:
+        lines, type_totals = all_lines, _account_type_totals(all_lines)
+
+    total_debit = sum((group['debit'] for group in type_totals), Decimal('0.00'))
+    total_credit = sum((group['credit'] for group in type_totals), Decimal('0.00'))
+    context = {
+        'page_title': 'Journal Entry Details',
+        'entry': entry,
+        'lines': lines,
+        'page_obj': page_obj,
+        'line_count': sum(group['line_count'] for group in type_totals),
+        'type_totals': type_totals,
+        'total_debit': total_debit,
+        'total_credit': total_credit,
+        'difference': total_debit - total_credit,
+    }
     return render(request, 'gl/journal_entry_detail.html', context)
 
+ENTRY_LINES_PER_PAGE = 500
+CATEGORY_ORDER = [category for category, _ in AccountType.CATEGORY_CHOICES]
+
+def _type_totals_sorted(groups):
+    return sorted(groups.values(), key=lambda group: (CATEGORY_ORDER.index(group['category']), group['account_type']))
+
+def _account_type_totals(lines):
+    """Debit and credit totals per account type of lines loaded with their accounts"""
+    groups = {}
+    for line in lines:
+        account_type = line.account.account_type
+        group = groups.get(account_type.pk)
+        if group is None:
+            group = groups[account_type.pk] = {
+                'category': account_type.category, 'account_type': account_type.name,
+                'debit': Decimal('0.00'), 'credit': Decimal('0.00'), 'line_count': 0,
+            }
+        group['debit'] += line.debit_amount
+        group['credit'] += line.credit_amount
+        group['line_count'] += 1
+    return _type_totals_sorted(groups)
+
+def _account_type_totals_from_db(entry):
+    """The same totals as _account_type_totals, for all of an entry's lines in one grouped query"""
+    rows = (
+        entry.lines.order_by()
+        .values('account__account_type_id', 'account__account_type__category', 'account__account_type__name')
+        .annotate(debit=Sum('debit_amount'), credit=Sum('credit_amount'), line_count=Count('id'))
+    )
+    return _type_totals_sorted({
+        row['account__account_type_id']: {
+            'category': row['account__account_type__category'],
+            'account_type': row['account__account_type__name'],
+            'debit': row['debit'] or Decimal('0.00'),
+            'credit': row['credit'] or Decimal('0.00'),
+            'line_count': row['line_count'],
+        }
+        for row in rows
+    })
+
 @login_required
 def journal_entry_edit(request, pk):
     """Edit journal entry"""
@@ -252,69 +395,299 @@ def journal_entry_edit(request, pk):
 @login_required
 def journal_entry_post(request, pk):
     """Post journal entry"""
+    entry = get_object_or_404(JournalEntryHeader, pk=pk)
     try:
-        entry = get_object_or_404(JournalEntryHeader, pk=pk)
-        
-        # Post the journal entry
-        entry.is_posted = True
-        entry.save()
-        
+        # Post the journal entry and apply its lines to account balances
+        entry = post_journal_entry(entry)
         messages.success(request, f'Journal entry {entry.entry_number} posted successfully!')
-        
-        context = {
-            'page_title': 'Journal Entry Details',
-            'entry': entry,
-        }
-        return render(request, 'gl/journal_entry_detail.html', context)
-    except Exception as e:
+    except PostingError as e:
         messages.error(request, f'Error posting journal entry: {str(e)}')
-        return redirect('gl:entry_list')
+    return redirect('gl:entry_detail', pk=entry.pk)
+
+MAX_BATCH_POST = 1000
+MAX_ASYNC_POST = 20000
+
+def _json_body(request):
+    """The request's JSON object body, or None when it is not one"""
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+def _job_accepted(job):
+    """202 response pointing the client at the job status endpoint"""
+    return JsonResponse(
+        {'job_id': job.pk, 'status': job.status, 'status_url': reverse('job_status', args=[job.pk])},
+        status=202, encoder=DjangoJSONEncoder,
+    )
+
+@login_required
+@require_POST
+def journal_entry_post_batch(request):
+    """Post many draft entries in one transaction; returns a per-entry JSON report.
+
+    Accepts a JSON body {"entry_ids": [...]} or repeated entry_ids form fields.
+    With ?async=1 (or "async": true) the batch is queued as a background job
+    and the response carries the job id; an Idempotency-Key header makes
+    retries return the same job.
+    """
+    if request.content_type == 'application/json':
+        body = _json_body(request)
+        if body is None:
+            return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+        entry_ids = body.get('entry_ids', [])
+        run_async = bool(body.get('async'))
+    else:
+        entry_ids = request.POST.getlist('entry_ids')
+        run_async = bool(request.POST.get('async'))
+    run_async = run_async or bool(request.GET.get('async'))
+    limit = MAX_ASYNC_POST if run_async else MAX_BATCH_POST
+    if not isinstance(entry_ids, list) or not entry_ids:
+        return JsonResponse({'error': 'entry_ids is required'}, status=400)
+    if len(entry_ids) > limit:
+        return JsonResponse({'error': f'At most {limit} entries can be posted at once'}, status=400)
+    try:
+        entry_ids = [uuid.UUID(str(entry_id)) for entry_id in entry_ids]
+    except ValueError:
+        return JsonResponse({'error': 'entry_ids must be UUIDs'}, status=400)
+
+    if run_async:
+        try:
+            job, _ = submit_job(
+                'gl.post_entries', {'entry_ids': [str(entry_id) for entry_id in entry_ids]},
+                key=request.headers.get('Idempotency-Key'), user=request.user,
+            )
+        except JobConflictError as e:
+            return JsonResponse({'error': str(e)}, status=422)
+        return _job_accepted(job)
+
+    results = post_journal_entries(entry_ids)
+    posted = sum(result['posted'] for result in results)
+    return JsonResponse(
+        {'posted': posted, 'rejected': len(results) - posted, 'results': results},
+        encoder=DjangoJSONEncoder,
+    )
+
+@login_required
+@require_POST
+def report_job(request):
+    """Queue a financial report as a background job.
+
+    Takes a JSON body {"report": name, ...report parameters} naming one of
+    GL.jobs.REPORTS. Unless an Idempotency-Key header is given, the same
+    report for the same ledger version reuses the earlier job.
+    """
+    params = _json_body(request)
+    if params is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    if params.get('report') not in REPORT_JOBS:
+        return JsonResponse({'error': f"report must be one of {', '.join(REPORT_JOBS)}"}, status=400)
+    key = request.headers.get('Idempotency-Key') or idempotency_key('gl.report', params, request.user.pk, ledger_version())
+    try:
+        job, _ = submit_job('gl.report', params, key=key, user=request.user)
+    except JobConflictError as e:
+        return JsonResponse({'error': str(e)}, status=422)
+    return _job_accepted(job)
 
 @login_required
 def trial_balance(request):
     """Trial Balance Report"""
+    as_of_date = _date_param(request, 'as_of_date', date.today())
+    show_zero = bool(request.GET.get('show_zero'))
+    report = cached_report(
+        'trial_balance', {'as_of_date': as_of_date, 'show_zero': show_zero},
+        lambda: reports.trial_balance(as_of_date, show_zero=show_zero),
+    )
+    
     context = {
         'page_title': 'Trial Balance',
-        'as_of_date': date.today(),
+        'as_of_date': as_of_date,
         'today': date.today().isoformat(),
-        'balanced': True,
-        'show_zero': False,
+        'report': report,
+        'balanced': report['balanced'],
+        'show_zero': show_zero,
     }
     return render(request, 'gl/trial_balance.html', context)
 
+def _export_statement(request, report, filename, columns=None, rows=reports.statement_rows):
+    """Return the statement as JSON or CSV when ?format= asks for it"""
+    export_format = request.GET.get('format', '')
+    if export_format == 'json':
+        return JsonResponse(report, encoder=DjangoJSONEncoder)
+    if export_format == 'csv':
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        writer = csv.writer(response)
+        writer.writerow(columns or reports.STATEMENT_COLUMNS)
+        writer.writerows(rows(report))
+        return response
+    return None
+
 @login_required
 def income_statement(request):
     """Income Statement Report"""
+    fiscal_year = FiscalYear.objects.filter(is_current=True).first()
+    default_from = fiscal_year.start_date if fiscal_year else date.today().replace(month=1, day=1)
+    date_from = _date_param(request, 'date_from', default_from)
+    date_to = _date_param(request, 'date_to', date.today())
+    show_zero = bool(request.GET.get('show_zero'))
+    report = cached_report(
+        'income_statement', {'date_from': date_from, 'date_to': date_to, 'show_zero': show_zero},
+        lambda: reports.income_statement(date_from, date_to, show_zero=show_zero),
+    )
+    
+    export = _export_statement(request, report, f'income-statement-{date_to.isoformat()}')
+    if export:
+        return export
+    
     context = {
         'page_title': 'Income Statement',
         'today': date.today().isoformat(),
+        'date_from': date_from,
+        'date_to': date_to,
+        'report': report,
     }
     return render(request, 'gl/income_statement.html', context)
 
 @login_required
 def balance_sheet(request):
     """Balance Sheet Report"""
+    as_of_date = _date_param(request, 'as_of_date', date.today())
+    show_zero = bool(request.GET.get('show_zero'))
+    report = cached_report(
+        'balance_sheet', {'as_of_date': as_of_date, 'show_zero': show_zero},
+        lambda: reports.balance_sheet(as_of_date, show_zero=show_zero),
+    )
+    
+    export = _export_statement(request, report, f'balance-sheet-{as_of_date.isoformat()}')
+    if export:
+        return export
+    
     context = {
         'page_title': 'Balance Sheet',
         'today': date.today().isoformat(),
+        'as_of_date': as_of_date,
+        'report': report,
     }
     return render(request, 'gl/balance_sheet.html', context)
 
 @login_required
 def cash_flow_statement(request):
     """Cash Flow Statement Report"""
+    fiscal_year = FiscalYear.objects.filter(is_current=True).first()
+    default_from = fiscal_year.start_date if fiscal_year else date.today().replace(month=1, day=1)
+    date_from = _date_param(request, 'date_from', default_from)
+    date_to = _date_param(request, 'date_to', date.today())
+    report = cached_report(
+        'cash_flow_statement', {'date_from': date_from, 'date_to': date_to},
+        lambda: reports.cash_flow_statement(date_from, date_to),
+    )
+    
+    export = _export_statement(
+        request, report, f'cash-flow-{date_to.isoformat()}',
+        columns=reports.cash_flow_columns(report), rows=reports.cash_flow_rows,
+    )
+    if export:
+        return export
+    
     context = {
         'page_title': 'Cash Flow Statement',
         'today': date.today().isoformat(),
+        'date_from': date_from,
+        'date_to': date_to,
+        'report': report,
     }
     return render(request, 'gl/cash_flow_statement.html', context)
 
+@login_required
+def comparative_report(request):
+    """Comparative trial balance or income statement across financial periods"""
+    fiscal_year = FiscalYear.objects.filter(is_current=True).first()
+    default_from = fiscal_year.start_date if fiscal_year else date.today().replace(month=1, day=1)
+    date_from = _date_param(request, 'date_from', default_from)
+    date_to = _date_param(request, 'date_to', date.today())
+    mode = request.GET.get('mode', 'income_statement')
+    period_type = request.GET.get('period_type', 'MONTHLY')
+    
+    report = None
+    try:
+        periods = comparative.comparative_periods(date_from, date_to, period_type)
+        if periods:
+            show_zero = bool(request.GET.get('show_zero'))
+            # Keyed on the periods themselves, since they can change without a posting
+            report = cached_report(
+                'comparative',
+                {'periods': [(period.pk, period.start_date, period.end_date) for period in periods],
+                 'mode': mode, 'show_zero': show_zero},
+                lambda: comparative.comparative_report(periods, mode, show_zero=show_zero),
+            )
+        else:
+            messages.info(request, 'No financial periods fall within the selected dates.')
+    except comparative.ComparativeReportError as e:
+        messages.error(request, str(e))
+    
+    if report:
+        export = _export_statement(
+            request, report, f'comparative-{mode}-{date_to.isoformat()}',
+            columns=comparative.comparative_columns(report), rows=comparative.comparative_rows,
+        )
+        if export:
+            return export
+    
+    context = {
+        'page_title': 'Comparative Report',
+        'today': date.today().isoformat(),
+        'date_from': date_from,
+        'date_to': date_to,
+        'mode': mode,
+        'period_type': period_type,
+        'period_types': FinancialPeriod.PERIOD_TYPES,
+        'report': report,
+    }
+    return render(request, 'gl/comparative_report.html', context)
+
+class _Echo:
+    """File-like object that returns what is written, for streaming csv.writer output"""
+    def write(self, value):
+        return value
+
 @login_required
 def general_ledger_report(request):
     """General Ledger Report"""
+    fiscal_year = FiscalYear.objects.filter(is_current=True).first()
+    default_from = fiscal_year.start_date if fiscal_year else date.today().replace(month=1, day=1)
+    date_from = _date_param(request, 'date_from', default_from)
+    date_to = _date_param(request, 'date_to', date.today())
+    account_number = request.GET.get('account', '')
+    account = Account.objects.filter(account_number=account_number).first() if account_number else None
+    
+    if request.GET.get('format') == 'csv':
+        # Stream the full ledger instead of building it in memory
+        writer = csv.writer(_Echo())
+        rows = reports.general_ledger_rows(date_from, date_to, [account.pk] if account else None)
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in itertools.chain([reports.LEDGER_COLUMNS], rows)),
+            content_type='text/csv',
+        )
+        response['Content-Disposition'] = f'attachment; filename="general-ledger-{date_to.isoformat()}.csv"'
+        return response
+    
+    report = None
+    if account:
+        try:
+            report = reports.general_ledger(account, date_from, date_to, cursor=request.GET.get('cursor'))
+        except ValueError as e:
+            messages.error(request, str(e))
+    
     context = {
         'page_title': 'General Ledger Report',
         'today': date.today().isoformat(),
+        'accounts': Account.objects.filter(is_header=False).order_by('account_number'),
+        'account_number': account_number,
+        'date_from': date_from,
+        'date_to': date_to,
+        'report': report,
     }
     return render(request, 'gl/general_ledger_report.html', context)
 
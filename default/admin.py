@@ -1,3 +1,12 @@
 from django.contrib import admin
+from .models import BackgroundJob, DocumentSequence
 
 # Register your models here.
+admin.site.register(DocumentSequence)
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress_done', 'progress_total', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('idempotency_key', 'params', 'result', 'error', 'started_at', 'finished_at')
@@ -0,0 +1,56 @@
+# Time-Ordered Document Keys
+"""
+UUIDv7 primary keys for the high-volume document tables.
+
+A UUIDv7 (RFC 9562) starts with a 48-bit Unix timestamp in milliseconds.
+Keys created one after another therefore sort one after another, and
+inserts land on the right-hand edge of the primary key B-tree instead of a
+random page. The key is still an ordinary 128-bit UUID, so UUIDField, the
+``<uuid:pk>`` URL converters and existing uuid4 rows are unaffected.
+Existing rows keep their keys; only new rows get time-ordered ones.
+The default is applied by Django, not the database, so the migrations that
+switch a table to uuid7 change only the model state: an AlterField would
+make SQLite rebuild each table to change nothing.
+
+Within one millisecond the 12-bit ``rand_a`` field is a counter seeded at
+random (RFC 9562 section 6.2, method 1), so keys from one process stay
+strictly increasing even during bulk loads. Keys from different processes
+interleave by millisecond but never collide, because 62 random bits follow.
+"""
+import os
+import threading
+import time
+import uuid
+
+_COUNTER_MAX = 0xFFF
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    """A new time-ordered UUID, strictly increasing within this process"""
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # Seeded in the lower half so a busy millisecond has room to count
+            _counter = int.from_bytes(os.urandom(2), 'big') & 0x7FF
+        else:
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                # Counter exhausted or clock stepped back: borrow the next millisecond
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+    value = (ms & 0xFFFFFFFFFFFF) << 80 | 0x7 << 76 | counter << 64
+    value |= 0b10 << 62 | int.from_bytes(os.urandom(8), 'big') & 0x3FFFFFFFFFFFFFFF
+    return uuid.UUID(int=value)
+
+
+def uuid7_time(value):
+    """Unix timestamp in seconds encoded in a UUIDv7, or None for other versions"""
+    if value.version != 7:
+        return None
+    return (value.int >> 80) / 1000
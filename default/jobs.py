@@ -0,0 +1,158 @@
+# Background Jobs
+"""
+Long postings and reports run on the Celery worker instead of tying up the
+single gunicorn worker.
+
+submit_job() records a BackgroundJob and queues it once the caller's
+transaction commits, so the web request can return the job id at once and
+the client polls the job status endpoint. Every job carries an idempotency
+key: submitting the same key again returns the existing job instead of
+repeating the work, and a worker only runs a job it can move from PENDING
+to RUNNING, so a redelivered task is a no-op. Keys supplied by clients are
+stored scoped to the user and job kind, so one client cannot collide with
+another's jobs, and reusing a key for different parameters is refused. Handlers are looked up in
+JOB_HANDLERS and report progress through job.report_progress().
+
+A running job holds a lease: the worker renews ``heartbeat_at`` every
+JOB_HEARTBEAT from a background thread. If the worker dies mid-job the
+lease lapses after JOB_LEASE, and the job can be claimed again, by the task
+Celery redelivers (CELERY_TASK_ACKS_LATE) or by submitting its key again.
+
+Celery is optional. Without it jobs run in-process when queued, and with
+CELERY_TASK_ALWAYS_EAGER (the default outside production, and in tests)
+Celery itself runs them eagerly.
+"""
+import hashlib
+import json
+import logging
+import threading
+from datetime import timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# kind -> dotted path of handler(job, **params) returning a JSON-serialisable result
+JOB_HANDLERS = {
+    'gl.post_entries': 'GL.jobs.post_entries',
+    'gl.report': 'GL.jobs.build_report',
+    'gl.recurring_entries': 'GL.jobs.generate_recurring',
+}
+
+# A RUNNING job whose heartbeat is older than JOB_LEASE is presumed dead
+JOB_LEASE = timedelta(minutes=5)
+JOB_HEARTBEAT = timedelta(minutes=1)
+
+
+class JobError(Exception):
+    """Raised when a background job cannot be submitted"""
+
+
+class JobConflictError(JobError):
+    """Raised when an idempotency key is reused for a job with different parameters"""
+
+
+def idempotency_key(kind, params, *scope):
+    """Key derived from the job's kind, parameters and any extra scope such as the user"""
+    payload = json.dumps([kind, params, *scope], cls=DjangoJSONEncoder, sort_keys=True)
+    return f'{kind}:{hashlib.sha256(payload.encode()).hexdigest()}'
+
+
+def scoped_key(kind, key, user=None):
+    """Stored form of a caller-supplied key: scoped to the user and job kind, and of bounded length"""
+    payload = json.dumps([user.pk if user else None, key])
+    return f'{kind}:key:{hashlib.sha256(payload.encode()).hexdigest()}'
+
+
+def submit_job(kind, params, key=None, user=None):
+    """Record a job and queue it on commit. Returns (job, queued).
+
+    An existing job with the same idempotency key is returned unchanged,
+    unless it failed or its lease lapsed, in which case it is queued again.
+    Raises JobConflictError when the key's job was submitted with other params.
+    """
+    if kind not in JOB_HANDLERS:
+        raise JobError(f'Unknown job kind: {kind}')
+    stored_key = scoped_key(kind, key, user) if key else idempotency_key(kind, params, user.pk if user else None)
+    with transaction.atomic():
+        job, queued = BackgroundJob.objects.select_for_update().get_or_create(
+            idempotency_key=stored_key,
+            defaults={'kind': kind, 'params': params, 'created_by': user},
+        )
+        # Compared as stored, so dates and decimals match their JSON form
+        if not queued and job.params != json.loads(json.dumps(params, cls=DjangoJSONEncoder)):
+            raise JobConflictError(f'Idempotency key {key!r} was already used for a different {kind} job')
+        if job.status == 'FAILURE' or job.lease_expired:
+            job.status, job.error, job.started_at, job.finished_at = 'PENDING', '', None, None
+            job.progress_done = job.progress_total = 0
+            job.save(update_fields=['status', 'error', 'started_at', 'finished_at', 'progress_done', 'progress_total'])
+            queued = True
+        if queued:
+            transaction.on_commit(lambda: enqueue(job.pk))
+    return job, queued
+
+
+def enqueue(job_id):
+    """Hand a job to the Celery worker, or run it here when Celery is not installed"""
+    try:
+        from .tasks import run_job
+    except ImportError:
+        execute_job(job_id)
+    else:
+        run_job.delay(str(job_id))
+
+
+def _renew_lease(job_id, stop):
+    """Heartbeat thread: renew the job's lease until stop is set"""
+    try:
+        while not stop.wait(JOB_HEARTBEAT.total_seconds()):
+            BackgroundJob.objects.filter(pk=job_id, status='RUNNING').update(heartbeat_at=timezone.now())
+    finally:
+        connections.close_all()
+
+
+def execute_job(job_id):
+    """Run a pending job, or a running one whose lease lapsed, in this process and record its outcome"""
+    now = timezone.now()
+    lapsed = Q(status='RUNNING', heartbeat_at__lt=now - JOB_LEASE)
+    claimed = BackgroundJob.objects.filter(Q(status='PENDING') | lapsed, pk=job_id).update(
+        status='RUNNING', started_at=now, heartbeat_at=now
+    )
+    if not claimed:
+        # Finished already or running elsewhere, e.g. a redelivered task
+        return None
+    job = BackgroundJob.objects.get(pk=job_id)
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_renew_lease, args=(job.pk, stop), daemon=True)
+    heartbeat.start()
+    try:
+        job.result = import_string(JOB_HANDLERS[job.kind])(job, **job.params)
+        job.status = 'SUCCESS'
+    except Exception as e:
+        logger.exception('Background job %s failed', job_id)
+        job.status, job.error = 'FAILURE', str(e)
+    finally:
+        stop.set()
+        heartbeat.join()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result', 'status', 'error', 'finished_at'])
+    return job
+
+
+def job_status(job):
+    """The job as returned by the status endpoint"""
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': {'done': job.progress_done, 'total': job.progress_total, 'percent': job.percent_complete},
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'result': job.result,
+        'error': job.error,
+    }
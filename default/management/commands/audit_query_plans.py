@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from default.query_audit import CANONICAL_QUERIES, QueryAuditError, audit_query_plans
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the canonical view queries and flag full table and index scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Only audit these queries (default: all)')
+        parser.add_argument('--show-plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(CANONICAL_QUERIES)
+        if unknown:
+            raise CommandError(f"Unknown queries: {', '.join(sorted(unknown))}")
+        try:
+            results = audit_query_plans(options['names'])
+        except QueryAuditError as e:
+            raise CommandError(str(e))
+
+        flagged = 0
+        for result in results:
+            if result['scans']:
+                flagged += 1
+                self.stdout.write(self.style.ERROR(
+                    f"FULL SCAN {result['name']} ({result['used_by']}): {', '.join(result['scans'])}"
+                ))
+            else:
+                self.stdout.write(f"ok        {result['name']}")
+            if options['show_plans'] or result['scans']:
+                self.stdout.write(result['plan'])
+
+        if flagged:
+            raise CommandError(f'{flagged} of {len(results)} queries read a whole table or index')
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} queries use indexes'))
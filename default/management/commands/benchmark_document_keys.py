@@ -0,0 +1,37 @@
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from default.ids import uuid7
+
+class Command(BaseCommand):
+    help = 'Time inserts of uuid7 and uuid4 primary keys into a SQLite table with a small page cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Rows to insert per key type')
+        parser.add_argument('--cache-kib', type=int, default=256,
+                            help='SQLite page cache; keep it well below the key index to mimic a large table')
+
+    def insert_seconds(self, factory, rows, cache_kib):
+        keys = [factory().hex for _ in range(rows)]
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(os.path.join(directory, 'keys.sqlite3'))
+            db.execute(f'PRAGMA cache_size = -{cache_kib}')
+            db.execute('CREATE TABLE document (id char(32) NOT NULL PRIMARY KEY, memo varchar(100) NOT NULL)')
+            start = time.perf_counter()
+            for offset in range(0, rows, 1000):
+                db.executemany('INSERT INTO document VALUES (?, ?)', [(key, 'x' * 40) for key in keys[offset:offset + 1000]])
+                db.commit()
+            elapsed = time.perf_counter() - start
+            db.close()
+        return elapsed
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        # Random keys touch a different leaf page per insert; ordered keys append to the last one
+        for name, factory in [('uuid7', uuid7), ('uuid4', uuid.uuid4)]:
+            seconds = self.insert_seconds(factory, rows, options['cache_kib'])
+            self.stdout.write(f'{name}: {rows} rows in {seconds:.2f}s ({rows / seconds:,.0f} rows/s)')
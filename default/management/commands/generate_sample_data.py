@@ -8,7 +8,8 @@ import random
 # Import all models
 from default.models import User
 from GL.models import AccountType, Account, FiscalYear, JournalEntryHeader, JournalEntryDetail
-from inventory.models import Category, Product, Warehouse, StockMovement, Supplier
+from GL.posting import post_journal_entry
+from inventory.models import Category, Product, Warehouse, StockBalance, StockMovement, Supplier
 from sales.models import Customer, SalesOrder, SalesOrderLine, Invoice
 from purchasing.models import PurchaseOrder, PurchaseOrderLine, GoodsReceipt, GoodsReceiptLine
 
@@ -55,6 +56,7 @@ class Command(BaseCommand):
         Invoice.objects.all().delete()
         SalesOrderLine.objects.all().delete()
         SalesOrder.objects.all().delete()
+        StockBalance.objects.all().delete()
         StockMovement.objects.all().delete()
         Product.objects.all().delete()
         Category.objects.all().delete()
@@ -118,13 +120,17 @@ class Command(BaseCommand):
             ('Operating Expenses', 'EXPENSE', 'DEBIT', 'Operating and administrative expenses'),
         ]
         
+        # Cash flow activities that differ from the category default
+        type_activities = {'Fixed Assets': 'INVESTING', 'Long-term Liabilities': 'FINANCING'}
+        
         for name, category, normal_balance, description in account_types_data:
             AccountType.objects.get_or_create(
                 name=name,
                 defaults={
                     'category': category,
                     'normal_balance': normal_balance,
-                    'description': description
+                    'description': description,
+                    'cash_flow_activity': type_activities.get(name, ''),
                 }
             )
         
@@ -182,7 +188,8 @@ class Command(BaseCommand):
                     'account_type': account_type,
                     'balance': balance,
                     'is_active': True,
-                    'description': f'{account_name} account'
+                    'description': f'{account_name} account',
+                    'cash_flow_activity': 'CASH' if account_number in ('1000', '1010', '1020') else '',
                 }
             )
         
@@ -576,7 +583,6 @@ class Command(BaseCommand):
                 reference=entry_data['reference'],
                 total_debit=total_debit,
                 total_credit=total_credit,
-                is_posted=random.choice([True, False]),
                 created_by=user
             )
             
@@ -590,13 +596,8 @@ class Command(BaseCommand):
                     credit_amount=credit
                 )
             
-            # Update account balances if posted
-            if je.is_posted:
-                for account, debit, credit, description in entry_data['lines']:
-                    if account.account_type.normal_balance == 'DEBIT':
-                        account.balance += debit - credit
-                    else:
-                        account.balance += credit - debit
-                    account.save()
+            # Post some entries through the posting engine to update balances
+            if random.choice([True, False]):
+                post_journal_entry(je)
 
         self.stdout.write(f'Created {len(journal_entries_data)} journal entries')
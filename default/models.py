@@ -1,6 +1,7 @@
 # EasyERP - Core Models
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 import uuid
 
@@ -32,3 +33,69 @@ class Company(models.Model):
 
     class Meta:
         verbose_name_plural = "Companies"
+
+class DocumentSequence(models.Model):
+    """Counter backing gap-free document numbers (see default.sequences)"""
+    name = models.CharField(max_length=50, unique=True)
+    prefix = models.CharField(max_length=20)
+    padding = models.PositiveSmallIntegerField(default=4)
+    next_value = models.BigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.prefix}{self.next_value})"
+
+    def format(self, value):
+        return f"{self.prefix}{value:0{self.padding}d}"
+
+class BackgroundJob(models.Model):
+    """A unit of work run on the Celery worker (see default.jobs)"""
+    STATUSES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('SUCCESS', 'Succeeded'),
+        ('FAILURE', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    idempotency_key = models.CharField(max_length=128, unique=True)
+    params = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUSES, default='PENDING')
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Renewed while RUNNING; a job whose lease lapses is reclaimed (see default.jobs)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('SUCCESS', 'FAILURE')
+
+    @property
+    def lease_expired(self):
+        """True for a RUNNING job whose worker stopped renewing its heartbeat"""
+        from .jobs import JOB_LEASE
+
+        return self.status == 'RUNNING' and self.heartbeat_at is not None and self.heartbeat_at < timezone.now() - JOB_LEASE
+
+    def report_progress(self, done, total):
+        """Record progress immediately, outside any transaction the handler holds open"""
+        self.progress_done, self.progress_total = done, total
+        BackgroundJob.objects.filter(pk=self.pk).update(progress_done=done, progress_total=total)
+
+    @property
+    def percent_complete(self):
+        if self.status == 'SUCCESS':
+            return 100
+        if not self.progress_total:
+            return 0
+        return min(100, self.progress_done * 100 // self.progress_total)
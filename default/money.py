@@ -0,0 +1,68 @@
+# Integer Money Aggregation
+"""
+Exact money arithmetic on integer cents for large in-memory aggregations.
+
+Every monetary field is a DecimalField with two decimal places, so each
+amount is a whole number of cents. Most of the cost of aggregating a money
+column in Python goes into building one Decimal per row. Cents() makes the
+database return the column as integer cents instead, which callers such as
+GL.comparative sum as int64 NumPy arrays, or that the database sums
+itself, as inventory.stock.stock_value() does.
+from_cents() turns the totals back into two-place Decimals.
+
+Converting Decimals already in memory to cents costs more than adding them
+up, so amounts that are already Decimals are simply summed as Decimals.
+
+Two guards keep results identical to Decimal arithmetic:
+
+* to_cents() raises MoneyError for amounts with fractions of a cent, where
+  int(amount * 100) would silently truncate.
+* fits_int64() tells callers whether the worst-case sum of an int64 array
+  fits in int64 (count x largest amount <= INT64_MAX). Otherwise they sum
+  Python ints, which are unbounded.
+"""
+from decimal import Decimal
+import numpy as np
+from django.db.models import BigIntegerField, F, Value
+from django.db.models.functions import Cast, Round
+
+INT64_MAX = 2 ** 63 - 1
+
+
+class MoneyError(Exception):
+    """Raised when an amount is not a whole number of cents"""
+
+
+def Cents(expression):
+    """Query expression for a money field or expression as integer cents.
+
+    Rounds before the cast because SQLite computes the product in floating
+    point; every two-place amount below 10**13 rounds back exactly.
+    """
+    if isinstance(expression, str):
+        expression = F(expression)
+    return Cast(Round(expression * Value(100)), BigIntegerField())
+
+
+def to_cents(amount):
+    """Exact integer cents of a Decimal or int amount; None counts as zero"""
+    if amount is None:
+        return 0
+    cents = Decimal(amount).scaleb(2)
+    if cents != cents.to_integral_value():
+        raise MoneyError(f'{amount} is not a whole number of cents')
+    return int(cents)
+
+
+def from_cents(cents):
+    """Two-place Decimal for integer cents"""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def fits_int64(cents):
+    """True when no sum of this int64 NumPy array of cents can overflow int64"""
+    if not cents.size:
+        return True
+    # Vectorised; iterating the array from Python would cost more than the sum it guards
+    low, high = int(cents.min()), int(cents.max())
+    return max(abs(low), abs(high)) * cents.size <= INT64_MAX
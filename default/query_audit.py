@@ -0,0 +1,198 @@
+# Query Plan Audit
+"""
+EXPLAIN the queries behind the busiest views and flag any that read a whole
+table instead of using an index.
+
+Each entry in CANONICAL_QUERIES runs the code a view runs: the view itself,
+called with a RequestFactory request, or the function the view calls when
+the view needs an existing object. Every SELECT it issues is captured and
+EXPLAINed, so the audit sees the SQL users actually wait on. Caches are
+disabled while it runs, and the transaction is rolled back afterwards.
+
+Any step that reads a whole table or a whole index is flagged: a "Seq
+Scan", or an index scan with no "Index Cond", on PostgreSQL, and a "SCAN"
+step, with or without an index, on SQLite. An index lookup with an
+equality or range bound ("SEARCH" on SQLite) is not. On PostgreSQL the
+audit also disables sequential scans for its transaction, so the planner
+shows the index it would use however small the audit tables are.
+
+Some whole scans are bounded by the query rather than by an index: an
+ORDER BY the index with a LIMIT stops after the first rows, a partial index
+holds only the rows its condition selects, and a count of every entry must
+read every entry. ACCEPTED_SCANS lists these per query, keyed by the
+index (or the table, for a scan without one), each with its reason, so a
+scan of any other index or table in the same query is still flagged.
+
+Add new hot views here so the audit_query_plans command catches plans that
+regress.
+"""
+import re
+import uuid
+from datetime import date, timedelta
+from itertools import takewhile
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve
+
+AUDIT_DATE = date(2025, 1, 1)
+MOVEMENT_HISTORY = 20
+NO_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'reports': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def _view(path):
+    """Run the view serving path as a signed-in superuser"""
+    def run():
+        request = RequestFactory().get(path)
+        request.user = get_user_model()(username='query-audit', is_staff=True, is_superuser=True)
+        match = resolve(request.path_info)
+        match.func(request, *match.args, **match.kwargs)
+    return run
+
+
+def _gl_general_ledger():
+    # The report view needs an existing account; this is the function it calls
+    from GL.models import Account
+    from GL.reports import general_ledger
+    general_ledger(Account(pk=0, account_number='0'), AUDIT_DATE, AUDIT_DATE + timedelta(days=90))
+
+
+def _gl_entry_detail():
+    # The detail view needs an existing entry; these are the queries it runs on one
+    from GL.models import JournalEntryHeader
+    from GL.views import ENTRY_LINES_PER_PAGE, _account_type_totals_from_db
+    entry = JournalEntryHeader(pk=uuid.UUID(int=0))
+    list(entry.lines.select_related('account__account_type')[:ENTRY_LINES_PER_PAGE + 1])
+    _account_type_totals_from_db(entry)
+
+
+def _inventory_product_movements():
+    # A product's movement history, newest first
+    from inventory.models import Product, StockMovement
+    list(StockMovement.objects.filter(product=Product(pk=0)).order_by('-created_at')[:MOVEMENT_HISTORY])
+
+
+# name -> (used by, callable running the view's queries)
+CANONICAL_QUERIES = {
+    'gl.dashboard': ('GL dashboard', _view('/gl/')),
+    'gl.entry_list': ('journal entry list with its stats', _view('/gl/entries/')),
+    'gl.entry_list_drafts': ('journal entry list, drafts', _view('/gl/entries/?status=DRAFT')),
+    'gl.entry_list_posted_since': (
+        'journal entry list, posted since a date', _view(f'/gl/entries/?status=POSTED&date_from={AUDIT_DATE}'),
+    ),
+    'gl.general_ledger': ('general ledger report', _gl_general_ledger),
+    'gl.entry_detail': ('journal entry detail', _gl_entry_detail),
+    'sales.dashboard': ('sales dashboard', _view('/sales/')),
+    'sales.order_list_status': ('sales order list by status', _view('/sales/orders/?status=CONFIRMED')),
+    'sales.invoice_list_status': ('invoice list by status', _view('/sales/invoices/?status=PAID')),
+    'inventory.product_movements': ('stock movement history of a product', _inventory_product_movements),
+}
+
+LIMITED = 'ORDER BY the index with a LIMIT reads only the first rows'
+# name -> {index or table: why reading it whole is bounded}
+ACCEPTED_SCANS = {
+    'gl.dashboard': {
+        'GL_account': 'the asset and liability totals sum the balance of every account',
+        'gl_entry_created_idx': LIMITED,
+        'gl_entry_draft_idx': 'the unposted count reads the partial index of drafts only',
+    },
+    'gl.entry_list': {
+        'gl_entry_list_idx': LIMITED,
+        'gl_entry_stats_idx': 'the draft and posted counts cover every entry; the index holds all the columns they read',
+    },
+    'gl.entry_list_drafts': {
+        'gl_entry_draft_idx': LIMITED + ', from the partial index of drafts only',
+        'gl_entry_stats_idx': 'the draft and posted counts cover every entry; the index holds all the columns they read',
+    },
+    'gl.entry_list_posted_since': {
+        'gl_entry_stats_idx': 'the draft and posted counts cover every entry; the index holds all the columns they read',
+    },
+    'sales.dashboard': {
+        'sales_customer_active_idx': 'the customer count reads the partial index of active customers only',
+        'sales_order_created_idx': LIMITED,
+        'sales_inv_created_idx': LIMITED,
+    },
+}
+
+# (table, index) of SCAN steps; VIRTUAL TABLE scans are full text matches and CONSTANT ROW reads nothing
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)\b(?: USING (?:COVERING )?INDEX (\w+))?(?! VIRTUAL)')
+# (index, table) of scan nodes; index scans are whole unless the lines under them show an Index Cond
+POSTGRESQL_SCAN = re.compile(r'(?:Seq Scan|Index (?:Only )?Scan(?: Backward)? using (\w+)) on ("[^"]+"|\w+)')
+
+
+class QueryAuditError(Exception):
+    """Raised when plans cannot be audited on the current database backend"""
+
+
+def full_scans(plan, vendor):
+    """(table, index) of every step reading a whole table, where index is None, or a whole index"""
+    if vendor == 'sqlite':
+        scans = SQLITE_SCAN.findall(plan)
+    elif vendor == 'postgresql':
+        scans = []
+        lines = plan.splitlines()
+        for number, line in enumerate(lines):
+            match = POSTGRESQL_SCAN.search(line)
+            if not match:
+                continue
+            index, table = match.groups()
+            if index:
+                # The node's own details are indented under it, up to the next node or blank line
+                indent = match.start() + 1
+                details = takewhile(lambda detail: detail[:indent].isspace() and '->' not in detail, lines[number + 1:])
+                if any('Index Cond:' in detail for detail in details):
+                    continue
+            scans.append((table, index))
+    else:
+        raise QueryAuditError(f'Query plan audit is not supported on {vendor}')
+    return sorted({(table.strip('"'), index or None) for table, index in scans}, key=lambda scan: (scan[0], scan[1] or ''))
+
+
+def explain(sql, vendor):
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+        cursor.execute(f'EXPLAIN {sql}')
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+def audit_query_plans(names=None):
+    """Return [{'name', 'used_by', 'plan', 'scans'}] for the canonical queries"""
+    vendor = connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        raise QueryAuditError(f'Query plan audit is not supported on {vendor}')
+    results = []
+    with override_settings(CACHES=NO_CACHES), transaction.atomic():
+        if vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for name, (used_by, run) in CANONICAL_QUERIES.items():
+            if names and name not in names:
+                continue
+            with CaptureQueriesContext(connection) as queries:
+                run()
+            plans = [
+                f"{query['sql']}\n{explain(query['sql'], vendor)}"
+                for query in queries.captured_queries
+                if query['sql'].lstrip().upper().startswith(('SELECT', 'WITH'))
+            ]
+            plan = '\n\n'.join(plans)
+            accepted = ACCEPTED_SCANS.get(name, {})
+            results.append({
+                'name': name,
+                'used_by': used_by,
+                'plan': plan,
+                'scans': [
+                    f'{table} ({index})' if index else table
+                    for table, index in full_scans(plan, vendor)
+                    if (index or table) not in accepted
+                ],
+            })
+        # Views only read, but nothing they might write should outlive the audit
+        transaction.set_rollback(True)
+    return results
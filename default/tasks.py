@@ -0,0 +1,9 @@
+# Celery Tasks
+"""Discovered by the Celery app in easyerp.celery; see default.jobs"""
+from celery import shared_task
+from .jobs import execute_job
+
+
+@shared_task(name='default.run_job', ignore_result=True)
+def run_job(job_id):
+    execute_job(job_id)
@@ -0,0 +1,80 @@
+"""
+Tests for time-ordered document keys.
+"""
+
+import io
+import time
+import uuid
+from datetime import date
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import resolve, reverse
+
+from default import ids
+from GL.models import FiscalYear, JournalEntryHeader
+
+
+class UUID7Tests(SimpleTestCase):
+    """Keys are RFC 9562 version 7 UUIDs that sort by creation"""
+
+    def test_version_variant_and_timestamp(self):
+        before = time.time()
+        value = ids.uuid7()
+
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+        self.assertAlmostEqual(ids.uuid7_time(value), before, delta=1)
+        self.assertIsNone(ids.uuid7_time(uuid.uuid4()))
+
+    def test_keys_are_strictly_increasing(self):
+        keys = [ids.uuid7() for _ in range(10000)]
+
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+        # SQLite stores UUIDField as char(32) hex, which must sort the same way
+        hex_keys = [key.hex for key in keys]
+        self.assertEqual(hex_keys, sorted(hex_keys))
+
+    @mock.patch.multiple('default.ids', _last_ms=0, _counter=0)
+    def test_counter_overflow_and_clock_steps_stay_ordered(self):
+        with mock.patch('default.ids.time.time_ns', return_value=1_800_000_000_000_000_000):
+            keys = [ids.uuid7() for _ in range(5000)]
+        with mock.patch('default.ids.time.time_ns', return_value=1_700_000_000_000_000_000):
+            keys.append(ids.uuid7())
+
+        self.assertGreater(ids.uuid7_time(keys[-1]), 1_800_000_000)
+
+        self.assertEqual(keys, sorted(keys))
+
+    def test_uuid_url_converter(self):
+        value = ids.uuid7()
+        url = reverse('gl:entry_detail', args=[value])
+
+        self.assertEqual(resolve(url).kwargs['pk'], value)
+
+    def test_insert_benchmark_command(self):
+        # Timings vary with the machine, so they are reported by a command rather than asserted
+        out = io.StringIO()
+        call_command('benchmark_document_keys', rows=2000, stdout=out)
+
+        self.assertEqual([line.split(':')[0] for line in out.getvalue().splitlines()], ['uuid7', 'uuid4'])
+        self.assertIn('2000 rows in', out.getvalue())
+
+
+class DocumentKeyTests(TestCase):
+
+    def test_new_documents_get_time_ordered_keys(self):
+        fiscal_year = FiscalYear.objects.create(name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        entries = JournalEntryHeader.objects.bulk_create([
+            JournalEntryHeader(entry_number=f'JE-{number:04d}', entry_date=date(2025, 1, 1),
+                               fiscal_year=fiscal_year, description='Bulk load')
+            for number in range(1, 51)
+        ])
+
+        self.assertTrue(all(entry.pk.version == 7 for entry in entries))
+        self.assertEqual(
+            list(JournalEntryHeader.objects.order_by('pk').values_list('entry_number', flat=True)),
+            [entry.entry_number for entry in entries],
+        )
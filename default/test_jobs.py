@@ -0,0 +1,149 @@
+"""
+Tests for background jobs.
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from default.jobs import JOB_HANDLERS, JOB_LEASE, JobConflictError, JobError, execute_job, scoped_key, submit_job
+from default.models import BackgroundJob
+
+CALLS = []
+
+
+def count_to(job, total, fail=False):
+    CALLS.append(job.pk)
+    for done in range(1, total + 1):
+        job.report_progress(done, total)
+    if fail:
+        raise ValueError('Handler failed')
+    return {'counted': total}
+
+
+@mock.patch.dict(JOB_HANDLERS, {'test.count': 'default.test_jobs.count_to'})
+class BackgroundJobTests(TestCase):
+    """Jobs run once per idempotency key and record progress and results"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='clerk', password='pw')
+
+    def setUp(self):
+        CALLS.clear()
+
+    def submit(self, params, key=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            job, queued = submit_job('test.count', params, key=key, user=self.user)
+        job.refresh_from_db()
+        return job, queued
+
+    def test_job_runs_on_commit(self):
+        job, queued = self.submit({'total': 3})
+
+        self.assertTrue(queued)
+        self.assertEqual(job.status, 'SUCCESS')
+        self.assertEqual(job.result, {'counted': 3})
+        self.assertEqual((job.progress_done, job.progress_total, job.percent_complete), (3, 3, 100))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_same_key_returns_existing_job(self):
+        first, _ = self.submit({'total': 2})
+        again, queued = self.submit({'total': 2})
+        explicit, _ = self.submit({'total': 5}, key='client-key')
+        retried, _ = self.submit({'total': 5}, key='client-key')
+
+        self.assertEqual(first.pk, again.pk)
+        self.assertFalse(queued)
+        self.assertEqual(explicit.pk, retried.pk)
+        self.assertEqual(retried.result, {'counted': 5})
+        self.assertEqual(CALLS, [first.pk, explicit.pk])
+
+    def test_key_reused_with_other_params_is_refused(self):
+        job, _ = self.submit({'total': 5}, key='client-key')
+
+        with self.assertRaises(JobConflictError):
+            self.submit({'total': 9}, key='client-key')
+        self.assertEqual(CALLS, [job.pk])
+
+    def test_keys_are_scoped_to_the_user_and_kind(self):
+        other = get_user_model().objects.create_user(username='other', password='pw')
+        mine, _ = self.submit({'total': 1}, key='shared')
+        with self.captureOnCommitCallbacks(execute=True):
+            theirs, queued = submit_job('test.count', {'total': 1}, key='shared', user=other)
+            with mock.patch.dict(JOB_HANDLERS, {'test.other': 'default.test_jobs.count_to'}):
+                other_kind, _ = submit_job('test.other', {'total': 1}, key='shared', user=self.user)
+
+        self.assertTrue(queued)
+        self.assertEqual(len({mine.pk, theirs.pk, other_kind.pk}), 3)
+        self.assertNotEqual(mine.idempotency_key, 'shared')
+
+    def test_failed_job_is_retried_under_its_key(self):
+        job, _ = self.submit({'total': 1, 'fail': True}, key='retry')
+        self.assertEqual((job.status, job.error), ('FAILURE', 'Handler failed'))
+
+        BackgroundJob.objects.filter(pk=job.pk).update(params={'total': 1})
+        retried, queued = self.submit({'total': 1}, key='retry')
+
+        self.assertTrue(queued)
+        self.assertEqual(retried.status, 'SUCCESS')
+        self.assertEqual(retried.error, '')
+
+    def test_redelivered_job_does_not_run_again(self):
+        job, _ = self.submit({'total': 1})
+
+        self.assertIsNone(execute_job(job.pk))
+        self.assertEqual(CALLS, [job.pk])
+
+    def test_job_of_a_dead_worker_is_reclaimed_once_its_lease_lapses(self):
+        job = BackgroundJob.objects.create(
+            kind='test.count', idempotency_key=scoped_key('test.count', 'crashed', self.user), params={'total': 2},
+        )
+        started = timezone.now() - timedelta(minutes=1)
+        BackgroundJob.objects.filter(pk=job.pk).update(status='RUNNING', started_at=started, heartbeat_at=started)
+
+        # The worker may still be alive, so a redelivered task leaves the job alone
+        self.assertIsNone(execute_job(job.pk))
+        again, queued = self.submit({'total': 2}, key='crashed')
+        self.assertFalse(queued)
+        self.assertEqual(again.status, 'RUNNING')
+
+        lapsed = timezone.now() - JOB_LEASE - timedelta(seconds=1)
+        BackgroundJob.objects.filter(pk=job.pk).update(heartbeat_at=lapsed)
+        reclaimed = execute_job(job.pk)
+
+        self.assertEqual(reclaimed.status, 'SUCCESS')
+        self.assertEqual(CALLS, [job.pk])
+        self.assertGreater(reclaimed.started_at, started)
+
+    def test_lapsed_job_is_requeued_under_its_key(self):
+        job, _ = self.submit({'total': 1}, key='lapsed')
+        lapsed = timezone.now() - JOB_LEASE - timedelta(seconds=1)
+        BackgroundJob.objects.filter(pk=job.pk).update(status='RUNNING', heartbeat_at=lapsed, finished_at=None)
+
+        retried, queued = self.submit({'total': 1}, key='lapsed')
+
+        self.assertTrue(queued)
+        self.assertEqual(retried.status, 'SUCCESS')
+        self.assertEqual(CALLS, [job.pk, job.pk])
+
+    def test_unknown_kind(self):
+        with self.assertRaises(JobError):
+            submit_job('test.missing', {})
+
+    def test_status_endpoint_is_limited_to_the_owner(self):
+        job, _ = self.submit({'total': 4})
+        other = get_user_model().objects.create_user(username='other', password='pw')
+
+        self.client.force_login(self.user)
+        status = self.client.get(f'/jobs/{job.pk}/').json()
+        self.client.force_login(other)
+        hidden = self.client.get(f'/jobs/{job.pk}/')
+
+        self.assertEqual(status['status'], 'SUCCESS')
+        self.assertEqual(status['progress'], {'done': 4, 'total': 4, 'percent': 100})
+        self.assertEqual(status['result'], {'counted': 4})
+        self.assertEqual(hidden.status_code, 404)
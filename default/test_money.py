@@ -0,0 +1,71 @@
+"""
+Tests for integer-cent money aggregation.
+"""
+
+import random
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.db.models import F, Sum
+from django.test import SimpleTestCase, TestCase
+
+from default import money
+from GL.models import Account, AccountType, FiscalYear, JournalEntryDetail, JournalEntryHeader
+
+
+def random_amounts(count=5000):
+    generator = random.Random(7)
+    return [Decimal(generator.randint(-10 ** 13 + 1, 10 ** 13 - 1)).scaleb(-2) for _ in range(count)]
+
+
+class MoneyTests(SimpleTestCase):
+    """Cent aggregation always equals Decimal arithmetic"""
+
+    def test_round_trip_is_exact(self):
+        for amount in [Decimal('0.00'), Decimal('0.01'), Decimal('-0.10'), Decimal('99999999999999.99'), Decimal('5')]:
+            self.assertEqual(money.from_cents(money.to_cents(amount)), amount)
+        self.assertEqual(str(money.from_cents(150)), '1.50')
+        self.assertEqual(money.to_cents(None), 0)
+
+    def test_fractions_of_a_cent_are_rejected(self):
+        with self.assertRaisesMessage(money.MoneyError, '0.005 is not a whole number of cents'):
+            money.to_cents(Decimal('0.005'))
+        self.assertEqual(money.to_cents(Decimal('1.500')), 150)
+
+    def test_int64_guard(self):
+        cents = np.array([money.to_cents(amount) for amount in random_amounts(100)], dtype=np.int64)
+
+        self.assertTrue(money.fits_int64(cents))
+        self.assertTrue(money.fits_int64(cents[:0]))
+        with mock.patch('default.money.INT64_MAX', 10 ** 6):
+            self.assertFalse(money.fits_int64(cents))
+
+    def test_array_sums_are_exact(self):
+        amounts = random_amounts(200000)
+        cents = np.array([money.to_cents(amount) for amount in amounts], dtype=np.int64)
+
+        self.assertTrue(money.fits_int64(cents))
+        self.assertEqual(money.from_cents(cents.sum()), sum(amounts, Decimal('0.00')))
+
+
+class CentsExpressionTests(TestCase):
+
+    def test_database_cents_equal_decimal_amounts(self):
+        cash_type = AccountType.objects.create(name='Cash', category='ASSET', normal_balance='DEBIT')
+        cash = Account.objects.create(account_number='1000', account_name='Cash', account_type=cash_type)
+        fiscal_year = FiscalYear.objects.create(name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        entry = JournalEntryHeader.objects.create(
+            entry_number='JE-0001', entry_date=date(2025, 1, 1), fiscal_year=fiscal_year, description='Amounts',
+        )
+        amounts = [abs(amount) for amount in random_amounts(500)] + [Decimal('0.29'), Decimal('1.15'), Decimal('0.01')]
+        JournalEntryDetail.objects.bulk_create([
+            JournalEntryDetail(journal_entry=entry, account=cash, debit_amount=amount) for amount in amounts
+        ])
+        lines = JournalEntryDetail.objects.order_by()
+
+        cents = list(lines.values_list(money.Cents(F('debit_amount') - F('credit_amount')), flat=True))
+
+        self.assertEqual(sorted(cents), sorted(money.to_cents(amount) for amount in amounts))
+        self.assertEqual(lines.aggregate(total=Sum(money.Cents('debit_amount')))['total'], sum(cents))
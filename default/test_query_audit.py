@@ -0,0 +1,80 @@
+"""
+Tests for the query plan audit.
+"""
+
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from default.query_audit import ACCEPTED_SCANS, CANONICAL_QUERIES, audit_query_plans, full_scans
+
+
+class QueryAuditTests(TestCase):
+    """Canonical view queries are served by indexes"""
+
+    def test_canonical_queries_use_indexes(self):
+        out = io.StringIO()
+
+        call_command('audit_query_plans', stdout=out)
+
+        self.assertIn('All 10 queries use indexes', out.getvalue())
+
+    def test_audit_explains_the_sql_the_views_run(self):
+        [dashboard] = audit_query_plans(['gl.dashboard'])
+
+        # The recent entries and the unposted count, as gl_summary issues them
+        self.assertIn('ORDER BY "GL_journalentryheader"."created_at" DESC LIMIT 5', dashboard['plan'])
+        self.assertIn('WHERE NOT "GL_journalentryheader"."is_posted"', dashboard['plan'])
+
+    def test_sqlite_plan_parsing(self):
+        plan = '\n'.join([
+            '3 0 0 SCAN GL_journalentryheader',
+            '5 0 0 SEARCH GL_journalentrydetail USING INDEX gl_line_account_entry_idx (account_id=?)',
+            '7 0 0 SCAN sales_invoice USING INDEX sales_inv_status_date_idx',
+            '8 0 0 SCAN GL_journalentryheader USING COVERING INDEX gl_entry_stats_idx',
+            '9 0 0 SCAN gl_entry_search VIRTUAL TABLE INDEX 0:M4',
+            '11 0 0 SEARCH sales_invoice USING COVERING INDEX sales_inv_status_date_idx (status=? AND invoice_date>?)',
+            '12 0 0 SCAN CONSTANT ROW',
+            '13 0 0 SCAN (subquery-2)',
+        ])
+
+        self.assertEqual(full_scans(plan, 'sqlite'), [
+            ('GL_journalentryheader', None),
+            ('GL_journalentryheader', 'gl_entry_stats_idx'),
+            ('sales_invoice', 'sales_inv_status_date_idx'),
+        ])
+
+    def test_postgresql_plan_parsing(self):
+        plan = '\n'.join([
+            'Hash Join  (cost=1.00..2.00 rows=1 width=8)',
+            '  ->  Seq Scan on "GL_account"  (cost=0.00..1.00 rows=1 width=8)',
+            '  ->  Index Scan using gl_entry_draft_idx on "GL_journalentryheader"  (cost=0.00..1.00 rows=1 width=8)',
+            '        Index Cond: (entry_date >= \'2025-01-01\'::date)',
+            '  ->  Index Only Scan Backward using gl_entry_stats_idx on "GL_journalentryheader"  (cost=0.00..1.00 rows=1 width=8)',
+            '        Filter: is_posted',
+            '',
+            'Index Scan using sales_inv_created_idx on sales_invoice  (cost=0.00..1.00 rows=1 width=8)',
+        ])
+
+        self.assertEqual(full_scans(plan, 'postgresql'), [
+            ('GL_account', None),
+            ('GL_journalentryheader', 'gl_entry_stats_idx'),
+            ('sales_invoice', 'sales_inv_created_idx'),
+        ])
+
+    def test_accepted_scans_are_per_query(self):
+        self.assertLessEqual(set(ACCEPTED_SCANS), set(CANONICAL_QUERIES))
+
+        with mock.patch('default.query_audit.full_scans', return_value=[('GL_journalentryheader', 'gl_entry_stats_idx')]):
+            [entry_list] = audit_query_plans(['gl.entry_list'])
+            [detail] = audit_query_plans(['gl.entry_detail'])
+
+        self.assertEqual(entry_list['scans'], [])
+        self.assertEqual(detail['scans'], ['GL_journalentryheader (gl_entry_stats_idx)'])
+
+    def test_unknown_query_name(self):
+        with self.assertRaises(CommandError):
+            call_command('audit_query_plans', 'no.such.query', stdout=io.StringIO())
@@ -0,0 +1,50 @@
+"""
+Tests for document number sequences.
+"""
+
+from datetime import date
+
+from django.test import TestCase, TransactionTestCase
+
+from default.models import DocumentSequence
+from default.sequences import (
+    SequenceBlock, SequenceError, allocate_document_numbers, next_document_number,
+)
+from GL.models import FiscalYear, JournalEntryHeader
+
+
+class DocumentSequenceTests(TestCase):
+    """Numbers are allocated from a locked counter row"""
+
+    def test_numbers_are_consecutive(self):
+        self.assertEqual(next_document_number('invoice'), 'INV-0001')
+        self.assertEqual(next_document_number('invoice'), 'INV-0002')
+        self.assertEqual(allocate_document_numbers('invoice', 3), ['INV-0003', 'INV-0004', 'INV-0005'])
+
+    def test_sequence_starts_after_existing_numbers(self):
+        fiscal_year = FiscalYear.objects.create(name='FY 2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        for number in ['JE-9999', 'JE-10000', 'JE-2025-001']:
+            JournalEntryHeader.objects.create(entry_number=number, fiscal_year=fiscal_year, description='Existing')
+
+        self.assertEqual(next_document_number('journal_entry'), 'JE-10001')
+
+    def test_unknown_sequence_is_rejected(self):
+        with self.assertRaises(SequenceError):
+            next_document_number('unknown')
+
+    def test_block_requires_no_open_transaction(self):
+        with self.assertRaises(SequenceError):
+            SequenceBlock('sales_order', block_size=10).next_number()
+
+
+class SequenceBlockTests(TransactionTestCase):
+    """Blocks reserve many numbers with one counter update"""
+
+    def test_block_hands_out_reserved_numbers(self):
+        block = SequenceBlock('purchase_order', block_size=2)
+
+        numbers = [block.next_number() for _ in range(3)]
+
+        self.assertEqual(numbers, ['PO-0001', 'PO-0002', 'PO-0003'])
+        self.assertEqual(DocumentSequence.objects.get(name='purchase_order').next_value, 5)
+        self.assertEqual(next_document_number('purchase_order'), 'PO-0005')
@@ -1,12 +1,15 @@
 # EasyERP Main Views
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
+from django.core.serializers.json import DjangoJSONEncoder
 from django.http import JsonResponse, HttpResponse
 from django.db.models import Sum, Count, F
 from django.utils import timezone
 from datetime import datetime, timedelta
+from .jobs import job_status as job_status_report
+from .models import BackgroundJob
 
 # Health check view (keep existing)
 def hello_world(request):
@@ -51,15 +54,20 @@ def dashboard(request):
         from sales.models import SalesOrder, Customer, Invoice
         from purchasing.models import PurchaseOrder
         from inventory.models import Product, StockMovement
+        from inventory.stock import low_stock_products
         from GL.models import JournalEntryHeader
         
+        month_start = timezone.now().date().replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        
         # Sales statistics
         context['sales_stats'] = {
             'total_customers': Customer.objects.filter(is_active=True).count(),
             'pending_orders': SalesOrder.objects.filter(status__in=['DRAFT', 'CONFIRMED']).count(),
             'monthly_revenue': Invoice.objects.filter(
-                invoice_date__month=timezone.now().month,
-                status='PAID'
+                status='PAID',
+                invoice_date__gte=month_start,
+                invoice_date__lt=next_month,
             ).aggregate(total=Sum('total_amount'))['total'] or 0,
         }
         
@@ -71,7 +79,7 @@ def dashboard(request):
         # Inventory statistics
         context['inventory_stats'] = {
             'total_products': Product.objects.filter(is_active=True).count(),
-            'low_stock_items': 0,  # Simplified for now
+            'low_stock_items': low_stock_products().count(),
         }
         
         # GL statistics
@@ -122,6 +130,15 @@ def quick_stats_api(request):
     except ImportError:
         return JsonResponse({'error': 'Modules not available'})
 
+@login_required
+def job_status(request, pk):
+    """Poll a background job: status, progress and, once finished, its result"""
+    jobs = BackgroundJob.objects.all()
+    if not request.user.is_staff:
+        jobs = jobs.filter(created_by=request.user)
+    job = get_object_or_404(jobs, pk=pk)
+    return JsonResponse(job_status_report(job), encoder=DjangoJSONEncoder)
+
 # Module navigation helper
 @login_required
 def module_navigator(request):
@@ -0,0 +1,7 @@
+# Load the Celery app when Celery is installed so shared tasks bind to it
+try:
+    from .celery import app as celery_app
+except ImportError:  # Optional; background jobs then run in-process
+    celery_app = None
+
+__all__ = ('celery_app',)
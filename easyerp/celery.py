@@ -0,0 +1,10 @@
+# Celery application for the worker started by celery_start
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'easyerp.settings')
+
+app = Celery('easyerp')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
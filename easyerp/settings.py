@@ -132,6 +132,41 @@ else:
         }
     }
 
+# Caches: cached GL summaries and reports are keyed by the ledger version, which
+# lives in the database (GL.models.LedgerVersion), so per-process caches never
+# serve a stale ledger. CACHE_URL optionally shares "default" through Redis.
+# Computed reports live in a per-process LRU cache bounded by
+# REPORT_CACHE_ENTRIES (see GL.report_cache).
+CACHE_URL = os.getenv('CACHE_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+    } if CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reports': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'reports',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('REPORT_CACHE_ENTRIES', '200')),
+            'CULL_FREQUENCY': 4,
+        },
+    },
+}
+
+# Celery: the worker started by celery_start runs background jobs (default.jobs).
+# Outside production jobs run eagerly in-process, which is also what tests use.
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'no' if env == 'no' else 'yes') == 'yes'
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BEAT_SCHEDULE = {
+    # Idempotent, so it can run often: each run only creates entries not generated yet
+    'gl-recurring-entries': {'task': 'GL.generate_recurring_entries', 'schedule': 3600.0},
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
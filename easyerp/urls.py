@@ -17,6 +17,7 @@ urlpatterns = [
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('profile/', default_views.user_profile, name='user_profile'),
+    path('jobs/<uuid:pk>/', default_views.job_status, name='job_status'),
     
     # Module URLs
     path('inventory/', include('inventory.urls')),
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from inventory.stock import rebuild_stock_balances
+
+class Command(BaseCommand):
+    help = 'Recompute the stock on hand per product and warehouse from all stock movements'
+
+    def handle(self, *args, **options):
+        rows = rebuild_stock_balances()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} stock balances'))
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:44
+
+import default.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stock_movement_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='stockmovement',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+        ]),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='warehouse',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='inventory.warehouse'),
+        ),
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_balances', to='inventory.product')),
+                ('warehouse', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_balances', to='inventory.warehouse')),
+            ],
+            options={
+                'ordering': ['product', 'warehouse'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockbalance',
+            constraint=models.UniqueConstraint(condition=models.Q(('warehouse__isnull', False)), fields=('product', 'warehouse'), name='inv_balance_product_warehouse_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockbalance',
+            constraint=models.UniqueConstraint(condition=models.Q(('warehouse__isnull', True)), fields=('product',), name='inv_balance_product_unassigned_uniq'),
+        ),
+        # Existing movements predate warehouses, so they all land in the unassigned balance
+        migrations.RunSQL(
+            'INSERT INTO "inventory_stockbalance" ("product_id", "warehouse_id", "quantity", "updated_at") '
+            'SELECT "product_id", "warehouse_id", SUM("quantity_change"), CURRENT_TIMESTAMP '
+            'FROM "inventory_stockmovement" GROUP BY "product_id", "warehouse_id"',
+            migrations.RunSQL.noop,
+        ),
+    ]
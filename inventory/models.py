@@ -2,7 +2,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-import uuid
+from default.ids import uuid7
 
 User = get_user_model()
 
@@ -65,9 +65,14 @@ class Product(models.Model):
 
     @property
     def current_stock(self):
-        """Calculate current stock from stock movements"""
-        movements = self.stockmovement_set.all()
-        return sum(movement.quantity_change for movement in movements)
+        """Stock on hand across all warehouses, from the maintained StockBalance rows.
+
+        Querysets from inventory.stock.products_with_stock() carry it as the
+        ``stock_on_hand`` annotation, so listing products costs no extra queries.
+        """
+        if hasattr(self, 'stock_on_hand'):
+            return self.stock_on_hand
+        return self.stock_balances.aggregate(total=models.Sum('quantity'))['total'] or 0
 
 class StockMovement(models.Model):
     """Track all stock movements (in/out/adjustments)"""
@@ -78,8 +83,9 @@ class StockMovement(models.Model):
         ('TRANSFER', 'Transfer'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    warehouse = models.ForeignKey('Warehouse', on_delete=models.PROTECT, null=True, blank=True)  # None: not assigned to a warehouse
     movement_type = models.CharField(max_length=10, choices=MOVEMENT_TYPES)
     quantity_change = models.IntegerField()  # Positive for in, negative for out
     reference_number = models.CharField(max_length=50, blank=True)
@@ -90,8 +96,44 @@ class StockMovement(models.Model):
     def __str__(self):
         return f"{self.product.sku} - {self.movement_type} - {self.quantity_change}"
 
+    def save(self, *args, **kwargs):
+        """Save the movement and apply its quantity to StockBalance in the same transaction"""
+        from django.db import transaction
+        from .stock import apply_stock_deltas
+
+        with transaction.atomic():
+            deltas = {}
+            if not self._state.adding:
+                old = StockMovement.objects.select_for_update().filter(pk=self.pk).values(
+                    'product_id', 'warehouse_id', 'quantity_change'
+                ).first()
+                if old:
+                    deltas[old['product_id'], old['warehouse_id']] = -old['quantity_change']
+            key = (self.product_id, self.warehouse_id)
+            deltas[key] = deltas.get(key, 0) + self.quantity_change
+            super().save(*args, **kwargs)
+            apply_stock_deltas(deltas)
+
+    def delete(self, *args, **kwargs):
+        """Delete the movement and reverse its stored quantity from StockBalance in the same transaction"""
+        from django.db import transaction
+        from .stock import apply_stock_deltas
+
+        with transaction.atomic():
+            old = StockMovement.objects.select_for_update().filter(pk=self.pk).values(
+                'product_id', 'warehouse_id', 'quantity_change'
+            ).first()
+            result = super().delete(*args, **kwargs)
+            # A stale instance whose row is already gone must not reverse it a second time
+            if old and result[0]:
+                apply_stock_deltas({(old['product_id'], old['warehouse_id']): -old['quantity_change']})
+        return result
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', '-created_at'], name='inv_move_product_date_idx'),
+        ]
 
 class Warehouse(models.Model):
     """Warehouse/Location management"""
@@ -104,3 +146,28 @@ class Warehouse(models.Model):
 
     def __str__(self):
         return f"{self.code} - {self.name}"
+
+
+class StockBalance(models.Model):
+    """Stock on hand per product and warehouse, kept in step with StockMovement by inventory.stock"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_balances')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, null=True, blank=True, related_name='stock_balances')
+    quantity = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product.sku} @ {self.warehouse.code if self.warehouse else 'unassigned'}: {self.quantity}"
+
+    class Meta:
+        ordering = ['product', 'warehouse']
+        constraints = [
+            # NULLs never conflict in a unique index, so unassigned stock needs its own constraint
+            models.UniqueConstraint(
+                fields=['product', 'warehouse'], condition=models.Q(warehouse__isnull=False),
+                name='inv_balance_product_warehouse_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['product'], condition=models.Q(warehouse__isnull=True),
+                name='inv_balance_product_unassigned_uniq',
+            ),
+        ]
@@ -0,0 +1,116 @@
+# Stock On Hand
+"""
+StockBalance holds the stock on hand per (product, warehouse), so reading
+a product's stock sums a handful of balance rows instead of every movement
+it ever had.
+
+Balances are changed only by apply_stock_deltas(), inside the transaction
+that writes the movements:
+
+* StockMovement.save() and delete() apply a single movement, or the
+  difference when an existing movement is edited.
+* record_stock_movements() bulk inserts many movements and applies one
+  grouped delta per (product, warehouse).
+
+Queryset bulk operations (bulk_create, update, delete) on StockMovement
+bypass the model methods. Use record_stock_movements(), or run
+rebuild_stock_balances() afterwards. The rebuild recomputes every balance
+from the movements with one INSERT ... SELECT ... GROUP BY.
+"""
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from default.money import Cents, from_cents
+from .models import Product, StockBalance, StockMovement
+
+
+def _balance_order(key):
+    product_id, warehouse_id = key
+    return product_id, warehouse_id or 0
+
+
+def apply_stock_deltas(deltas):
+    """Add {(product_id, warehouse_id): quantity} to the stock balances.
+
+    Must be called inside a transaction. Updates are expressed with F() so
+    concurrent movements never lose a delta, and rows are updated in key
+    order so concurrent movements lock them in the same order. A row that
+    does not exist yet, for a product's first movement into a warehouse, is
+    inserted and then updated.
+    """
+    deltas = {key: quantity for key, quantity in deltas.items() if quantity}
+    missing = []
+    for key in sorted(deltas, key=_balance_order):
+        product_id, warehouse_id = key
+        if not StockBalance.objects.filter(product_id=product_id, warehouse_id=warehouse_id).update(
+            quantity=F('quantity') + deltas[key], updated_at=timezone.now()
+        ):
+            missing.append(key)
+    if not missing:
+        return
+    # A concurrent first movement may insert the same row; the update below then adds to it
+    StockBalance.objects.bulk_create(
+        [StockBalance(product_id=product_id, warehouse_id=warehouse_id) for product_id, warehouse_id in missing],
+        ignore_conflicts=True,
+    )
+    for product_id, warehouse_id in missing:
+        StockBalance.objects.filter(product_id=product_id, warehouse_id=warehouse_id).update(
+            quantity=F('quantity') + deltas[product_id, warehouse_id], updated_at=timezone.now()
+        )
+
+
+def record_stock_movements(movements, batch_size=1000):
+    """Bulk insert unsaved StockMovements and apply them to the balances in one transaction"""
+    deltas = {}
+    for movement in movements:
+        key = (movement.product_id, movement.warehouse_id)
+        deltas[key] = deltas.get(key, 0) + movement.quantity_change
+    with transaction.atomic():
+        created = StockMovement.objects.bulk_create(movements, batch_size=batch_size)
+        apply_stock_deltas(deltas)
+    return created
+
+
+def products_with_stock(products=None):
+    """Products annotated with ``stock_on_hand`` across warehouses, read by Product.current_stock"""
+    on_hand = (
+        StockBalance.objects.filter(product=OuterRef('pk'))
+        .order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    )
+    products = Product.objects.all() if products is None else products
+    return products.annotate(stock_on_hand=Coalesce(Subquery(on_hand, output_field=IntegerField()), 0))
+
+
+def stock_value(balances=None):
+    """Stock on hand at cost, summed as integer cents in the database and returned as a two-place Decimal"""
+    balances = StockBalance.objects.all() if balances is None else balances
+    total = balances.aggregate(
+        total=Sum(F('quantity') * Cents('product__cost_price'), output_field=BigIntegerField())
+    )['total']
+    return from_cents(total or 0)
+
+
+def low_stock_products(products=None):
+    """Active products at or below their minimum stock"""
+    return products_with_stock(products).filter(is_active=True, stock_on_hand__lte=F('minimum_stock'))
+
+
+def rebuild_stock_balances():
+    """Recompute every stock balance from the movements. Returns the number of balance rows."""
+    quote = connection.ops.quote_name
+    balance_table, movement_table = quote(StockBalance._meta.db_table), quote(StockMovement._meta.db_table)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Movements committing during the rebuild wait, then apply their deltas to the new rows
+                cursor.execute(f'LOCK TABLE {balance_table} IN EXCLUSIVE MODE')
+            cursor.execute(f'DELETE FROM {balance_table}')
+            cursor.execute(
+                f'INSERT INTO {balance_table} ({quote("product_id")}, {quote("warehouse_id")}, '
+                f'{quote("quantity")}, {quote("updated_at")}) '
+                f'SELECT {quote("product_id")}, {quote("warehouse_id")}, SUM({quote("quantity_change")}), %s '
+                f'FROM {movement_table} GROUP BY {quote("product_id")}, {quote("warehouse_id")}',
+                [connection.ops.adapt_datetimefield_value(timezone.now())],
+            )
+            return cursor.rowcount
@@ -0,0 +1,130 @@
+"""
+Tests for the maintained stock on hand table.
+"""
+
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from inventory.models import Product, StockBalance, StockMovement, Warehouse
+from inventory.stock import low_stock_products, products_with_stock, rebuild_stock_balances, record_stock_movements, stock_value
+
+
+class StockBalanceTests(TestCase):
+    """Every movement is applied to its (product, warehouse) balance"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bolt = Product.objects.create(sku='BOLT', name='Bolt', barcode='BC-BOLT', minimum_stock=10)
+        cls.nut = Product.objects.create(sku='NUT', name='Nut', barcode='BC-NUT', minimum_stock=10)
+        cls.main = Warehouse.objects.create(name='Main', code='MAIN')
+        cls.annex = Warehouse.objects.create(name='Annex', code='ANNEX')
+
+    def move(self, product, quantity, warehouse=None, movement_type='IN'):
+        return StockMovement.objects.create(
+            product=product, warehouse=warehouse, movement_type=movement_type, quantity_change=quantity,
+        )
+
+    def balances(self):
+        return {
+            (balance.product.sku, balance.warehouse.code if balance.warehouse else None): balance.quantity
+            for balance in StockBalance.objects.select_related('product', 'warehouse')
+        }
+
+    def test_movements_update_balances(self):
+        self.move(self.bolt, 100, self.main)
+        self.move(self.bolt, -30, self.main, 'OUT')
+        self.move(self.bolt, 20, self.annex)
+        self.move(self.bolt, 5)
+
+        self.assertEqual(self.balances(), {('BOLT', 'MAIN'): 70, ('BOLT', 'ANNEX'): 20, ('BOLT', None): 5})
+        with self.assertNumQueries(1):
+            self.assertEqual(self.bolt.current_stock, 95)
+        self.assertEqual(self.nut.current_stock, 0)
+
+    def test_single_movement_is_one_update_once_the_balance_exists(self):
+        self.move(self.bolt, 100, self.main)
+
+        # The movement insert and one balance update, inside a savepoint
+        with self.assertNumQueries(4):
+            self.move(self.bolt, 1, self.main)
+
+    def test_editing_and_deleting_movements(self):
+        movement = self.move(self.bolt, 100, self.main)
+
+        movement.quantity_change = 60
+        movement.warehouse = self.annex
+        movement.save()
+        self.assertEqual(self.balances(), {('BOLT', 'MAIN'): 0, ('BOLT', 'ANNEX'): 60})
+
+        movement.delete()
+        self.assertEqual(self.balances(), {('BOLT', 'MAIN'): 0, ('BOLT', 'ANNEX'): 0})
+
+    def test_delete_reverses_the_stored_row_once(self):
+        self.move(self.bolt, 10, self.main)
+        movement = self.move(self.bolt, -3, self.main, 'OUT')
+        stale = StockMovement.objects.get(pk=movement.pk)
+
+        movement.quantity_change = -300  # Unsaved edit; the stored -3 is what gets reversed
+        movement.delete()
+        stale.delete()
+
+        self.assertEqual(self.bolt.current_stock, 10)
+        self.assertEqual(self.balances(), {('BOLT', 'MAIN'): 10})
+
+    def test_bulk_movements_apply_grouped_deltas(self):
+        record_stock_movements([
+            StockMovement(product=product, warehouse=self.main, movement_type='IN', quantity_change=quantity)
+            for product in [self.bolt, self.nut] for quantity in range(1, 101)
+        ])
+
+        self.assertEqual(StockMovement.objects.count(), 200)
+        self.assertEqual(self.balances(), {('BOLT', 'MAIN'): 5050, ('NUT', 'MAIN'): 5050})
+
+    def test_rebuild_repairs_bypassed_movements(self):
+        self.move(self.bolt, 100, self.main)
+        StockMovement.objects.bulk_create([
+            StockMovement(product=self.nut, warehouse=self.annex, movement_type='IN', quantity_change=7),
+            StockMovement(product=self.nut, movement_type='ADJ', quantity_change=-2),
+        ])
+        StockBalance.objects.filter(product=self.bolt).update(quantity=1)
+
+        self.assertEqual(rebuild_stock_balances(), 3)
+        self.assertEqual(self.balances(), {('BOLT', 'MAIN'): 100, ('NUT', 'ANNEX'): 7, ('NUT', None): -2})
+
+        out = io.StringIO()
+        call_command('rebuild_stock_balances', stdout=out)
+        self.assertIn('Rebuilt 3 stock balances', out.getvalue())
+
+    def test_product_lists_read_stock_in_one_query(self):
+        self.move(self.bolt, 100, self.main)
+        self.move(self.nut, 4, self.annex)
+
+        with self.assertNumQueries(1):
+            stock = {product.sku: product.current_stock for product in products_with_stock().order_by('sku')}
+
+        self.assertEqual(stock, {'BOLT': 100, 'NUT': 4})
+        self.assertEqual([product.sku for product in low_stock_products()], ['NUT'])
+
+    def test_dashboard_lists_low_stock(self):
+        self.move(self.nut, 4, self.annex)
+        self.client.force_login(get_user_model().objects.create_user(username='stores', password='pw'))
+
+        response = self.client.get('/inventory/')
+
+        self.assertEqual(response.context['low_stock_count'], 2)
+        self.assertContains(response, 'Stock: 4 (Min: 10)')
+
+    def test_stock_value_is_exact(self):
+        Product.objects.filter(pk=self.bolt.pk).update(cost_price=Decimal('0.29'))
+        Product.objects.filter(pk=self.nut.pk).update(cost_price=Decimal('12345678.99'))
+        self.move(self.bolt, 100, self.main)
+        self.move(self.bolt, 3, self.annex)
+        self.move(self.nut, 7)
+
+        self.assertEqual(stock_value(), Decimal('29.87') + 7 * Decimal('12345678.99'))
+        self.assertEqual(stock_value(StockBalance.objects.filter(warehouse=self.annex)), Decimal('0.87'))
+        self.assertEqual(stock_value(StockBalance.objects.none()), Decimal('0.00'))
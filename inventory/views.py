@@ -2,13 +2,20 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from .stock import low_stock_products, stock_value
+
+LOW_STOCK_ALERTS = 5
 
 @login_required
 def inventory_dashboard(request):
     """Inventory Module Dashboard"""
+    low_stock = low_stock_products().order_by('stock_on_hand', 'sku')
     context = {
         'page_title': 'Inventory Dashboard',
         'module_name': 'Inventory Management',
+        'low_stock_count': low_stock.count(),
+        'low_stock_items': low_stock[:LOW_STOCK_ALERTS],
+        'total_stock_value': stock_value(),
     }
     return render(request, 'inventory/dashboard.html', context)
 
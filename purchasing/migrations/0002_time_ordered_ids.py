@@ -0,0 +1,36 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:44
+
+import default.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchasing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='goodsreceipt',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='goodsreceiptline',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='purchaseorder',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='purchaseorderline',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+        ]),
+    ]
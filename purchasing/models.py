@@ -3,7 +3,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from inventory.models import Product, Supplier
-import uuid
+from default.ids import uuid7
 
 User = get_user_model()
 
@@ -18,7 +18,7 @@ class PurchaseOrder(models.Model):
         ('CANCELLED', 'Cancelled'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     po_number = models.CharField(max_length=50, unique=True)
     supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE)
     order_date = models.DateField(default=timezone.now)
@@ -41,7 +41,7 @@ class PurchaseOrder(models.Model):
 
 class PurchaseOrderLine(models.Model):
     """Purchase Order line items"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name='lines')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity_ordered = models.IntegerField()
@@ -63,7 +63,7 @@ class PurchaseOrderLine(models.Model):
 
 class GoodsReceipt(models.Model):
     """Goods Receipt/Receiving documents"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     receipt_number = models.CharField(max_length=50, unique=True)
     purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE)
     received_date = models.DateField(default=timezone.now)
@@ -79,7 +79,7 @@ class GoodsReceipt(models.Model):
 
 class GoodsReceiptLine(models.Model):
     """Goods Receipt line items"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     goods_receipt = models.ForeignKey(GoodsReceipt, on_delete=models.CASCADE, related_name='lines')
     purchase_order_line = models.ForeignKey(PurchaseOrderLine, on_delete=models.CASCADE)
     quantity_received = models.IntegerField()
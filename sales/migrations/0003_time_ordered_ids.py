@@ -0,0 +1,31 @@
+# Generated by Django 4.0.5 on 2026-10-18 15:44
+
+import default.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_status_date_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='invoice',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='salesorder',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='salesorderline',
+                name='id',
+                field=models.UUIDField(default=default.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+        ]),
+    ]
@@ -3,7 +3,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from inventory.models import Product
-import uuid
+from default.ids import uuid7
 
 User = get_user_model()
 
@@ -28,6 +28,12 @@ class Customer(models.Model):
     def __str__(self):
         return f"{self.customer_id} - {self.company_name or self.contact_person}"
 
+    class Meta:
+        indexes = [
+            # Active customers, counted on the dashboard and listed by name
+            models.Index(fields=['company_name'], condition=models.Q(is_active=True), name='sales_customer_active_idx'),
+        ]
+
 class SalesOrder(models.Model):
     """Sales Order header"""
     STATUS_CHOICES = [
@@ -38,7 +44,7 @@ class SalesOrder(models.Model):
         ('CANCELLED', 'Cancelled'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     order_number = models.CharField(max_length=50, unique=True)
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
     order_date = models.DateField(default=timezone.now)
@@ -58,10 +64,15 @@ class SalesOrder(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'order_date'], name='sales_order_status_date_idx'),
+            # Most recent orders on the dashboard
+            models.Index(fields=['created_at'], name='sales_order_created_idx'),
+        ]
 
 class SalesOrderLine(models.Model):
     """Sales Order line items"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     sales_order = models.ForeignKey(SalesOrder, on_delete=models.CASCADE, related_name='lines')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.IntegerField()
@@ -89,7 +100,7 @@ class Invoice(models.Model):
         ('CANCELLED', 'Cancelled'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     invoice_number = models.CharField(max_length=50, unique=True)
     sales_order = models.ForeignKey(SalesOrder, on_delete=models.CASCADE, null=True, blank=True)
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
@@ -114,3 +125,10 @@ class Invoice(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'invoice_date'], name='sales_inv_status_date_idx'),
+            # Most recent invoices on the dashboard
+            models.Index(fields=['created_at'], name='sales_inv_created_idx'),
+            # Open receivables by due date, for collections and aging
+            models.Index(fields=['due_date'], condition=models.Q(status__in=['SENT', 'OVERDUE']), name='sales_inv_open_due_idx'),
+        ]
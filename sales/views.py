@@ -22,10 +22,14 @@ def sales_dashboard(request):
     # Monthly sales stats
     try:
         from django.utils import timezone
-        current_month = timezone.now().month
+        from datetime import timedelta
+        # Date range instead of __month so (status, invoice_date) index applies
+        month_start = timezone.now().date().replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
         context['monthly_revenue'] = Invoice.objects.filter(
-            invoice_date__month=current_month,
-            status='PAID'
+            status='PAID',
+            invoice_date__gte=month_start,
+            invoice_date__lt=next_month,
         ).aggregate(total=Sum('total_amount'))['total'] or 0
     except:
         context['monthly_revenue'] = 0